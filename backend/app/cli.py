@@ -0,0 +1,412 @@
+"""
+Maintenance commands for the GenAI Stack backend.
+
+Usage (from the backend directory):
+    python -m app.cli <command> [options]
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+
+def migrate_vectors(args) -> int:
+    """
+    Re-encode embedded collections into another storage dtype, optionally
+    importing them from a ChromaDB store first (no embeddings are recomputed)
+    """
+    from app.services.vector_backends.embedded_backend import EmbeddedBackend
+
+    backend = EmbeddedBackend(path=args.path or os.getenv("VECTOR_DATA_PATH", "./vector_data"))
+
+    try:
+        if args.from_chroma:
+            from app.services.vector_backends.chroma_backend import ChromaBackend
+
+            source = ChromaBackend.connect(path=args.from_chroma)
+            if source is None:
+                print(f"Could not open ChromaDB store at {args.from_chroma}")
+                return 1
+            names = args.collection or source.list_collections()
+        else:
+            source = None
+            names = args.collection or backend.list_collections()
+
+        for name in names:
+            if source is not None:
+                chroma_collection = source.get_collection(name)
+                if chroma_collection is None:
+                    print(f"{name}: not found in ChromaDB, skipped")
+                    continue
+                target = backend.get_or_create_collection(name)
+                copied = 0
+                while True:
+                    page = chroma_collection.get(
+                        include=["documents", "metadatas", "embeddings"],
+                        limit=args.batch_size,
+                        offset=copied
+                    )
+                    if not page["ids"]:
+                        break
+                    target.add(
+                        ids=page["ids"],
+                        documents=page["documents"],
+                        metadatas=page["metadatas"],
+                        embeddings=page["embeddings"]
+                    )
+                    copied += len(page["ids"])
+                print(f"{name}: copied {copied} chunks from ChromaDB")
+            else:
+                target = backend.get_collection(name)
+                if target is None:
+                    print(f"{name}: not found, skipped")
+                    continue
+
+            before = target.storage_stats()
+            target.convert_storage(args.dtype)
+            after = target.storage_stats()
+            print(
+                f"{name}: {before['storage_dtype']} -> {after['storage_dtype']}, "
+                f"{after['live_rows']} chunks, search bytes {before['search_bytes']:,} -> {after['search_bytes']:,}, "
+                f"disk bytes {before['disk_bytes']:,} -> {after['disk_bytes']:,}"
+            )
+    finally:
+        backend.close()
+
+    return 0
+
+
+def rebalance_shards(args) -> int:
+    """
+    Move collections to a new shard count; run while the API server is stopped
+    """
+    from app.services.vector_backends import create_vector_backend
+
+    backend = create_vector_backend()
+    if backend is None:
+        print("Vector store not available")
+        return 1
+    if not hasattr(backend, "rebalance"):
+        # A remote backend's shards belong to the vector store process; run this there
+        print(f"The {backend.name} backend cannot be rebalanced from here; set VECTOR_BACKEND to the store's own backend")
+        backend.close()
+        return 1
+
+    status = 0
+    try:
+        for name in args.collection:
+            before = backend.shard_count(name)
+            try:
+                moved = backend.rebalance(name, args.shards, batch_size=args.batch_size)
+            except ValueError as e:
+                print(f"{name}: {str(e)}")
+                status = 1
+                continue
+            print(f"{name}: {before} -> {args.shards} shards, {moved} chunks")
+    finally:
+        backend.close()
+
+    return status
+
+
+def _collection_name(args) -> str:
+    return args.collection or f"workflow_{args.workflow_id}"
+
+
+def export_vectors(args) -> int:
+    """
+    Write a collection's chunks, embeddings and metadata to a snapshot file
+    """
+    from app.services.vector_backends import create_vector_backend
+    from app.services.vector_snapshot import export_snapshot
+
+    backend = create_vector_backend()
+    if backend is None:
+        print("Vector store not available")
+        return 1
+
+    name = _collection_name(args)
+    output = args.output or f"{name}.vectors.tar"
+    try:
+        collection = backend.get_collection(name)
+        if collection is None:
+            print(f"{name}: not found")
+            return 1
+        manifest = export_snapshot(collection, output, batch_size=args.batch_size)
+        print(f"{name}: exported {manifest['count']} chunks ({manifest['dimension']} dims) to {output}")
+    finally:
+        backend.close()
+
+    return 0
+
+
+def _workflow_document_ids(workflow_id: int) -> set:
+    import asyncio
+    from sqlalchemy import select
+    from app.db.database import SessionLocal, engine
+    from app.models.database import Document
+
+    async def load():
+        try:
+            async with SessionLocal() as db:
+                result = await db.execute(select(Document.id).where(Document.workflow_id == workflow_id))
+                return set(result.scalars().all())
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(load())
+
+
+def import_vectors(args) -> int:
+    """
+    Load a snapshot file into a collection without recomputing embeddings
+
+    Imports into a workflow's collection are refused unless every chunk
+    belongs to one of that workflow's documents.
+    """
+    import re
+    from app.services.vector_backends import create_vector_backend
+    from app.services.vector_snapshot import Snapshot, SnapshotError, check_documents, import_snapshot
+
+    try:
+        snapshot = Snapshot(args.snapshot)
+    except SnapshotError as e:
+        print(f"{args.snapshot}: {str(e)}")
+        return 1
+
+    name = args.collection or (f"workflow_{args.workflow_id}" if args.workflow_id else snapshot.manifest["collection"])
+    workflow = re.match(r"^workflow_(\d+)$", name)
+    if workflow:
+        try:
+            check_documents(snapshot, _workflow_document_ids(int(workflow.group(1))))
+        except SnapshotError as e:
+            snapshot.close()
+            print(f"{name}: {str(e)}")
+            return 1
+
+    backend = create_vector_backend()
+    if backend is None:
+        snapshot.close()
+        print("Vector store not available")
+        return 1
+
+    try:
+        if args.replace:
+            backend.delete_collection(name)
+        collection = backend.get_or_create_collection(name)
+        imported = import_snapshot(snapshot, collection, batch_size=args.batch_size)
+        print(f"{name}: imported {imported} chunks from {args.snapshot}")
+    finally:
+        snapshot.close()
+        backend.close()
+
+    return 0
+
+
+def vector_gc(args) -> int:
+    """
+    Delete orphaned vectors and collections of deleted or inactive workflows
+    """
+    import asyncio
+    from app.db.database import SessionLocal, engine
+    from app.services.vector_gc_service import VectorGarbageCollector
+    from app.services.vector_service import shutdown_vector_executors
+
+    async def collect():
+        try:
+            async with SessionLocal() as db:
+                return await VectorGarbageCollector(db).run(dry_run=args.dry_run, batch_size=args.batch_size)
+        finally:
+            # Pooled aiosqlite connections hold a worker thread that would keep the process alive
+            await engine.dispose()
+
+    try:
+        report = asyncio.run(collect())
+    finally:
+        shutdown_vector_executors(wait=True)
+
+    verb = "would reclaim" if args.dry_run else "reclaimed"
+    estimate = " (estimated)" if report["bytes_estimated"] else ""
+    print(f"Scanned {report['collections_scanned']} collections in {report['duration_seconds']}s")
+    for name in report["collections_dropped"]:
+        print(f"  drop {name}")
+    print(f"Orphaned vectors: {report['orphaned_vectors']}")
+    print(f"Total {verb}: {report['vectors_reclaimed']} vectors, {report['bytes_reclaimed']:,} bytes{estimate}")
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+    return 1 if report["errors"] else 0
+
+
+def archive_chats(args) -> int:
+    """
+    Move chat messages past the retention age into the compressed chat archive
+    """
+    import asyncio
+    from app.db.database import SessionLocal, engine
+    from app.services.chat_archive_service import ChatArchiver
+
+    async def archive():
+        try:
+            async with SessionLocal() as db:
+                return await ChatArchiver(db).run(
+                    dry_run=args.dry_run,
+                    batch_size=args.batch_size,
+                    older_than_days=args.older_than_days
+                )
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(archive())
+    if args.dry_run:
+        print(f"{report['messages_archived']} chat messages are older than {report['cutoff']}")
+    else:
+        print(
+            f"Archived {report['messages_archived']} chat messages older than {report['cutoff']} "
+            f"in {report['duration_seconds']}s: {report['segments_written']} segments, "
+            f"{report['bytes_written']:,} compressed bytes"
+        )
+        for month in report["months"]:
+            print(f"  month={month}")
+
+    return 0
+
+
+def migrate_database(args) -> int:
+    """
+    Create missing tables, columns and indexes and apply pending data migrations
+    """
+    import asyncio
+    from app.db.database import create_tables, engine
+
+    async def migrate():
+        try:
+            await create_tables()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(migrate())
+    print("Database schema is up to date")
+    return 0
+
+
+def vector_server(args) -> int:
+    """
+    Serve the vector store to API workers over a Unix socket until interrupted
+    """
+    import asyncio
+    import signal
+    from app.services.vector_backends import create_vector_backend
+    from app.services.vector_server import VectorStoreServer
+
+    backend_name = args.backend or os.getenv("VECTOR_SERVER_BACKEND", "chroma")
+    if backend_name.lower() == "remote":
+        print("The vector store process needs a local backend (chroma or embedded)")
+        return 1
+    backend = create_vector_backend(backend_name)
+    if backend is None:
+        print("Vector store not available")
+        return 1
+
+    server = VectorStoreServer(
+        backend,
+        path=args.socket or os.getenv("VECTOR_SOCKET_PATH", "./vector_store.sock"),
+        workers=int(os.getenv("VECTOR_SERVER_WORKERS", "8")),
+        batch_window=float(os.getenv("VECTOR_SERVER_BATCH_WINDOW_MS", "2")) / 1000,
+        max_batch=int(os.getenv("VECTOR_SERVER_MAX_BATCH", "64"))
+    )
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        serving = asyncio.ensure_future(server.serve_forever())
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, serving.cancel)
+        print(f"Vector store ({backend_name}) listening on {server.path}")
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await server.close()
+            print("Vector store stopped")
+
+    asyncio.run(serve())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="GenAI Stack maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    schema = commands.add_parser("migrate", help="Bring the database schema up to date (run before starting workers)")
+    schema.set_defaults(handler=migrate_database)
+
+    migrate = commands.add_parser(
+        "migrate-vectors",
+        help="Convert embedded vector collections to float32, float16 or int8 storage"
+    )
+    migrate.add_argument("--dtype", required=True, choices=["float32", "float16", "int8"])
+    migrate.add_argument("--collection", action="append", help="Collection to convert (default: all)")
+    migrate.add_argument("--path", help="Embedded vector store directory (default: VECTOR_DATA_PATH or ./vector_data)")
+    migrate.add_argument("--from-chroma", metavar="CHROMA_PATH", help="Import collections from this ChromaDB directory first")
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    migrate.set_defaults(handler=migrate_vectors)
+
+    rebalance = commands.add_parser(
+        "rebalance-shards",
+        help="Spread collections over a different number of shards (VECTOR_BACKEND selects the store)"
+    )
+    rebalance.add_argument("--collection", action="append", required=True, help="Collection to rebalance, e.g. workflow_12")
+    rebalance.add_argument("--shards", type=int, required=True, help="New shard count (1 = unsharded)")
+    rebalance.add_argument("--batch-size", type=int, default=1000)
+    rebalance.set_defaults(handler=rebalance_shards)
+
+    export = commands.add_parser("export-vectors", help="Export a workflow's vector index to a snapshot file")
+    source = export.add_mutually_exclusive_group(required=True)
+    source.add_argument("--workflow-id", type=int)
+    source.add_argument("--collection")
+    export.add_argument("--output", help="Snapshot file (default: <collection>.vectors.tar)")
+    export.add_argument("--batch-size", type=int, default=1000)
+    export.set_defaults(handler=export_vectors)
+
+    load = commands.add_parser("import-vectors", help="Import a snapshot file without re-embedding")
+    load.add_argument("snapshot")
+    target = load.add_mutually_exclusive_group()
+    target.add_argument("--workflow-id", type=int, help="Import into workflow_<id> (default: the exported collection)")
+    target.add_argument("--collection")
+    load.add_argument("--replace", action="store_true", help="Delete the existing collection first")
+    load.add_argument("--batch-size", type=int, default=1000)
+    load.set_defaults(handler=import_vectors)
+
+    gc = commands.add_parser("vector-gc", help="Remove vectors of deleted documents and inactive workflows")
+    gc.add_argument("--dry-run", action="store_true", help="Report what would be reclaimed without deleting")
+    gc.add_argument("--batch-size", type=int, default=500)
+    gc.set_defaults(handler=vector_gc)
+
+    archive = commands.add_parser("archive-chats", help="Move old chat messages into compressed monthly archive files")
+    archive.add_argument("--older-than-days", type=float, help="Retention age (default: CHAT_RETENTION_DAYS or 90)")
+    archive.add_argument("--dry-run", action="store_true", help="Count the messages that would be archived")
+    archive.add_argument("--batch-size", type=int, default=1000)
+    archive.set_defaults(handler=archive_chats)
+
+    serve = commands.add_parser(
+        "vector-server",
+        help="Own the vector store in one process and serve it to API workers (VECTOR_BACKEND=remote)"
+    )
+    serve.add_argument("--socket", help="Unix socket path (default: VECTOR_SOCKET_PATH or ./vector_store.sock)")
+    serve.add_argument("--backend", choices=["chroma", "embedded"], help="Store to serve (default: VECTOR_SERVER_BACKEND or chroma)")
+    serve.set_defaults(handler=vector_server)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
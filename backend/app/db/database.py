@@ -1,25 +1,109 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.db.migrations import run_data_migrations, upgrade_schema
+from app.db.pool_metrics import TimedAsyncQueuePool, pool_metrics
 from app.models.database import Base
+from typing import Any, Dict
+import orjson
 import os
 
 # Use SQLite for development if PostgreSQL is not available
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./genaistack.db")
 
+def async_database_url(url: str) -> str:
+    """
+    Map a plain database URL onto its asyncio driver (aiosqlite / asyncpg)
+    """
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+def _json_serializer(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Pool and driver settings for `url`, taken from the DB_* and SQLITE_* variables
+    """
+    # JSON columns (workflow graphs, message metadata) are encoded with orjson
+    json_options = {"json_serializer": _json_serializer, "json_deserializer": orjson.loads}
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # An in-memory database only exists on its one connection
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}, **json_options}
+
+    options: Dict[str, Any] = {
+        **json_options,
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_flag("DB_POOL_PRE_PING", "true")
+    }
+
+    statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if parsed.get_backend_name() == "postgresql" and statement_timeout_ms > 0:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout_ms)}}
+
+    return options
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """
+    Apply the SQLite performance profile to every new connection
+
+    WAL lets readers run alongside the single writer, and synchronous=NORMAL
+    is durable in WAL mode except for the last transactions on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}")
+    cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+    cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+    cursor.close()
+
 # Create engine with appropriate settings
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+_engine_url = async_database_url(DATABASE_URL)
+engine = create_async_engine(_engine_url, **engine_options(_engine_url))
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _configure_sqlite)
+
+# expire_on_commit=False keeps loaded attributes readable after a commit;
+# with AsyncSession an expired attribute cannot be lazily reloaded
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def pool_stats() -> Dict[str, Any]:
+    """
+    Current pool occupancy plus checkout wait times since startup
+    """
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, TimedAsyncQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+            **pool_metrics.stats()
+        })
+    return stats
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(upgrade_schema)
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(run_data_migrations)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
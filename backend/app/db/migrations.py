@@ -0,0 +1,100 @@
+import json
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+from app.models.database import Base, SchemaMigration, Workflow
+
+_BATCH_SIZE = 500
+
+
+def upgrade_schema(connection: Connection):
+    """
+    Bring tables created by an older release up to the current models
+
+    `create_all` only creates missing tables, so columns and indexes added to
+    an existing table are created here. New columns must be nullable or have a
+    server default. Safe to run on every startup.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                print(f"Adding column {column.name} to {table.name}")
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                print(f"Creating index {index.name} on {table.name}")
+                index.create(connection)
+
+
+def _decode_workflow_graphs(connection: Connection):
+    """
+    Unwrap graphs that older releases stored as a JSON string inside the JSON column
+    """
+    table = Workflow.__table__
+    last_id = 0
+    decoded = 0
+    while True:
+        rows = connection.execute(
+            select(table.c.id, table.c.nodes, table.c.edges)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        for row in rows:
+            values = {}
+            for name in ("nodes", "edges"):
+                value = getattr(row, name)
+                if isinstance(value, str):
+                    try:
+                        values[name] = json.loads(value)
+                    except ValueError:
+                        print(f"Workflow {row.id} has unreadable {name}; leaving it as is")
+            if values:
+                # Assigning updated_at to itself keeps onupdate from firing, so ETags stay valid
+                connection.execute(
+                    table.update()
+                    .where(table.c.id == row.id)
+                    .values(updated_at=table.c.updated_at, **values)
+                )
+                decoded += 1
+        last_id = rows[-1].id
+
+    if connection.dialect.name == "postgresql":
+        for name in ("nodes", "edges"):
+            connection.execute(text(f"ALTER TABLE workflows ALTER COLUMN {name} TYPE JSONB USING {name}::jsonb"))
+
+    if decoded:
+        print(f"Decoded the graphs of {decoded} workflows")
+
+
+# Data migrations run once each, in order, and are recorded in schema_migrations
+DATA_MIGRATIONS = [
+    ("0001_decode_workflow_graphs", _decode_workflow_graphs),
+]
+
+
+def run_data_migrations(connection: Connection):
+    """
+    Apply data migrations that have not run against this database yet
+    """
+    table = SchemaMigration.__table__
+    applied = set(connection.execute(select(table.c.name)).scalars())
+    for name, migrate in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        print(f"Running data migration {name}")
+        migrate(connection)
+        connection.execute(table.insert().values(name=name))
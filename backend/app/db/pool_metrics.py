@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Number of recent checkout waits kept for the percentiles
+_RECENT_WAITS = 2048
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for how long requests wait to check out a connection
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=_RECENT_WAITS)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self._recent.append(wait_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts = self.checkouts
+            timeouts = self.timeouts
+            total = self.wait_seconds_total
+            maximum = self.wait_seconds_max
+
+        def percentile(pct: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(len(recent) * pct))] * 1000, 3)
+
+        attempts = checkouts + timeouts
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_mean": round(total / attempts * 1000, 3) if attempts else 0.0,
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_p99": percentile(0.99),
+            "wait_ms_max": round(maximum * 1000, 3)
+        }
+
+
+# Shared by every pool of the process; the engine re-creates its pool on dispose
+pool_metrics = PoolMetrics()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records checkout wait times in `pool_metrics`
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
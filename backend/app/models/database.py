@@ -1,27 +1,39 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, JSON, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+# Native JSONB on PostgreSQL so graphs can be indexed and queried into
+GraphJSON = JSON().with_variant(JSONB(), "postgresql")
+
 class Workflow(Base):
     __tablename__ = "workflows"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    nodes = Column(JSON)  # Store React Flow nodes
-    edges = Column(JSON)  # Store React Flow edges
+    nodes = Column(GraphJSON)  # Store React Flow nodes
+    edges = Column(GraphJSON)  # Store React Flow edges
     is_valid = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relationships
     documents = relationship("Document", back_populates="workflow")
     chat_sessions = relationship("ChatSession", back_populates="workflow")
 
+    __table_args__ = (
+        # Keyset pagination of the workflow list walks this index newest first
+        Index("ix_workflows_active_updated", "is_active", "updated_at", "id"),
+    )
+    # Every UPDATE checks and bumps the version, so concurrent writers cannot overwrite each other
+    __mapper_args__ = {"version_id_col": version}
+
 class Document(Base):
     __tablename__ = "documents"
     
@@ -47,6 +59,9 @@ class ChatSession(Base):
     session_id = Column(String(255), unique=True, index=True)
     workflow_id = Column(Integer, ForeignKey("workflows.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Rolling summary of every message up to and including summarized_message_id
+    summary = Column(Text)
+    summarized_message_id = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     workflow = relationship("Workflow", back_populates="chat_sessions")
@@ -63,4 +78,38 @@ class ChatMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    session = relationship("ChatSession", back_populates="messages")
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="messages")
+
+    __table_args__ = (
+        # Recent-history window: one range scan per session, newest first
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),
+        # Retention: find messages past the archive cutoff without a table scan
+        Index("ix_chat_messages_created_at", "created_at"),
+    )
+
+class ChatArchiveSegment(Base):
+    """
+    One session's messages in an archive file: a gzip member at byte_offset
+    """
+    __tablename__ = "chat_archive_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # YYYY-MM of the messages' created_at
+    path = Column(String(500), nullable=False)  # Relative to CHAT_ARCHIVE_PATH
+    byte_offset = Column(BigInteger, nullable=False)
+    byte_length = Column(Integer, nullable=False)
+    first_message_id = Column(Integer, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_chat_archive_segments_session_id_last", "session_id", "last_message_id"),
+    )
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    name = Column(String(255), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
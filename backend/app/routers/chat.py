@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.models.database import ChatSession, ChatMessage
-from app.schemas.schemas import APIResponse, ChatSessionResponse
+from app.schemas.schemas import APIResponse, ChatMessagePage, ChatMessageResponse, ChatSessionResponse
+from app.services.chat_archive_service import ChatArchiver
+from app.services.chat_message_buffer import ChatMessageBuffer, get_chat_message_buffer
+from typing import Optional
+import base64
+import json
 import uuid
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/sessions", response_model=APIResponse)
-async def create_chat_session(workflow_id: int, db: Session = Depends(get_db)):
+async def create_chat_session(workflow_id: int, db: AsyncSession = Depends(get_db)):
     try:
         session_id = str(uuid.uuid4())
         
@@ -18,8 +25,8 @@ async def create_chat_session(workflow_id: int, db: Session = Depends(get_db)):
         )
         
         db.add(chat_session)
-        db.commit()
-        db.refresh(chat_session)
+        await db.commit()
+        await db.refresh(chat_session)
         
         return APIResponse(
             success=True,
@@ -30,34 +37,143 @@ async def create_chat_session(workflow_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _session_key(session_id: str, db: AsyncSession, buffer: Optional[ChatMessageBuffer]) -> int:
+    """
+    Primary key of a chat session, from the buffer's cache when possible
+    """
+    session_key = buffer.cached_session_id(session_id) if buffer is not None else None
+    if session_key is None:
+        result = await db.execute(select(ChatSession.id).where(ChatSession.session_id == session_id))
+        session_key = result.scalar_one_or_none()
+        if session_key is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+        if buffer is not None:
+            buffer.remember_session(session_id, session_key)
+    return session_key
+
+def _encode_cursor(message_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([message_id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        (message_id,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(message_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
-async def get_chat_session(session_id: str, db: Session = Depends(get_db)):
-    session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
+async def get_chat_session(
+    session_id: str,
+    include_messages: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    A chat session with its full transcript
+
+    Long sessions should pass `include_messages=false` and page through
+    GET /sessions/{session_id}/messages instead.
+    """
+    result = await db.execute(select(ChatSession).where(ChatSession.session_id == session_id))
+    session = result.scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=404, detail="Chat session not found")
-    
+
+    if not include_messages:
+        return ChatSessionResponse(
+            id=session.id,
+            session_id=session.session_id,
+            workflow_id=session.workflow_id,
+            created_at=session.created_at
+        )
+
+    # Messages still in the write-behind buffer are stored first, so a client
+    # always sees what it just posted
+    buffer = get_chat_message_buffer()
+    if buffer is not None:
+        await buffer.sync(session.id)
+
+    # Messages are loaded explicitly; lazy loading is not available on AsyncSession
+    await db.refresh(session, ["messages"])
     return session
 
+@router.get("/sessions/{session_id}/messages", response_model=ChatMessagePage)
+async def list_session_messages(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One page of a session's messages, oldest first (or newest first with `order=desc`)
+
+    Pass the returned `next_cursor` back as `cursor` for the following page.
+    """
+    buffer = get_chat_message_buffer()
+    session_key = await _session_key(session_id, db, buffer)
+    if buffer is not None:
+        await buffer.sync(session_key)
+
+    # A range scan on ix_chat_messages_session_id_id, however deep the page
+    query = select(ChatMessage).where(ChatMessage.session_id == session_key).limit(limit + 1)
+    if order == "desc":
+        query = query.order_by(ChatMessage.id.desc())
+        if cursor:
+            query = query.where(ChatMessage.id < _decode_cursor(cursor))
+    else:
+        query = query.order_by(ChatMessage.id)
+        if cursor:
+            query = query.where(ChatMessage.id > _decode_cursor(cursor))
+
+    result = await db.execute(query)
+    messages = result.scalars().all()
+    items = [ChatMessageResponse.model_validate(message) for message in messages[:limit]]
+    next_cursor = _encode_cursor(items[-1].id) if len(messages) > limit else None
+
+    return ChatMessagePage(items=items, next_cursor=next_cursor)
+
+@router.get("/sessions/{session_id}/archive", response_model=ChatMessagePage)
+async def list_archived_session_messages(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One page of a session's messages that were moved to the chat archive, oldest first
+    """
+    session_key = await _session_key(session_id, db, get_chat_message_buffer())
+    after_id = _decode_cursor(cursor) if cursor else 0
+    records, has_more = await ChatArchiver(db).read_session(session_key, after_id=after_id, limit=limit)
+
+    items = [ChatMessageResponse.model_validate(record) for record in records]
+    next_cursor = _encode_cursor(items[-1].id) if has_more else None
+
+    return ChatMessagePage(items=items, next_cursor=next_cursor)
+
 @router.post("/sessions/{session_id}/messages", response_model=APIResponse)
 async def add_message_to_session(
     session_id: str,
     message_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
-        if not session:
-            raise HTTPException(status_code=404, detail="Chat session not found")
+        buffer = get_chat_message_buffer()
+        session_key = await _session_key(session_id, db, buffer)
         
         message = ChatMessage(
-            session_id=session.id,
+            session_id=session_key,
             message_type=message_data.get("type", "user"),
             content=message_data.get("content", ""),
             message_metadata=message_data.get("metadata", {})
         )
         
-        db.add(message)
-        db.commit()
+        # Queued for the next bulk insert; stored inline when write-behind is off
+        if buffer is not None:
+            await buffer.add(message)
+        else:
+            db.add(message)
+            await db.commit()
         
         return APIResponse(
             success=True,
@@ -1,20 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import os
 import shutil
 from app.db.database import get_db
 from app.models.database import Document
 from app.schemas.schemas import DocumentResponse, APIResponse
-from app.services.document_service import DocumentService
+from app.services.document_service import DocumentService, document_collection_name
+from app.services.vector_service import VectorService
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/upload", response_model=APIResponse)
 async def upload_document(
     file: UploadFile = File(...),
     workflow_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Validate file type
@@ -51,8 +54,8 @@ async def upload_document(
         )
         
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
         
         # Process document asynchronously (but handle errors gracefully)
         document_service = DocumentService(db)
@@ -72,26 +75,27 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(document_id: int, db: Session = Depends(get_db)):
-    document = db.query(Document).filter(Document.id == document_id).first()
+async def get_document(document_id: int, db: AsyncSession = Depends(get_db)):
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
     return document
 
 @router.get("/", response_model=List[DocumentResponse])
-async def list_documents(workflow_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(Document)
+async def list_documents(workflow_id: int = None, db: AsyncSession = Depends(get_db)):
+    query = select(Document)
     if workflow_id:
-        query = query.filter(Document.workflow_id == workflow_id)
+        query = query.where(Document.workflow_id == workflow_id)
     
-    documents = query.all()
+    result = await db.execute(query)
+    documents = result.scalars().all()
     return documents
 
 @router.delete("/{document_id}", response_model=APIResponse)
-async def delete_document(document_id: int, db: Session = Depends(get_db)):
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = await db.get(Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
@@ -99,9 +103,16 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
         if os.path.exists(document.file_path):
             os.remove(document.file_path)
         
+        # Delete its chunks so they stop being searched; anything missed
+        # here is picked up by the vector garbage collector
+        await VectorService().delete_document_embeddings(
+            document.id,
+            document_collection_name(document.workflow_id)
+        )
+        
         # Delete from database
-        db.delete(document)
-        db.commit()
+        await db.delete(document)
+        await db.commit()
         
         return APIResponse(
             success=True,
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 from app.schemas.schemas import APIResponse
+from app.db.database import pool_stats
+from app.services.vector_service import get_embedding_cache
+from app.services.admission_control import get_admission_controller
 
 router = APIRouter()
 
@@ -9,4 +12,50 @@ async def health_check():
         success=True,
         message="GenAI Stack API is healthy",
         data={"status": "ok", "version": "1.0.0"}
-    )
\ No newline at end of file
+    )
+
+@router.get("/health/embedding-cache", response_model=APIResponse)
+async def embedding_cache_stats():
+    """
+    Hit rate and memory use of the query embedding cache
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return APIResponse(
+            success=True,
+            message="Query embedding cache is disabled",
+            data={"enabled": False}
+        )
+
+    return APIResponse(
+        success=True,
+        data={"enabled": True, **cache.stats()}
+    )
+
+@router.get("/health/database", response_model=APIResponse)
+async def database_pool_stats():
+    """
+    Connection pool occupancy and checkout wait times
+    """
+    return APIResponse(
+        success=True,
+        data=pool_stats()
+    )
+
+@router.get("/health/admission", response_model=APIResponse)
+async def admission_stats():
+    """
+    Running and queued workflow executions and rejected requests
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return APIResponse(
+            success=True,
+            message="Admission control is disabled",
+            data={"enabled": False}
+        )
+
+    return APIResponse(
+        success=True,
+        data={"enabled": True, **controller.stats()}
+    )
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
+from app.schemas.schemas import APIResponse
+from app.services.chat_archive_service import ChatArchiver
+from app.services.vector_gc_service import VectorGarbageCollector
+
+router = APIRouter()
+
+@router.post("/vector-gc", response_model=APIResponse)
+async def collect_vector_garbage(dry_run: bool = False, batch_size: int = 500, db: AsyncSession = Depends(get_db)):
+    """
+    Delete vectors of removed documents and collections of deleted or inactive workflows
+    """
+    try:
+        report = await VectorGarbageCollector(db).run(dry_run=dry_run, batch_size=batch_size)
+        return APIResponse(
+            success=not report["errors"],
+            message=f"Reclaimed {report['vectors_reclaimed']} vectors" if not dry_run
+            else f"{report['vectors_reclaimed']} vectors can be reclaimed",
+            data=report
+        )
+    except Exception as e:
+        return APIResponse(
+            success=False,
+            error=str(e)
+        )
+
+
+@router.post("/chat-archive", response_model=APIResponse)
+async def archive_chat_messages(
+    dry_run: bool = False,
+    batch_size: int = 1000,
+    older_than_days: Optional[float] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Move chat messages older than CHAT_RETENTION_DAYS (or `older_than_days`) to the archive
+    """
+    try:
+        report = await ChatArchiver(db).run(dry_run=dry_run, batch_size=batch_size, older_than_days=older_than_days)
+        return APIResponse(
+            success=True,
+            message=f"Archived {report['messages_archived']} chat messages" if not dry_run
+            else f"{report['messages_archived']} chat messages can be archived",
+            data=report
+        )
+    except Exception as e:
+        return APIResponse(
+            success=False,
+            error=str(e)
+        )
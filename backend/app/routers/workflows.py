@@ -1,37 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.background import BackgroundTask
+from datetime import datetime
+from typing import List, Optional
 from app.db.database import get_db
-from app.models.database import Workflow
+from app.models.database import Document, Workflow
 from app.schemas.schemas import (
     WorkflowCreate, 
     WorkflowUpdate, 
     WorkflowResponse, 
+    WorkflowSummary,
+    WorkflowSummaryPage,
+    GraphPatchRequest,
     APIResponse,
     WorkflowExecutionRequest,
-    WorkflowExecutionResponse
+    WorkflowExecutionResponse,
+    RetrievalRequest
 )
+from app.services.deadline import request_deadline
+from app.services.workflow_graph import GraphPatch, GraphPatchError
 from app.services.workflow_service import WorkflowService
+from app.services.vector_service import VectorService
+from app.services.vector_snapshot import SnapshotError
+import asyncio
+import base64
 import json
+import os
+import shutil
+import tempfile
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/", response_model=APIResponse)
 async def create_workflow(
     workflow: WorkflowCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         db_workflow = Workflow(
             name=workflow.name,
             description=workflow.description,
-            nodes=json.dumps([node.dict() for node in workflow.nodes]),
-            edges=json.dumps([edge.dict() for edge in workflow.edges]),
+            nodes=[node.dict() for node in workflow.nodes],
+            edges=[edge.dict() for edge in workflow.edges],
             is_valid=False
         )
         db.add(db_workflow)
-        db.commit()
-        db.refresh(db_workflow)
+        await db.commit()
+        await db.refresh(db_workflow)
         
         return APIResponse(
             success=True,
@@ -41,48 +60,107 @@ async def create_workflow(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def workflow_etag(workflow_id: int, updated_at: datetime) -> str:
+    """
+    Entity tag of a workflow; it changes whenever the row's updated_at does
+    """
+    return f'"{workflow_id}-{updated_at.strftime("%Y%m%d%H%M%S%f")}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match compares weakly, so a W/ prefix from a proxy still matches
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+def _encode_cursor(updated_at: datetime, workflow_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([updated_at.isoformat(), workflow_id]).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        updated_at, workflow_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(updated_at), int(workflow_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
-async def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+async def get_workflow(
+    workflow_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    # Check the version first so an unchanged workflow never loads its graph
+    result = await db.execute(select(Workflow.updated_at).where(Workflow.id == workflow_id))
+    updated_at = result.scalar_one_or_none()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+
+    etag = workflow_etag(workflow_id, updated_at)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    workflow = await db.get(Workflow, workflow_id)
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
-    
+
+    response.headers["ETag"] = workflow_etag(workflow.id, workflow.updated_at)
     return WorkflowResponse(
         id=workflow.id,
         name=workflow.name,
         description=workflow.description,
-        nodes=json.loads(workflow.nodes) if workflow.nodes else [],
-        edges=json.loads(workflow.edges) if workflow.edges else [],
+        nodes=workflow.nodes or [],
+        edges=workflow.edges or [],
         is_valid=workflow.is_valid,
         is_active=workflow.is_active,
+        version=workflow.version,
         created_at=workflow.created_at,
         updated_at=workflow.updated_at
     )
 
-@router.get("/", response_model=List[WorkflowResponse])
-async def list_workflows(db: Session = Depends(get_db)):
-    workflows = db.query(Workflow).filter(Workflow.is_active == True).all()
-    return [
-        WorkflowResponse(
-            id=w.id,
-            name=w.name,
-            description=w.description,
-            nodes=json.loads(w.nodes) if w.nodes else [],
-            edges=json.loads(w.edges) if w.edges else [],
-            is_valid=w.is_valid,
-            is_active=w.is_active,
-            created_at=w.created_at,
-            updated_at=w.updated_at
-        ) for w in workflows
-    ]
+@router.get("/", response_model=WorkflowSummaryPage)
+async def list_workflows(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Active workflows, most recently updated first, without their graphs
+
+    Pass the returned `next_cursor` back as `cursor` for the following page.
+    """
+    query = (
+        select(
+            Workflow.id,
+            Workflow.name,
+            Workflow.description,
+            Workflow.is_valid,
+            Workflow.is_active,
+            Workflow.created_at,
+            Workflow.updated_at
+        )
+        .where(Workflow.is_active == True)
+        .order_by(Workflow.updated_at.desc(), Workflow.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        updated_at, workflow_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Workflow.updated_at, Workflow.id) < tuple_(updated_at, workflow_id))
+
+    result = await db.execute(query)
+    rows = result.all()
+    items = [WorkflowSummary.model_validate(row) for row in rows[:limit]]
+    next_cursor = _encode_cursor(items[-1].updated_at, items[-1].id) if len(rows) > limit else None
+
+    return WorkflowSummaryPage(items=items, next_cursor=next_cursor)
 
 @router.put("/{workflow_id}", response_model=APIResponse)
 async def update_workflow(
     workflow_id: int,
     workflow_update: WorkflowUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    workflow = await db.get(Workflow, workflow_id)
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
@@ -91,30 +169,95 @@ async def update_workflow(
     if workflow_update.description is not None:
         workflow.description = workflow_update.description
     if workflow_update.nodes is not None:
-        workflow.nodes = json.dumps([node.dict() for node in workflow_update.nodes])
+        workflow.nodes = [node.dict() for node in workflow_update.nodes]
     if workflow_update.edges is not None:
-        workflow.edges = json.dumps([edge.dict() for edge in workflow_update.edges])
+        workflow.edges = [edge.dict() for edge in workflow_update.edges]
     if workflow_update.is_valid is not None:
         workflow.is_valid = workflow_update.is_valid
     
-    db.commit()
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Workflow was changed by another request")
     
     return APIResponse(
         success=True,
-        message="Workflow updated successfully"
+        message="Workflow updated successfully",
+        data={"version": workflow.version}
+    )
+
+@router.patch("/{workflow_id}/graph", response_model=APIResponse)
+async def patch_workflow_graph(
+    workflow_id: int,
+    patch_request: GraphPatchRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply node/edge operations to a workflow graph at a known version
+
+    Returns 409 when the workflow has changed since `version` was read.
+    """
+    workflow = await db.get(Workflow, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    if workflow.version != patch_request.version:
+        raise HTTPException(status_code=409, detail=f"Workflow is at version {workflow.version}, not {patch_request.version}")
+
+    graph = GraphPatch(workflow.nodes or [], workflow.edges or [])
+    try:
+        graph.apply(patch_request.operations)
+    except GraphPatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Only rewrite the columns the patch touched. The lists were edited in
+    # place, which the JSON type cannot detect, so they are flagged explicitly.
+    if graph.touched["nodes"] or graph.removed["nodes"]:
+        workflow.nodes = graph.nodes
+        flag_modified(workflow, "nodes")
+    if graph.touched["edges"] or graph.removed["edges"]:
+        workflow.edges = graph.edges
+        flag_modified(workflow, "edges")
+    # A patch can invalidate a workflow; marking it valid stays with /validate.
+    # Only what the patch changed is re-checked, so autosaved drags stay cheap.
+    if graph.structure_changed and workflow.is_valid:
+        workflow.is_valid = graph.still_valid()
+
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Workflow was changed by another request")
+
+    response.headers["ETag"] = workflow_etag(workflow.id, workflow.updated_at)
+    return APIResponse(
+        success=True,
+        message="Workflow graph updated",
+        data={"version": workflow.version, "is_valid": workflow.is_valid}
     )
 
 @router.post("/{workflow_id}/chat", response_model=APIResponse)
 async def chat_with_workflow(
     workflow_id: int,
     request: dict,
-    db: Session = Depends(get_db)
+    http_request: Request,
+    x_request_timeout_ms: Optional[float] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Process a chat message through the specified workflow
+
+    The X-Request-Timeout-Ms header sets the time budget for the whole
+    execution (default WORKFLOW_TIMEOUT_MS), counted from when the request
+    arrived, including any wait for admission.
     """
+    deadline = request_deadline(
+        x_request_timeout_ms,
+        started_at=getattr(http_request.state, "received_at", None)
+    )
     try:
-        workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+        workflow = await db.get(Workflow, workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
@@ -127,7 +270,9 @@ async def chat_with_workflow(
         # Execute the workflow with user message
         result = await workflow_service.execute_workflow(
             workflow_id=workflow_id,
-            user_message=request.get("message", "")
+            user_message=request.get("message", ""),
+            session_id=request.get("session_id"),
+            deadline=deadline
         )
         
         return APIResponse(
@@ -142,25 +287,125 @@ async def chat_with_workflow(
             error=str(e)
         )
 
+@router.post("/{workflow_id}/search", response_model=APIResponse)
+async def search_workflow_knowledge_base(
+    workflow_id: int,
+    request: RetrievalRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve knowledge base chunks for a batch of queries, e.g. for evaluation runs
+    """
+    try:
+        workflow_service = WorkflowService(db)
+        results = await workflow_service.search_workflow(
+            workflow_id=workflow_id,
+            queries=request.queries,
+            node_id=request.node_id
+        )
+
+        return APIResponse(
+            success=True,
+            message=f"Searched {len(request.queries)} queries",
+            data={"results": [[hit.dict() for hit in hits] for hits in results]}
+        )
+
+    except Exception as e:
+        return APIResponse(
+            success=False,
+            error=str(e)
+        )
+
+@router.get("/{workflow_id}/vectors/snapshot")
+async def export_workflow_vectors(workflow_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Download the workflow's chunks, embeddings and metadata as a snapshot file
+    """
+    workflow = await db.get(Workflow, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+
+    handle, path = tempfile.mkstemp(suffix=".vectors.tar")
+    os.close(handle)
+    try:
+        manifest = await VectorService().export_collection(f"workflow_{workflow_id}", path)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if manifest is None:
+        os.remove(path)
+        raise HTTPException(status_code=404, detail="Workflow has no vector index")
+
+    return FileResponse(
+        path,
+        media_type="application/x-tar",
+        filename=f"workflow_{workflow_id}.vectors.tar",
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.post("/{workflow_id}/vectors/snapshot", response_model=APIResponse)
+async def import_workflow_vectors(
+    workflow_id: int,
+    file: UploadFile = File(...),
+    replace: bool = Form(False),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Load a snapshot into the workflow's vector index without re-embedding
+
+    Every chunk must belong to a document of this workflow; snapshots from
+    another workflow are rejected.
+    """
+    workflow = await db.get(Workflow, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+
+    result = await db.execute(select(Document.id).where(Document.workflow_id == workflow_id))
+    document_ids = set(result.scalars().all())
+
+    handle, path = tempfile.mkstemp(suffix=".vectors.tar")
+    try:
+        with os.fdopen(handle, "wb") as buffer:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, buffer)
+
+        imported = await VectorService().import_collection(
+            f"workflow_{workflow_id}", path, replace=replace, document_ids=document_ids
+        )
+        return APIResponse(
+            success=True,
+            message=f"Imported {imported} chunks",
+            data={"imported": imported}
+        )
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return APIResponse(
+            success=False,
+            error=str(e)
+        )
+    finally:
+        os.remove(path)
+
 @router.post("/{workflow_id}/validate", response_model=APIResponse)
-async def validate_workflow(workflow_id: int, db: Session = Depends(get_db)):
+async def validate_workflow(workflow_id: int, db: AsyncSession = Depends(get_db)):
     """
     Validate a workflow and mark it as valid/invalid
     """
     try:
-        workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+        workflow = await db.get(Workflow, workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
         # Parse nodes and edges
-        nodes = json.loads(workflow.nodes) if workflow.nodes else []
-        edges = json.loads(workflow.edges) if workflow.edges else []
+        nodes = workflow.nodes or []
+        edges = workflow.edges or []
         
         # Basic validation logic
         is_valid = validate_workflow_structure(nodes, edges)
         
         workflow.is_valid = is_valid
-        db.commit()
+        await db.commit()
         
         return APIResponse(
             success=True,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from datetime import datetime
 
 # Workflow schemas
@@ -29,6 +29,15 @@ class WorkflowUpdate(BaseModel):
     edges: Optional[List[WorkflowEdgeBase]] = None
     is_valid: Optional[bool] = None
 
+class GraphOperation(BaseModel):
+    op: Literal["add", "remove", "replace"]
+    path: str  # /nodes/<id> or /edges/<id>, optionally followed by a pointer into it
+    value: Any = None
+
+class GraphPatchRequest(BaseModel):
+    version: int
+    operations: List[GraphOperation]
+
 class WorkflowResponse(BaseModel):
     id: int
     name: str
@@ -37,12 +46,29 @@ class WorkflowResponse(BaseModel):
     edges: List[Dict[str, Any]]
     is_valid: bool
     is_active: bool
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class WorkflowSummary(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    is_valid: bool
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class WorkflowSummaryPage(BaseModel):
+    items: List[WorkflowSummary]
+    next_cursor: Optional[str] = None
+
 # Document schemas
 class DocumentCreate(BaseModel):
     filename: str
@@ -63,6 +89,18 @@ class DocumentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Retrieval schemas
+class RetrievedChunk(BaseModel):
+    text: str
+    score: float  # cosine similarity to the query
+    document_id: Optional[int] = None
+    chunk_index: Optional[int] = None
+    filename: Optional[str] = None
+
+class RetrievalRequest(BaseModel):
+    queries: List[str]
+    node_id: Optional[str] = None  # knowledge base node whose settings to use
+
 # Chat schemas
 class ChatMessageCreate(BaseModel):
     message: str
@@ -78,6 +116,10 @@ class ChatMessageResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ChatMessagePage(BaseModel):
+    items: List[ChatMessageResponse]
+    next_cursor: Optional[str] = None
+
 class ChatSessionResponse(BaseModel):
     id: int
     session_id: str
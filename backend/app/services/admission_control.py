@@ -0,0 +1,284 @@
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import orjson
+
+# Number of recent queue waits kept for the percentiles
+_RECENT_WAITS = 2048
+
+# Endpoints that run a workflow, keyed by workflow id
+_EXECUTION_PATHS = re.compile(r"^/api/workflows/(?P<workflow_id>\d+)/(chat|search)/?$")
+
+_controller_lock = threading.Lock()
+_controller: Optional["AdmissionController"] = None
+_controller_initialized = False
+
+
+class AdmissionRejected(Exception):
+    """
+    A request was turned away instead of being queued or run
+    """
+
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits how many workflow executions run at once, overall and per workflow.
+
+    Requests beyond a limit wait in one FIFO queue for up to `queue_timeout`
+    seconds. A freed slot goes to the oldest waiter whose workflow is under
+    its own limit, so one busy workflow cannot hold up the others. When the
+    queue is full, or a workflow already has `max_queue_per_workflow`
+    requests waiting, new requests are rejected at once with a Retry-After
+    estimated from recent execution times.
+
+    Used from the event loop only; no locking is needed.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_workflow: int = 0,
+        max_queue: int = 64,
+        max_queue_per_workflow: int = 0,
+        queue_timeout: float = 5.0
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_workflow = max_per_workflow
+        self.max_queue = max_queue
+        self.max_queue_per_workflow = max_queue_per_workflow
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._active_by_key: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self._queued_by_key: Dict[str, int] = {}
+
+        self._recent_waits: Deque[float] = deque(maxlen=_RECENT_WAITS)
+        # Moving average of how long an admitted request holds its slot
+        self._service_seconds: Optional[float] = None
+        self.admitted = 0
+        self.queued_total = 0
+        self.queue_depth_max = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "workflow_queue_full": 0, "timeout": 0}
+
+    def _has_capacity(self, key: str) -> bool:
+        if self._active >= self.max_concurrent:
+            return False
+        return not self.max_per_workflow or self._active_by_key.get(key, 0) < self.max_per_workflow
+
+    def _start(self, key: str):
+        self._active += 1
+        self._active_by_key[key] = self._active_by_key.get(key, 0) + 1
+        self.admitted += 1
+
+    def _retry_after(self) -> int:
+        # Time for the work already queued to drain through the available slots
+        backlog = (len(self._waiters) + 1) / self.max_concurrent
+        return max(1, math.ceil((self._service_seconds or 1.0) * backlog))
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(status_code, reason, detail, self._retry_after())
+
+    async def acquire(self, key: str):
+        """
+        Wait for an execution slot for `key`, or raise AdmissionRejected
+        """
+        # Waiters left in the queue are all blocked, so a request that fits runs at once
+        if self._has_capacity(key):
+            self._start(key)
+            self._recent_waits.append(0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(503, "queue_full", "Server is at capacity, try again later")
+        if self.max_queue_per_workflow and self._queued_by_key.get(key, 0) >= self.max_queue_per_workflow:
+            raise self._reject(429, "workflow_queue_full", "Too many concurrent requests for this workflow")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (key, future)
+        self._waiters.append(waiter)
+        self._queued_by_key[key] = self._queued_by_key.get(key, 0) + 1
+        self.queued_total += 1
+        self.queue_depth_max = max(self.queue_depth_max, len(self._waiters))
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the wait ran out; use it
+                return
+            future.cancel()
+            self._remove_waiter(waiter)
+            raise self._reject(503, "timeout", "Timed out waiting for an execution slot") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(key)
+            else:
+                future.cancel()
+                self._remove_waiter(waiter)
+            raise
+        finally:
+            self._recent_waits.append(time.perf_counter() - start)
+
+    def _remove_waiter(self, waiter: Tuple[str, asyncio.Future]):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        self._dequeued(waiter[0])
+
+    def _dequeued(self, key: str):
+        self._queued_by_key[key] -= 1
+        if not self._queued_by_key[key]:
+            del self._queued_by_key[key]
+
+    def release(self, key: str, held_seconds: Optional[float] = None):
+        """
+        Free a slot taken by `acquire` and hand it to the next eligible waiter
+        """
+        self._active -= 1
+        self._active_by_key[key] -= 1
+        if not self._active_by_key[key]:
+            del self._active_by_key[key]
+        if held_seconds is not None:
+            if self._service_seconds is None:
+                self._service_seconds = held_seconds
+            else:
+                self._service_seconds = 0.9 * self._service_seconds + 0.1 * held_seconds
+
+        if not self._waiters or self._active >= self.max_concurrent:
+            return
+        for waiter in list(self._waiters):
+            waiter_key, future = waiter
+            if future.done():
+                continue
+            if not self._has_capacity(waiter_key):
+                continue
+            self._waiters.remove(waiter)
+            self._dequeued(waiter_key)
+            self._start(waiter_key)
+            future.set_result(None)
+            if self._active >= self.max_concurrent:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        recent = sorted(self._recent_waits)
+
+        def percentile(pct: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(len(recent) * pct))] * 1000, 3)
+
+        busiest = sorted(self._active_by_key.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_per_workflow": self.max_per_workflow,
+            "max_queue": self.max_queue,
+            "max_queue_per_workflow": self.max_queue_per_workflow,
+            "queue_timeout_ms": round(self.queue_timeout * 1000),
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "queue_depth_max": self.queue_depth_max,
+            "admitted": self.admitted,
+            "queued": self.queued_total,
+            "rejected": dict(self.rejected),
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_p99": percentile(0.99),
+            "service_ms_avg": round((self._service_seconds or 0.0) * 1000, 1),
+            "busiest_workflows": [
+                {"workflow": key, "active": active, "queued": self._queued_by_key.get(key, 0)}
+                for key, active in busiest
+            ],
+        }
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Return the shared admission controller, or None if admission control is off
+    """
+    global _controller, _controller_initialized
+    with _controller_lock:
+        if not _controller_initialized:
+            max_concurrent = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+            if max_concurrent > 0:
+                _controller = AdmissionController(
+                    max_concurrent=max_concurrent,
+                    max_per_workflow=int(os.getenv("ADMISSION_MAX_PER_WORKFLOW", "8")),
+                    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+                    max_queue_per_workflow=int(os.getenv("ADMISSION_MAX_QUEUE_PER_WORKFLOW", "16")),
+                    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "5000")) / 1000
+                )
+            _controller_initialized = True
+        return _controller
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that runs workflow executions through the admission controller.
+
+    Only POST requests to the chat and search endpoints of a workflow are
+    limited; everything else passes straight through. A rejected request
+    gets a 429 or 503 JSON response with a Retry-After header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        match = _EXECUTION_PATHS.match(scope["path"])
+        controller = get_admission_controller() if match else None
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Request deadlines count from here, so time spent queued is part of the budget
+        scope.setdefault("state", {})["received_at"] = time.monotonic()
+        key = match.group("workflow_id")
+        try:
+            await controller.acquire(key)
+        except AdmissionRejected as e:
+            await self._reject(send, e)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(key, time.perf_counter() - start)
+
+    async def _reject(self, send, rejection: AdmissionRejected):
+        body = orjson.dumps({
+            "success": False,
+            "message": None,
+            "data": {"reason": rejection.reason, "retry_after": rejection.retry_after},
+            "error": rejection.detail
+        })
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
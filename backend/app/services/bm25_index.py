@@ -0,0 +1,185 @@
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Identifiers such as "E1234", "AB-99" or "v2.1.0" are kept whole and also
+# split into their parts, so exact codes and partial matches both score.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:#][a-z0-9]+)*")
+_SEPARATOR_PATTERN = re.compile(r"[-_./:#]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase keyword tokens
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if _SEPARATOR_PATTERN.search(token):
+            tokens.extend(part for part in _SEPARATOR_PATTERN.split(token) if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Postings are append-only arrays of internal document numbers and term
+    frequencies, which keeps 100k+ chunk collections compact and lets a
+    query be scored with a handful of vectorized NumPy operations. Deletes
+    and re-adds tombstone the old document number; the postings are
+    compacted once tombstones make up a quarter of the index. Document
+    frequencies are taken from the posting lengths, so they may overcount
+    deleted chunks slightly until the next compaction.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Held by callers that need a consistent view across several calls,
+        # e.g. while the index is rebuilt from the vector store
+        self.lock = threading.RLock()
+        self.is_built = False
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._doc_numbers: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._deleted = bytearray()
+        self._live_count = 0
+        self._live_length = 0
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]):
+        """
+        Index documents, replacing any existing entries with the same ids
+        """
+        with self.lock:
+            for doc_id, text in zip(doc_ids, texts):
+                self._remove(doc_id)
+
+                doc_number = len(self._doc_ids)
+                term_counts = Counter(tokenize(text))
+                length = sum(term_counts.values())
+
+                self._doc_ids.append(doc_id)
+                self._doc_numbers[doc_id] = doc_number
+                self._lengths.append(length)
+                self._deleted.append(0)
+                self._live_count += 1
+                self._live_length += length
+
+                for term, count in term_counts.items():
+                    posting = self._postings.get(term)
+                    if posting is None:
+                        posting = (array("I"), array("I"))
+                        self._postings[term] = posting
+                    posting[0].append(doc_number)
+                    posting[1].append(count)
+
+            # Re-adds leave tombstones just like deletes do
+            self._compact_if_needed()
+
+    def delete(self, doc_ids: Iterable[str]):
+        """
+        Remove documents from the index
+        """
+        with self.lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+            self._compact_if_needed()
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+            self.is_built = False
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Return up to `limit` (doc_id, score) pairs ordered by BM25 score
+        """
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+
+        with self.lock:
+            if not self._live_count:
+                return []
+
+            total = len(self._doc_ids)
+            scores = np.zeros(total, dtype=np.float32)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            average_length = self._live_length / self._live_count
+
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+
+                docs = np.frombuffer(posting[0], dtype=np.uint32)
+                tfs = np.frombuffer(posting[1], dtype=np.uint32).astype(np.float32)
+                df = len(docs)
+                idf = np.log(1.0 + (self._live_count - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / average_length)
+                scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+            scores[np.frombuffer(self._deleted, dtype=np.bool_)] = 0.0
+
+            limit = min(limit, total)
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            return [
+                (self._doc_ids[doc_number], float(scores[doc_number]))
+                for doc_number in top
+                if scores[doc_number] > 0
+            ]
+
+    def _remove(self, doc_id: str):
+        doc_number = self._doc_numbers.pop(doc_id, None)
+        if doc_number is None:
+            return
+
+        self._deleted[doc_number] = 1
+        self._doc_ids[doc_number] = None
+        self._live_count -= 1
+        self._live_length -= self._lengths[doc_number]
+
+    def _compact_if_needed(self):
+        if len(self._doc_ids) - self._live_count > len(self._doc_ids) // 4:
+            self._compact()
+
+    def _compact(self):
+        """
+        Drop tombstoned documents and renumber the survivors
+        """
+        deleted = np.frombuffer(self._deleted, dtype=np.bool_).copy()
+        renumber = np.cumsum(~deleted, dtype=np.int64) - 1
+
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            docs_np = np.frombuffer(docs, dtype=np.uint32)
+            keep = ~deleted[docs_np]
+            if keep.any():
+                postings[term] = (
+                    array("I", renumber[docs_np[keep]].astype(np.uint32).tobytes()),
+                    array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes())
+                )
+
+        doc_ids = [doc_id for doc_id in self._doc_ids if doc_id is not None]
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)[~deleted]
+
+        self._postings = postings
+        self._doc_ids = doc_ids
+        self._doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        self._lengths = array("I", lengths.tobytes())
+        self._deleted = bytearray(len(doc_ids))
@@ -0,0 +1,210 @@
+import asyncio
+import gzip
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import SessionLocal
+from app.models.database import ChatArchiveSegment, ChatMessage, ChatSession
+
+ARCHIVE_FILE_NAME = "chat_messages.jsonl.gz"
+
+# One archive run at a time; two runs would both append and delete the same batch
+_run_lock = asyncio.Lock()
+
+
+def archive_path() -> str:
+    return os.getenv("CHAT_ARCHIVE_PATH", "./chat_archive")
+
+
+def retention_days() -> float:
+    return float(os.getenv("CHAT_RETENTION_DAYS", "90"))
+
+
+class ChatArchiver:
+    """
+    Moves chat messages past the retention age into compressed archive files.
+
+    Archives are gzip-compressed JSONL, one object per message, partitioned
+    by the month the message was created (`month=YYYY-MM/chat_messages.jsonl.gz`)
+    so any JSONL or dataframe tool can load them. Each batch appends one gzip
+    member per session and month and records its byte range in
+    chat_archive_segments, which lets a session's history be read back
+    without decompressing the whole month. The hot rows are deleted in the
+    same transaction that records the segments: a crash in between leaves
+    at most an unreferenced member, and the messages are archived again by
+    the next run.
+    """
+
+    def __init__(self, db: AsyncSession, path: Optional[str] = None):
+        self.db = db
+        self.path = path or archive_path()
+
+    async def run(
+        self,
+        dry_run: bool = False,
+        batch_size: int = 1000,
+        older_than_days: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Archive and delete every message older than the cutoff, `batch_size` at a time
+        """
+        started = time.perf_counter()
+        days = retention_days() if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        report = {
+            "dry_run": dry_run,
+            "cutoff": cutoff.isoformat(),
+            "messages_archived": 0,
+            "segments_written": 0,
+            "bytes_written": 0,
+            "months": [],
+        }
+
+        if dry_run:
+            result = await self.db.execute(select(func.count(ChatMessage.id)).where(ChatMessage.created_at < cutoff))
+            report["messages_archived"] = result.scalar_one()
+        else:
+            months = set()
+            async with _run_lock:
+                while True:
+                    archived, segments, written, batch_months = await self._archive_batch(cutoff, batch_size)
+                    if not archived:
+                        break
+                    report["messages_archived"] += archived
+                    report["segments_written"] += segments
+                    report["bytes_written"] += written
+                    months.update(batch_months)
+            report["months"] = sorted(months)
+
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    async def _archive_batch(self, cutoff: datetime, batch_size: int) -> Tuple[int, int, int, List[str]]:
+        result = await self.db.execute(
+            select(
+                ChatMessage.id,
+                ChatMessage.session_id,
+                ChatMessage.message_type,
+                ChatMessage.content,
+                ChatMessage.message_metadata,
+                ChatMessage.created_at,
+                ChatSession.session_id.label("session_key")
+            )
+            .outerjoin(ChatSession, ChatSession.id == ChatMessage.session_id)
+            .where(ChatMessage.created_at < cutoff)
+            .order_by(ChatMessage.created_at, ChatMessage.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0, 0, 0, []
+
+        groups: Dict[Tuple[str, int], List[Any]] = defaultdict(list)
+        for row in rows:
+            groups[(row.created_at.strftime("%Y-%m"), row.session_id)].append(row)
+
+        segments = await asyncio.to_thread(self._append_members, groups)
+
+        await self.db.execute(insert(ChatArchiveSegment), segments)
+        await self.db.execute(delete(ChatMessage).where(ChatMessage.id.in_([row.id for row in rows])))
+        await self.db.commit()
+
+        months = sorted({month for month, _ in groups})
+        return len(rows), len(segments), sum(segment["byte_length"] for segment in segments), months
+
+    def _append_members(self, groups: Dict[Tuple[str, int], List[Any]]) -> List[Dict[str, Any]]:
+        by_month: Dict[str, Dict[int, List[Any]]] = defaultdict(dict)
+        for (month, session_id), rows in groups.items():
+            by_month[month][session_id] = sorted(rows, key=lambda row: row.id)
+
+        segments = []
+        for month, sessions in sorted(by_month.items()):
+            relative_path = f"month={month}/{ARCHIVE_FILE_NAME}"
+            file_path = os.path.join(self.path, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "ab") as archive:
+                for session_id, rows in sessions.items():
+                    payload = b"".join(
+                        orjson.dumps({
+                            "id": row.id,
+                            "session_id": row.session_key,
+                            "message_type": row.message_type,
+                            "content": row.content,
+                            "message_metadata": row.message_metadata,
+                            "created_at": row.created_at,
+                        }) + b"\n"
+                        for row in rows
+                    )
+                    # Concatenated gzip members still form one valid .gz file
+                    member = gzip.compress(payload)
+                    offset = archive.tell()
+                    archive.write(member)
+                    segments.append({
+                        "session_id": session_id,
+                        "month": month,
+                        "path": relative_path,
+                        "byte_offset": offset,
+                        "byte_length": len(member),
+                        "first_message_id": rows[0].id,
+                        "last_message_id": rows[-1].id,
+                        "message_count": len(rows),
+                    })
+                # Durable before the rows are deleted from the database
+                archive.flush()
+                os.fsync(archive.fileno())
+        return segments
+
+    async def read_session(self, session_key: int, after_id: int = 0, limit: int = 50) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Archived messages of a session with id above `after_id`, oldest first,
+        and whether more follow
+        """
+        result = await self.db.execute(
+            select(ChatArchiveSegment)
+            .where(ChatArchiveSegment.session_id == session_key, ChatArchiveSegment.last_message_id > after_id)
+            .order_by(ChatArchiveSegment.first_message_id)
+        )
+        messages: List[Dict[str, Any]] = []
+        for segment in result.scalars():
+            # Segments are ordered by first id, so once a page is full no later one can add to it
+            if len(messages) > limit and segment.first_message_id > messages[limit]["id"]:
+                break
+            try:
+                records = await asyncio.to_thread(self._read_member, segment.path, segment.byte_offset, segment.byte_length)
+            except (OSError, ValueError) as e:
+                print(f"Error reading chat archive segment {segment.id} ({segment.path}): {str(e)}")
+                continue
+            messages.extend(record for record in records if record["id"] > after_id)
+            messages.sort(key=lambda record: record["id"])
+
+        return messages[:limit], len(messages) > limit
+
+    def _read_member(self, relative_path: str, offset: int, length: int) -> List[Dict[str, Any]]:
+        with open(os.path.join(self.path, relative_path), "rb") as archive:
+            archive.seek(offset)
+            data = archive.read(length)
+        return [orjson.loads(line) for line in gzip.decompress(data).splitlines() if line]
+
+
+async def run_chat_archive_periodically(interval_seconds: float, batch_size: int = 1000):
+    """
+    Archive old chat messages every `interval_seconds` until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with SessionLocal() as db:
+                report = await ChatArchiver(db).run(batch_size=batch_size)
+            print(
+                f"Chat archive: moved {report['messages_archived']} messages "
+                f"({report['bytes_written']:,} compressed bytes) older than {report['cutoff']}"
+            )
+        except Exception as e:
+            print(f"Chat archive failed: {str(e)}")
@@ -0,0 +1,269 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.database import engine
+from app.models.database import ChatMessage
+
+_buffer_lock = threading.Lock()
+_buffer: Optional["ChatMessageBuffer"] = None
+
+# Attempts per batch before its messages are reported as lost
+_WRITE_ATTEMPTS = 3
+_RETRY_DELAY_SECONDS = 0.2
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind buffer for chat messages.
+
+    Messages are queued in memory and inserted in bulk by a background task,
+    one transaction per batch, once `batch_size` messages are waiting or the
+    oldest has waited `flush_interval` seconds. The queue is bounded: when
+    the database falls behind, `add` waits for room instead of growing
+    without limit. `sync` gives read-your-writes for a session by flushing
+    and waiting for that session's pending messages.
+
+    The writer keeps its own connection, taken when the buffer starts:
+    requests waiting in `sync` hold pooled connections, and a writer that
+    had to queue behind them for one would never get it.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_queue: int = 10000,
+        session_cache_size: int = 10000
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._flush_now = asyncio.Event()
+        # Last queued write per session; it resolves once everything queued before it is stored
+        self._pending: Dict[int, asyncio.Future] = {}
+        # Public session id -> primary key, so posting a message needs no lookup query
+        self._session_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._session_cache_size = session_cache_size
+        self._connection: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.lost = 0
+
+    async def start(self):
+        self._connection = await engine.connect()
+        self._task = asyncio.create_task(self._run())
+
+    def cached_session_id(self, session_id: str) -> Optional[int]:
+        key = self._session_ids.get(session_id)
+        if key is not None:
+            self._session_ids.move_to_end(session_id)
+        return key
+
+    def remember_session(self, session_id: str, key: int):
+        self._session_ids[session_id] = key
+        self._session_ids.move_to_end(session_id)
+        while len(self._session_ids) > self._session_cache_size:
+            self._session_ids.popitem(last=False)
+
+    def forget_session(self, session_id: str):
+        self._session_ids.pop(session_id, None)
+
+    async def add(self, message: ChatMessage) -> asyncio.Future:
+        """
+        Queue a message; the returned future resolves to its id once it is stored
+        """
+        if message.created_at is None:
+            # Stamped now so timestamps reflect when the message was posted, not flushed
+            message.created_at = datetime.utcnow()
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda _: self._release(message.session_id, future))
+        if self._closed:
+            await self._write([(message, future)])
+            await self._reset_connection()
+            return future
+
+        self._pending[message.session_id] = future
+        await self._queue.put((message, future))
+        return future
+
+    async def sync(self, session_key: int):
+        """
+        Wait until every message queued for the session is in the database
+        """
+        future = self._pending.get(session_key)
+        if future is None:
+            return
+        self._flush_now.set()
+        try:
+            await asyncio.shield(future)
+        except Exception as e:
+            print(f"Pending chat messages for session {session_key} were not stored: {e}")
+
+    async def close(self):
+        """
+        Store everything still queued and stop the background writer
+        """
+        if self._closed:
+            return
+        self._closed = True
+        await self._queue.put(None)
+        await self._task
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "lost": self.lost,
+        }
+
+    async def _reset_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.close()
+            except Exception as e:
+                print(f"Error closing chat message writer connection: {e}")
+
+    def _release(self, session_key: int, future: asyncio.Future):
+        if self._pending.get(session_key) is future:
+            del self._pending[session_key]
+        # Failures are already logged by the writer; mark them as seen
+        if not future.cancelled():
+            future.exception()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size and not self._flush_now.is_set():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            # Take whatever else is already waiting, up to a full batch
+            while not stopping and len(batch) < self.batch_size and not self._queue.empty():
+                entry = self._queue.get_nowait()
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            self._flush_now.clear()
+            await self._write(batch)
+
+        # Durable shutdown: anything queued behind the stop marker is written too
+        remaining = []
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                remaining.append(entry)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._write(remaining[start:start + self.batch_size])
+
+    async def _write(self, batch: List[Tuple[ChatMessage, asyncio.Future]]):
+        table = ChatMessage.__table__
+        rows = [
+            {column.name: getattr(message, column.key) for column in table.columns if column.name != "id"}
+            for message, _ in batch
+        ]
+
+        for attempt in range(1, _WRITE_ATTEMPTS + 1):
+            try:
+                if self._connection is None:
+                    self._connection = await engine.connect()
+                async with self._connection.begin():
+                    result = await self._connection.execute(
+                        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                        rows
+                    )
+                    ids = result.scalars().all()
+                break
+            except Exception as e:
+                print(f"Error writing {len(batch)} chat messages (attempt {attempt}): {e}")
+                await self._reset_connection()
+                if attempt == _WRITE_ATTEMPTS:
+                    self.lost += len(batch)
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+                await asyncio.sleep(_RETRY_DELAY_SECONDS * attempt)
+
+        self.written += len(batch)
+        self.batches += 1
+        for (message, future), message_id in zip(batch, ids):
+            message.id = message_id
+            if not future.done():
+                future.set_result(message_id)
+
+
+def get_chat_message_buffer() -> Optional[ChatMessageBuffer]:
+    """
+    Return the shared message buffer, or None when messages are written inline
+    """
+    with _buffer_lock:
+        return _buffer
+
+
+async def start_chat_message_buffer() -> bool:
+    """
+    Start the shared message buffer unless CHAT_WRITE_BEHIND is off
+
+    Called from the server's startup so the queue and writer belong to its event loop.
+    """
+    global _buffer
+    if not _env_flag("CHAT_WRITE_BEHIND", "true"):
+        return False
+    buffer = ChatMessageBuffer(
+        batch_size=int(os.getenv("CHAT_WRITE_BATCH_SIZE", "100")),
+        flush_interval=int(os.getenv("CHAT_WRITE_FLUSH_MS", "50")) / 1000,
+        max_queue=int(os.getenv("CHAT_WRITE_QUEUE_SIZE", "10000"))
+    )
+    await buffer.start()
+    with _buffer_lock:
+        _buffer = buffer
+    return True
+
+
+async def shutdown_chat_message_buffer():
+    """
+    Flush queued messages; call before the database engine is disposed
+    """
+    global _buffer
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        await buffer.close()
+        print(f"Chat message buffer flushed ({buffer.written} messages in {buffer.batches} batches)")
@@ -0,0 +1,191 @@
+import asyncio
+import functools
+import os
+from typing import Any, Awaitable, Dict, List, Optional, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import SessionLocal
+from app.models.database import ChatMessage, ChatSession
+from app.services.chat_message_buffer import get_chat_message_buffer
+from app.services.llm_service import DEFAULT_TIMEOUT, LLMService
+
+# Messages kept verbatim after each compaction
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "8"))
+# Extra messages allowed to pile up before they are folded into the summary,
+# so the summarizer runs once per few turns rather than every turn
+SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "6"))
+SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+# Fallback summary length when no LLM is available (about 4 characters per token)
+_CHARS_PER_TOKEN = 4
+
+# Compactions running in the background, and the sessions they belong to.
+# Only touched from the event loop.
+_compaction_tasks: Set[asyncio.Task] = set()
+_compacting_sessions: Set[int] = set()
+
+
+def _compaction_done(session_id: int, task: asyncio.Task):
+    _compaction_tasks.discard(task)
+    _compacting_sessions.discard(session_id)
+
+
+async def shutdown_history_compaction():
+    """
+    Cancel compactions still running; their sessions are compacted on a later turn
+    """
+    tasks = list(_compaction_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ConversationMemory:
+    """
+    Bounded history for a chat session: a rolling summary plus the recent messages.
+
+    A session never carries more than `window + batch` unsummarized messages;
+    once a turn takes it past that, the oldest messages beyond the last
+    `window` are folded into the session's summary. The prompt size per turn
+    therefore stays constant however long the conversation gets.
+
+    Folding takes an LLM call, so it runs as a background task after the
+    turn is stored and never delays the response.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm_service: Optional[LLMService] = None,
+        window: int = HISTORY_WINDOW,
+        batch: int = SUMMARY_BATCH,
+        summary_max_tokens: int = SUMMARY_MAX_TOKENS
+    ):
+        self.db = db
+        self.llm_service = llm_service or LLMService()
+        self.window = window
+        self.batch = batch
+        self.summary_max_tokens = summary_max_tokens
+
+    async def get_session(self, session_id: str, workflow_id: int) -> Optional[ChatSession]:
+        result = await self.db.execute(
+            select(ChatSession).where(ChatSession.session_id == session_id, ChatSession.workflow_id == workflow_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def load(self, session: ChatSession) -> List[ChatMessage]:
+        """
+        Messages not yet in the summary, oldest first
+        """
+        buffer = get_chat_message_buffer()
+        if buffer is not None:
+            await buffer.sync(session.id)
+
+        result = await self.db.execute(
+            select(ChatMessage)
+            .where(ChatMessage.session_id == session.id, ChatMessage.id > session.summarized_message_id)
+            .order_by(ChatMessage.id.desc())
+            .limit(self.window + self.batch)
+        )
+        return list(reversed(result.scalars().all()))
+
+    @staticmethod
+    def as_turns(messages: List[ChatMessage]) -> List[Dict[str, str]]:
+        """
+        Chat messages as LLM history entries; system notices are left out
+        """
+        return [
+            {"role": message.message_type, "content": message.content}
+            for message in messages
+            if message.message_type in ("user", "assistant")
+        ]
+
+    async def record_turn(
+        self,
+        session: ChatSession,
+        history: List[ChatMessage],
+        user_message: str,
+        response: str,
+        metadata: Dict[str, Any],
+        model: str
+    ):
+        """
+        Store a user message and its response, and start compacting older history if needed
+        """
+        user_entry = ChatMessage(session_id=session.id, message_type="user", content=user_message, message_metadata={})
+        assistant_entry = ChatMessage(session_id=session.id, message_type="assistant", content=response, message_metadata=metadata)
+        buffer = get_chat_message_buffer()
+        if buffer is not None:
+            stored = [await buffer.add(user_entry), await buffer.add(assistant_entry)]
+        else:
+            self.db.add_all([user_entry, assistant_entry])
+            await self.db.commit()
+            stored = []
+
+        messages = history + [user_entry, assistant_entry]
+        overflow = len(messages) - self.window
+        # A session already being compacted is left alone; its next turn starts another if still needed
+        if overflow > self.batch and session.id not in _compacting_sessions:
+            _compacting_sessions.add(session.id)
+            task = asyncio.create_task(self._compact_later(session, messages[:overflow], model, stored))
+            _compaction_tasks.add(task)
+            task.add_done_callback(functools.partial(_compaction_done, session.id))
+
+    async def _compact_later(
+        self,
+        session: ChatSession,
+        messages: List[ChatMessage],
+        model: str,
+        stored: List[Awaitable]
+    ):
+        try:
+            # Compaction needs the new messages' ids, so it waits for their flush
+            await asyncio.gather(*stored)
+            # The request's own session is closed by the time this runs
+            async with SessionLocal() as db:
+                watermark = await db.scalar(
+                    select(ChatSession.summarized_message_id).where(ChatSession.id == session.id)
+                )
+                if watermark != session.summarized_message_id:
+                    # An earlier compaction finished after this turn loaded the session
+                    return
+                await self._compact(db, session, messages, model)
+        except Exception as e:
+            print(f"Skipping compaction of chat session {session.session_id}: {e}")
+
+    async def _compact(
+        self,
+        db: AsyncSession,
+        session: ChatSession,
+        messages: List[ChatMessage],
+        model: str,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        turns = self.as_turns(messages)
+        # A summarizer that runs out of time falls back to the truncated transcript
+        summary = await self.llm_service.summarize_conversation(
+            session.summary, turns, model, self.summary_max_tokens, timeout
+        )
+        if summary is None:
+            summary = self._truncated_summary(session.summary, turns)
+
+        # Conditional on the old watermark, so two concurrent turns cannot both fold the same messages
+        result = await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session.id, ChatSession.summarized_message_id == session.summarized_message_id)
+            .values(summary=summary, summarized_message_id=messages[-1].id)
+        )
+        await db.commit()
+        if result.rowcount == 0:
+            print(f"Chat session {session.session_id} was compacted concurrently; keeping the other summary")
+
+    def _truncated_summary(self, previous_summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+        """
+        Summary without an LLM: the most recent part of the transcript
+        """
+        lines = [previous_summary] if previous_summary else []
+        lines.extend(f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}" for turn in turns)
+        text = "\n".join(lines)
+        limit = self.summary_max_tokens * _CHARS_PER_TOKEN
+        return text if len(text) <= limit else "..." + text[-limit:]
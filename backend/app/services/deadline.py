@@ -0,0 +1,89 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# Budget for a workflow execution when neither the request nor the workflow sets one (0 = none)
+DEFAULT_TIMEOUT_MS = float(os.getenv("WORKFLOW_TIMEOUT_MS", "60000"))
+# Time held back for the LLM call when deciding whether optional stages still fit
+LLM_RESERVE_MS = float(os.getenv("WORKFLOW_LLM_RESERVE_MS", "5000"))
+# Optional stages with less than this left are skipped rather than started
+MIN_STAGE_MS = float(os.getenv("WORKFLOW_MIN_STAGE_MS", "250"))
+
+
+class Deadline:
+    """
+    Time budget of one request, shared by every stage that works on it.
+
+    Required stages (the LLM call) get whatever is left. Optional stages
+    (retrieval, web search) only get what is left after
+    `reserve` is held back for the required ones, and are skipped when that
+    is below `min_stage`. Skipped stages are recorded so the response can
+    report them.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        started_at: Optional[float] = None,
+        reserve: float = LLM_RESERVE_MS / 1000,
+        min_stage: float = MIN_STAGE_MS / 1000
+    ):
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.budget = budget
+        self.reserve = reserve
+        self.min_stage = min_stage
+        self.skipped: List[Dict[str, str]] = []
+
+    @property
+    def expires_at(self) -> float:
+        return self.started_at + self.budget
+
+    def limit(self, budget: float):
+        """
+        Tighten the budget, e.g. to a workflow's own timeout
+        """
+        self.budget = min(self.budget, budget)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def optional_budget(self) -> float:
+        """
+        Time an optional stage may take without eating into the reserve
+        """
+        # A budget smaller than the reserve still leaves optional stages a share of it
+        reserve = min(self.reserve, self.budget / 2)
+        return max(0.0, self.remaining() - reserve)
+
+    def skip(self, stage: str, reason: str):
+        self.skipped.append({"stage": stage, "reason": reason})
+
+    def optional_timeout(self, stage: str) -> Optional[float]:
+        """
+        Seconds an optional stage may take, or None (recorded as skipped) if too little is left
+        """
+        timeout = self.optional_budget()
+        if timeout < self.min_stage:
+            self.skip(stage, "insufficient budget")
+            return None
+        return timeout
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "elapsed_ms": round((time.monotonic() - self.started_at) * 1000),
+            "remaining_ms": round(self.remaining() * 1000),
+        }
+
+
+def request_deadline(timeout_ms: Optional[float] = None, started_at: Optional[float] = None) -> Optional[Deadline]:
+    """
+    Deadline for a request from its timeout header, else WORKFLOW_TIMEOUT_MS; None if neither is set
+    """
+    budget_ms = timeout_ms if timeout_ms and timeout_ms > 0 else DEFAULT_TIMEOUT_MS
+    if budget_ms <= 0:
+        return None
+    return Deadline(budget_ms / 1000, started_at=started_at)
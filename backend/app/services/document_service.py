@@ -1,11 +1,16 @@
-import fitz  # PyMuPDF
 import os
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import Document
 from app.services.vector_service import VectorService
 
+def document_collection_name(workflow_id: int = None) -> str:
+    """
+    Vector collection holding the chunks of a workflow's documents
+    """
+    return f"workflow_{workflow_id}" if workflow_id else "general"
+
 class DocumentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.vector_service = VectorService()
 
@@ -14,7 +19,7 @@ class DocumentService:
         Process a document: extract text and generate embeddings
         """
         try:
-            document = self.db.query(Document).filter(Document.id == document_id).first()
+            document = await self.db.get(Document, document_id)
             if not document:
                 return False
 
@@ -30,16 +35,17 @@ class DocumentService:
                 embedding_count = await self._generate_embeddings(document, text_content)
                 document.embedding_count = embedding_count
             
-            self.db.commit()
+            await self.db.commit()
             return True
 
         except Exception as e:
             print(f"Error processing document {document_id}: {str(e)}")
             # Mark as processed but with error
-            document = self.db.query(Document).filter(Document.id == document_id).first()
+            await self.db.rollback()
+            document = await self.db.get(Document, document_id)
             if document:
                 document.processed = True
-                self.db.commit()
+                await self.db.commit()
             return False
 
     def _extract_text(self, file_path: str, file_type: str) -> str:
@@ -63,6 +69,9 @@ class DocumentService:
         """
         Extract text from PDF using PyMuPDF
         """
+        # Imported here so PyMuPDF only loads once a PDF is processed
+        import fitz
+
         text = ""
         try:
             doc = fitz.open(file_path)
@@ -113,7 +122,7 @@ class DocumentService:
             chunks = self._split_text_into_chunks(text_content)
             
             # Create collection name based on workflow
-            collection_name = f"workflow_{document.workflow_id}" if document.workflow_id else "general"
+            collection_name = document_collection_name(document.workflow_id)
             
             # Store chunks in vector database
             embedding_count = await self.vector_service.store_document_chunks(
@@ -0,0 +1,100 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Rough per-entry overhead of the dict slot, key object and array header
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a query: Unicode-normalized with whitespace collapsed
+
+    Case is kept, since not every embedding model is uncased.
+    """
+    return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of query text -> embedding vector, bounded in bytes.
+
+    Vectors are stored as float32 arrays. Entries are evicted least recently
+    used first once their estimated size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, query: str, embedding) -> np.ndarray:
+        """
+        Cache an embedding and return it as the stored float32 vector
+        """
+        key = normalize_query(query)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector.flags.writeable = False
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return vector
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+
+            self._entries[key] = vector
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_key, evicted)
+                self.evictions += 1
+
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    @staticmethod
+    def _entry_size(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key.encode("utf-8")) + _ENTRY_OVERHEAD
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,19 +1,60 @@
-import openai
-import google.generativeai as genai
+import asyncio
 import os
-from typing import Optional
+import threading
+from typing import Dict, List, Optional
+
+# The provider SDKs take over a second to import, so they are loaded on first
+# use (or by preload_llm_clients during warm-up) rather than at startup
+_genai_lock = threading.Lock()
+_genai_configured_key: Optional[str] = None
+
+# Provider call timeout in seconds when the caller has no deadline of its own
+DEFAULT_TIMEOUT = 30.0
+
+
+def _openai_client(api_key: str):
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        timeout=DEFAULT_TIMEOUT  # each request passes its own remaining budget
+    )
+
+
+def _gemini_module(api_key: str):
+    """
+    google.generativeai, configured with `api_key`
+    """
+    global _genai_configured_key
+    import google.generativeai as genai
+
+    with _genai_lock:
+        if _genai_configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_configured_key = api_key
+    return genai
+
+
+async def preload_llm_clients() -> List[str]:
+    """
+    Import the SDKs of the configured LLM providers; returns their names
+    """
+    loaded = []
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if openai_api_key:
+        await asyncio.to_thread(_openai_client, openai_api_key)
+        loaded.append("openai")
+    if google_api_key:
+        await asyncio.to_thread(_gemini_module, google_api_key)
+        loaded.append("gemini")
+    return loaded
+
 
 class LLMService:
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
-        
-        # Configure APIs
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
-            
-        if self.google_api_key:
-            genai.configure(api_key=self.google_api_key)
 
     async def generate_response(
         self,
@@ -21,19 +62,25 @@ class LLMService:
         system_prompt: str = "You are a helpful AI assistant.",
         model: str = "gpt-4",
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        history: Optional[List[Dict[str, str]]] = None,
+        timeout: float = DEFAULT_TIMEOUT
     ) -> str:
         """
         Generate response using specified LLM
+
+        `history` holds earlier turns as {"role": "user" | "assistant", "content"}
+        dicts, oldest first. `timeout` is the time in seconds the provider call
+        may take, normally what is left of the request's deadline.
         """
         try:
             if model.startswith("gpt"):
                 return await self._generate_openai_response(
-                    query, system_prompt, model, temperature, max_tokens
+                    query, system_prompt, model, temperature, max_tokens, history or [], timeout
                 )
             elif model.startswith("gemini"):
                 return await self._generate_gemini_response(
-                    query, system_prompt, model, temperature, max_tokens
+                    query, system_prompt, model, temperature, max_tokens, history or [], timeout
                 )
             else:
                 # For unsupported models, provide helpful guidance
@@ -48,7 +95,9 @@ class LLMService:
         system_prompt: str,
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        history: List[Dict[str, str]],
+        timeout: float = DEFAULT_TIMEOUT
     ) -> str:
         """
         Generate response using OpenAI GPT
@@ -57,33 +106,10 @@ class LLMService:
             return "⚠️ OpenAI API key not configured. Please add your OPENAI_API_KEY to the .env file to enable GPT responses. You can get an API key from https://platform.openai.com/api-keys"
 
         try:
-            from openai import OpenAI
-            import asyncio
-            
-            client = OpenAI(
-                api_key=self.openai_api_key,
-                timeout=30.0  # 30 second timeout
-            )
-            
-            # Create the request function
-            def make_request():
-                return client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": query}
-                    ],
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            
-            # Run with timeout
-            response = await asyncio.wait_for(
-                asyncio.to_thread(make_request), 
-                timeout=30.0
-            )
-            
-            return response.choices[0].message.content
+            messages = [{"role": "system", "content": system_prompt}]
+            messages.extend(history)
+            messages.append({"role": "user", "content": query})
+            return await self._openai_completion(messages, model, temperature, max_tokens, timeout)
 
         except asyncio.TimeoutError:
             return "Request timed out. Please try again with a shorter query."
@@ -103,7 +129,9 @@ class LLMService:
         system_prompt: str,
         model: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        history: List[Dict[str, str]],
+        timeout: float = DEFAULT_TIMEOUT
     ) -> str:
         """
         Generate response using Google Gemini
@@ -112,29 +140,12 @@ class LLMService:
             return "⚠️ Google AI API key not configured. Please add your GOOGLE_API_KEY to the .env file to enable Gemini responses. You can get an API key from https://makersuite.google.com/app/apikey"
 
         try:
-            import asyncio
-            # Use the correct Gemini model name for current API
-            model_instance = genai.GenerativeModel('gemini-1.5-flash')
-            
-            # Combine system prompt with user query
-            full_prompt = f"{system_prompt}\n\nUser: {query}\nAssistant:"
-            
-            # Create the request function
-            def make_request():
-                return model_instance.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=temperature,
-                        max_output_tokens=max_tokens,
-                    )
-                )
-            
-            response = await asyncio.wait_for(
-                asyncio.to_thread(make_request),
-                timeout=30.0
+            # Combine system prompt, earlier turns and the user query
+            turns = "".join(
+                f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}\n" for turn in history
             )
-            
-            return response.text
+            full_prompt = f"{system_prompt}\n\n{turns}User: {query}\nAssistant:"
+            return await self._gemini_completion(full_prompt, temperature, max_tokens, timeout)
 
         except asyncio.TimeoutError:
             return "Request timed out. Please try again with a shorter query."
@@ -146,6 +157,91 @@ class LLMService:
                 return "Invalid API key. Please check your Google AI configuration."
             return f"Gemini API error: {error_msg}"
 
+    async def _openai_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: float = DEFAULT_TIMEOUT
+    ) -> str:
+        # Create the request function; the client (and on first use, the SDK) loads in the worker thread
+        def make_request():
+            client = _openai_client(self.openai_api_key)
+            return client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                # The HTTP call gives up too, rather than running on in the thread
+                timeout=timeout
+            )
+
+        # Run with timeout
+        response = await asyncio.wait_for(
+            asyncio.to_thread(make_request),
+            timeout=timeout
+        )
+
+        return response.choices[0].message.content
+
+    async def _gemini_completion(self, prompt: str, temperature: float, max_tokens: int, timeout: float = DEFAULT_TIMEOUT) -> str:
+        # Create the request function
+        def make_request():
+            genai = _gemini_module(self.google_api_key)
+            # Use the correct Gemini model name for current API
+            model_instance = genai.GenerativeModel('gemini-1.5-flash')
+            return model_instance.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_tokens,
+                ),
+                request_options={"timeout": timeout}
+            )
+
+        response = await asyncio.wait_for(
+            asyncio.to_thread(make_request),
+            timeout=timeout
+        )
+
+        return response.text
+
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        turns: List[Dict[str, str]],
+        model: str = "gpt-4",
+        max_tokens: int = 300,
+        timeout: float = DEFAULT_TIMEOUT
+    ) -> Optional[str]:
+        """
+        Fold `turns` into `previous_summary` and return the new summary
+
+        Returns None when the model is unavailable or the request fails, so
+        callers can fall back instead of storing an error message as history.
+        """
+        transcript = "\n".join(
+            f"{'User' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}" for turn in turns
+        )
+        prompt = (
+            "Update the running summary of a conversation with the new turns below. "
+            "Keep facts, names, decisions and open questions the assistant may need later. "
+            f"Answer with the summary only, in at most {max_tokens} tokens.\n\n"
+            f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+
+        try:
+            if model.startswith("gpt") and self.openai_api_key:
+                return await self._openai_completion(
+                    [{"role": "user", "content": prompt}], model, 0.2, max_tokens, timeout
+                )
+            if model.startswith("gemini") and self.google_api_key:
+                return await self._gemini_completion(prompt, 0.2, max_tokens, timeout)
+        except Exception as e:
+            print(f"Error summarizing conversation: {str(e)}")
+        return None
+
     async def generate_embeddings(self, text: str, model: str = "text-embedding-ada-002") -> Optional[list]:
         """
         Generate embeddings for text
@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+
+from app.services.vector_backends.base import (
+    VectorBackend,
+    VectorCollection,
+    get_default_embedding_function,
+)
+from app.services.vector_backends.sharded import ShardedBackend
+
+
+def create_vector_backend(backend_name: Optional[str] = None) -> Optional[VectorBackend]:
+    """
+    Create the backend selected by VECTOR_BACKEND ("chroma", "embedded" or
+    "remote"), wrapped so collections can be sharded (see VECTOR_SHARDS).
+    A remote backend is sharded by the vector store process it talks to.
+    """
+    backend_name = (backend_name or os.getenv("VECTOR_BACKEND", "chroma")).lower()
+
+    if backend_name == "remote":
+        from app.services.vector_backends.remote_backend import RemoteBackend
+        backend = RemoteBackend(
+            path=os.getenv("VECTOR_SOCKET_PATH", "./vector_store.sock"),
+            timeout=float(os.getenv("VECTOR_SOCKET_TIMEOUT", "30"))
+        )
+        # Connections are opened on demand, so a server that is still starting is not fatal
+        if not backend.ping():
+            print(f"Warning: vector store process not reachable at {backend.path}")
+        return backend
+
+    if backend_name == "embedded":
+        from app.services.vector_backends.embedded_backend import EmbeddedBackend
+        data_path = os.getenv("VECTOR_DATA_PATH", "./vector_data")
+        try:
+            backend = EmbeddedBackend(path=data_path)
+        except Exception as e:
+            print(f"Failed to initialize embedded vector store: {str(e)}")
+            return None
+    else:
+        if backend_name != "chroma":
+            print(f"Unknown VECTOR_BACKEND '{backend_name}', using chroma")
+
+        from app.services.vector_backends.chroma_backend import ChromaBackend
+        data_path = os.getenv("VECTOR_DATA_PATH", "./chroma_data")
+        backend = ChromaBackend.connect(path=data_path)
+        if backend is None:
+            return None
+
+    try:
+        return ShardedBackend(
+            backend,
+            manifest_path=os.getenv("VECTOR_SHARD_MANIFEST", os.path.join(data_path, "shards.json")),
+            default_shards=int(os.getenv("VECTOR_SHARDS", "1")),
+            max_workers=int(os.getenv("VECTOR_SHARD_WORKERS", "8"))
+        )
+    except Exception as e:
+        print(f"Failed to load vector shard manifest: {str(e)}")
+        backend.close()
+        return None
+
+
+__all__ = [
+    "ShardedBackend",
+    "VectorBackend",
+    "VectorCollection",
+    "create_vector_backend",
+    "get_default_embedding_function",
+]
@@ -0,0 +1,129 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+# Every backend embeds with chroma's default model (all-MiniLM-L6-v2), so
+# collections can move between backends without re-embedding.
+_embedding_lock = threading.Lock()
+_embedding_function = None
+
+
+def get_default_embedding_function():
+    """
+    Return the shared default embedding function, loading the model on first use
+    """
+    global _embedding_function
+    with _embedding_lock:
+        if _embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            _embedding_function = DefaultEmbeddingFunction()
+        return _embedding_function
+
+
+class VectorCollection(ABC):
+    """
+    A named set of embedded chunks.
+
+    The method signatures and result shapes follow chroma's `Collection`
+    (lists per query for `query`, flat lists for `get`, `include` selecting
+    "documents", "metadatas", "distances" and "embeddings"), so chroma
+    collections satisfy this interface as they are.
+    """
+
+    name: str
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        embeddings: Optional[List[List[float]]] = None
+    ):
+        """
+        Add chunks, embedding `documents` when `embeddings` are not given
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[List[float]]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Return the nearest chunks for each query
+        """
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Return chunks by id and/or metadata filter
+        """
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """
+        Delete chunks by id and/or metadata filter
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Return the number of chunks in the collection
+        """
+
+
+class VectorBackend(ABC):
+    """
+    Storage engine behind `VectorService`.
+
+    Backends are created once per process and must be safe to call from the
+    vector executor threads concurrently.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        """
+        Return a collection handle, creating the collection if it does not exist
+        """
+
+    @abstractmethod
+    def get_collection(self, name: str) -> Optional[VectorCollection]:
+        """
+        Return a collection handle, or None if the collection does not exist
+        """
+
+    @abstractmethod
+    def delete_collection(self, name: str):
+        """
+        Delete a collection; deleting a missing collection is not an error
+        """
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """
+        Return the names of all collections
+        """
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with the model the backend stores documents with
+        """
+        return [list(map(float, embedding)) for embedding in get_default_embedding_function()(texts)]
+
+    def close(self):
+        """
+        Flush any state that is only persisted on shutdown
+        """
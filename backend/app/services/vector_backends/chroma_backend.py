@@ -0,0 +1,88 @@
+import os
+from typing import List, Optional
+
+import chromadb
+from chromadb.errors import NotFoundError
+
+from app.services.vector_backends.base import VectorBackend
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Vector backend on a ChromaDB client; collection handles are chroma's own
+    """
+
+    name = "chroma"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def connect(cls, path: str = "./chroma_data") -> Optional["ChromaBackend"]:
+        """
+        Open a persistent client at `path`, falling back to a chroma HTTP server
+        """
+        chroma_host = os.getenv("CHROMA_HOST", "localhost")
+        chroma_port = os.getenv("CHROMA_PORT", "8001")
+
+        try:
+            # Try persistent client first (more reliable for development)
+            os.makedirs(path, exist_ok=True)
+
+            client = chromadb.PersistentClient(path=path)
+            # Test the client
+            client.list_collections()
+            print(f"Connected to ChromaDB with persistent storage at {path}")
+            return cls(client)
+        except Exception as e:
+            print(f"Persistent ChromaDB failed: {str(e)}")
+
+        try:
+            # Fallback to HTTP client with timeout
+            import requests
+            # Quick test if HTTP server is available
+            response = requests.get(f"http://{chroma_host}:{chroma_port}/api/v1/heartbeat", timeout=2)
+            if response.status_code == 200:
+                client = chromadb.HttpClient(
+                    host=chroma_host,
+                    port=int(chroma_port)
+                )
+                client.heartbeat()
+                print(f"Connected to ChromaDB HTTP server at {chroma_host}:{chroma_port}")
+                return cls(client)
+        except Exception as e:
+            print(f"HTTP ChromaDB not available: {str(e)}")
+
+        # An in-memory client loses every embedding on restart, so it is only
+        # used when explicitly allowed (e.g. for demos and tests)
+        if os.getenv("VECTOR_ALLOW_EPHEMERAL", "false").lower() == "true":
+            try:
+                client = chromadb.Client()
+                print("Using in-memory ChromaDB client (data will not persist)")
+                return cls(client)
+            except Exception as e:
+                print(f"Failed to initialize in-memory ChromaDB client: {str(e)}")
+
+        print("Error: no ChromaDB client available; vector search is disabled")
+        return None
+
+    def get_or_create_collection(self, name: str):
+        return self.client.get_or_create_collection(
+            name=name,
+            metadata={"description": f"Collection for {name}"}
+        )
+
+    def get_collection(self, name: str):
+        try:
+            return self.client.get_collection(name)
+        except NotFoundError:
+            return None
+
+    def delete_collection(self, name: str):
+        try:
+            self.client.delete_collection(name)
+        except NotFoundError:
+            pass
+
+    def list_collections(self) -> List[str]:
+        return [collection.name for collection in self.client.list_collections()]
@@ -0,0 +1,812 @@
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.vector_backends.base import VectorBackend, VectorCollection
+
+FORMAT_VERSION = 1
+
+_COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+# Files per storage mode as (name, element type, one value per row). The
+# `vectors.*` file is the float tier used for exact scoring and returned
+# embeddings; int8 adds per-vector scaled codes for the coarse pass.
+_STORAGE_LAYOUTS = {
+    "float32": [("vectors.f32", np.float32, False)],
+    "float16": [("vectors.f16", np.float16, False)],
+    "int8": [
+        ("vectors.f16", np.float16, False),
+        ("codes.i8", np.int8, False),
+        ("scales.f32", np.float32, True),
+    ],
+}
+
+# Rows scored per block when scanning quantized vectors; keeps the
+# temporary float32 copy small enough to stay in cache
+_SCAN_BLOCK_ROWS = 2048
+
+
+def matches_where(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """
+    Evaluate a chroma-style metadata filter against one metadata dict
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and not value == operand:
+                    return False
+                if operator == "$ne" and not value != operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+                if operator in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if operator == "$gt" and not value > operand:
+                        return False
+                    if operator == "$gte" and not value >= operand:
+                        return False
+                    if operator == "$lt" and not value < operand:
+                        return False
+                    if operator == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def encode_vectors(vectors: np.ndarray, storage_dtype: str) -> Dict[str, np.ndarray]:
+    """
+    Encode unit-normalized float32 vectors into the files of a storage mode
+    """
+    if storage_dtype == "float32":
+        return {"vectors.f32": vectors.astype(np.float32)}
+
+    encoded = {"vectors.f16": vectors.astype(np.float16)}
+    if storage_dtype == "int8":
+        # Symmetric scalar quantization with one scale per vector
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        encoded["codes.i8"] = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        encoded["scales.f32"] = scales.astype(np.float32)
+    return encoded
+
+
+class _Snapshot:
+    """
+    Immutable view of a collection; writers publish a new one after each change
+    so queries read without taking the collection lock.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], ids: List[str], metadatas: List[Dict[str, Any]], alive: np.ndarray):
+        self.arrays = arrays
+        self.vectors = arrays.get("vectors.f32", arrays.get("vectors.f16"))
+        self.codes = arrays.get("codes.i8")
+        self.scales = arrays.get("scales.f32")
+        self.ids = ids
+        self.metadatas = metadatas
+        self.alive = alive
+        self.filter_masks: Dict[str, np.ndarray] = {}
+
+    def mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        if not where:
+            return self.alive
+
+        key = json.dumps(where, sort_keys=True)
+        mask = self.filter_masks.get(key)
+        if mask is None:
+            mask = self.alive & np.fromiter(
+                (matches_where(metadata, where) for metadata in self.metadatas),
+                dtype=bool,
+                count=len(self.metadatas)
+            )
+            self.filter_masks[key] = mask
+        return mask
+
+
+class EmbeddedCollection(VectorCollection):
+    """
+    Collection stored as a memory-mapped float32 matrix plus a SQLite sidecar.
+
+    Layout of the collection directory:
+        manifest.json    format version, embedding dimension and storage dtype
+        vectors.f32      row-major unit-normalized embeddings, one row per chunk
+                         (vectors.f16 for the float16 and int8 storage modes)
+        codes.i8         int8 codes for the coarse pass (int8 mode only)
+        scales.f32       per-vector dequantization scale (int8 mode only)
+        records.sqlite3  row number, id, document and metadata per chunk
+        hnsw.bin         optional HNSW graph over the rows (written on close)
+
+    Vectors are only ever appended. Deleting a chunk tombstones its row, and
+    the files are compacted once tombstones exceed a quarter of the rows.
+
+    float32 collections are searched exactly (one vectorized matrix product)
+    until they reach `hnsw_threshold` live chunks, after which an HNSW graph
+    is used when `hnswlib` is installed. Quantized collections never build a
+    graph, since it would hold its own float32 copy of every vector: float16
+    is scanned blockwise in float32 arithmetic, and int8 is scanned on the
+    codes with the top `n_results * rescore_factor` candidates re-scored on
+    the float16 tier. Distances are cosine distances.
+    """
+
+    def __init__(self, backend: "EmbeddedBackend", name: str, path: str):
+        self.name = name
+        self.path = path
+        self._backend = backend
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._hnsw_lock = threading.Lock()
+        self._hnsw = None
+        self._hnsw_dirty = False
+        self.dimension: Optional[int] = None
+        self.storage_dtype = backend.storage_dtype
+
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(path, "records.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, document TEXT, "
+            "metadata TEXT, deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS records_live_id ON records(id) WHERE deleted = 0"
+        )
+        self._load()
+
+    # -- persistence -------------------------------------------------------
+
+    def _file_path(self, filename: str) -> str:
+        return os.path.join(self.path, filename)
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, "manifest.json")
+
+    @property
+    def _hnsw_path(self) -> str:
+        return os.path.join(self.path, "hnsw.bin")
+
+    def _load(self):
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported embedded collection format {manifest.get('format_version')} in {self.path}"
+                )
+            self.dimension = manifest.get("dimension")
+            self.storage_dtype = manifest.get("dtype", "float32")
+
+        with self._db_lock:
+            records = self._db.execute(
+                "SELECT row, id, metadata, deleted FROM records ORDER BY row"
+            ).fetchall()
+
+        ids = [record[1] for record in records]
+        metadatas = [json.loads(record[2]) if record[2] else {} for record in records]
+        alive = np.array([not record[3] for record in records], dtype=bool)
+
+        # int8 collections briefly stored no float16 tier; rebuild it from the codes
+        if self.storage_dtype == "int8" and self.dimension and not os.path.exists(self._file_path("vectors.f16")):
+            codes = np.fromfile(self._file_path("codes.i8"), dtype=np.int8).reshape(-1, self.dimension)
+            scales = np.fromfile(self._file_path("scales.f32"), dtype=np.float32)
+            rows = min(len(codes), len(scales))
+            (codes[:rows].astype(np.float32) * scales[:rows, None]).astype(np.float16).tofile(
+                self._file_path("vectors.f16")
+            )
+            print(f"Rebuilt the float16 re-scoring tier of {self.name} from its int8 codes")
+
+        # Vectors are written before their records, so a crash can only leave
+        # unreferenced trailing rows behind; drop them.
+        if self.dimension:
+            for filename, dtype, scalar in _STORAGE_LAYOUTS[self.storage_dtype]:
+                path = self._file_path(filename)
+                expected = len(records) * (1 if scalar else self.dimension) * np.dtype(dtype).itemsize
+                if os.path.exists(path) and os.path.getsize(path) > expected:
+                    with open(path, "r+b") as f:
+                        f.truncate(expected)
+
+        self._id_rows = {record_id: row for row, record_id in enumerate(ids) if alive[row]}
+        self._snapshot = _Snapshot(self._map_arrays(len(ids)), ids, metadatas, alive)
+
+        if len(self._id_rows) >= self._backend.hnsw_threshold:
+            self._load_or_build_hnsw()
+
+    def _map_arrays(self, rows: int) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for filename, dtype, scalar in _STORAGE_LAYOUTS[self.storage_dtype]:
+            shape = (rows,) if scalar else (rows, self.dimension or 0)
+            if not rows or not self.dimension:
+                arrays[filename] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[filename] = np.memmap(self._file_path(filename), dtype=dtype, mode="r", shape=shape)
+        return arrays
+
+    def _write_manifest(self):
+        temporary = self._manifest_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "dimension": self.dimension,
+                "metric": "cosine",
+                "dtype": self.storage_dtype
+            }, f)
+        os.replace(temporary, self._manifest_path)
+
+    def _rollback(self):
+        # Called with _db_lock held; leaves the connection usable after a failed write
+        if self._db.in_transaction:
+            self._db.execute("ROLLBACK")
+
+    def close(self):
+        with self._lock:
+            self._save_hnsw()
+            with self._db_lock:
+                self._db.close()
+
+    # -- writes --------------------------------------------------------------
+
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        if not ids:
+            return
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in one add call")
+        if embeddings is None:
+            embeddings = self._backend.embed(documents)
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self._write_manifest()
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self.dimension}"
+                )
+
+            snapshot = self._snapshot
+            alive = snapshot.alive.copy()
+            replaced = [self._id_rows[chunk_id] for chunk_id in ids if chunk_id in self._id_rows]
+            start_row = len(snapshot.ids)
+
+            encoded_files = encode_vectors(vectors, self.storage_dtype)
+            lengths = {
+                filename: os.path.getsize(self._file_path(filename)) if os.path.exists(self._file_path(filename)) else 0
+                for filename in encoded_files
+            }
+            try:
+                for filename, encoded in encoded_files.items():
+                    with open(self._file_path(filename), "ab") as f:
+                        f.write(encoded.tobytes())
+
+                with self._db_lock:
+                    try:
+                        self._db.execute("BEGIN")
+                        if replaced:
+                            self._db.executemany(
+                                "UPDATE records SET deleted = 1 WHERE row = ?", [(row,) for row in replaced]
+                            )
+                        self._db.executemany(
+                            "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                            [
+                                (start_row + offset, chunk_id, document, json.dumps(metadata))
+                                for offset, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                            ]
+                        )
+                        self._db.execute("COMMIT")
+                    except BaseException:
+                        self._rollback()
+                        raise
+            except BaseException:
+                # Drop the appended vectors so the files match the records again
+                for filename, length in lengths.items():
+                    if os.path.exists(self._file_path(filename)):
+                        with open(self._file_path(filename), "r+b") as f:
+                            f.truncate(length)
+                raise
+
+            alive[replaced] = False
+            for offset, chunk_id in enumerate(ids):
+                self._id_rows[chunk_id] = start_row + offset
+
+            rows = start_row + len(ids)
+            self._snapshot = _Snapshot(
+                self._map_arrays(rows),
+                snapshot.ids + list(ids),
+                snapshot.metadatas + list(metadatas),
+                np.concatenate([alive, np.ones(len(ids), dtype=bool)])
+            )
+
+            new_rows = np.arange(start_row, rows)
+            if self._hnsw is not None:
+                self._hnsw_add(vectors, new_rows)
+                self._hnsw_delete(replaced)
+            elif len(self._id_rows) >= self._backend.hnsw_threshold:
+                self._load_or_build_hnsw()
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            snapshot = self._snapshot
+            rows = set()
+            if ids is not None:
+                rows.update(self._id_rows[chunk_id] for chunk_id in ids if chunk_id in self._id_rows)
+            if where:
+                matched = np.flatnonzero(snapshot.mask(where))
+                rows = rows & set(matched.tolist()) if ids is not None else set(matched.tolist())
+            if not rows:
+                return
+
+            rows = sorted(rows)
+            with self._db_lock:
+                try:
+                    self._db.execute("BEGIN")
+                    self._db.executemany("UPDATE records SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._rollback()
+                    raise
+
+            alive = snapshot.alive.copy()
+            alive[rows] = False
+            for row in rows:
+                self._id_rows.pop(snapshot.ids[row], None)
+            self._snapshot = _Snapshot(snapshot.arrays, snapshot.ids, snapshot.metadatas, alive)
+            self._hnsw_delete(rows)
+
+            if len(alive) - len(self._id_rows) > max(len(alive) // 4, 1000):
+                self._compact()
+
+    def compact(self):
+        """
+        Reclaim the space of deleted rows now instead of waiting for the threshold
+        """
+        with self._lock:
+            if len(self._snapshot.ids) > len(self._id_rows):
+                self._compact()
+
+    def _compact(self):
+        """
+        Rewrite vectors and records without tombstoned rows
+        """
+        snapshot = self._snapshot
+        keep = np.flatnonzero(snapshot.alive)
+
+        try:
+            for filename, array in snapshot.arrays.items():
+                np.ascontiguousarray(array[keep]).tofile(self._file_path(filename) + ".compact")
+
+            with self._db_lock:
+                try:
+                    records = self._db.execute(
+                        "SELECT id, document, metadata FROM records WHERE deleted = 0 ORDER BY row"
+                    ).fetchall()
+                    self._db.execute("BEGIN")
+                    self._db.execute("DELETE FROM records")
+                    self._db.executemany(
+                        "INSERT INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        [(row, *record) for row, record in enumerate(records)]
+                    )
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._rollback()
+                    raise
+        except BaseException:
+            # The original files and records are untouched; only the copies go
+            for filename in snapshot.arrays:
+                if os.path.exists(self._file_path(filename) + ".compact"):
+                    os.remove(self._file_path(filename) + ".compact")
+            raise
+        for filename in snapshot.arrays:
+            os.replace(self._file_path(filename) + ".compact", self._file_path(filename))
+
+        ids = [snapshot.ids[row] for row in keep]
+        self._id_rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self._snapshot = _Snapshot(
+            self._map_arrays(len(ids)),
+            ids,
+            [snapshot.metadatas[row] for row in keep],
+            np.ones(len(ids), dtype=bool)
+        )
+
+        if self._hnsw is not None or len(ids) >= self._backend.hnsw_threshold:
+            if os.path.exists(self._hnsw_path):
+                os.remove(self._hnsw_path)
+            self._hnsw = None
+            self._load_or_build_hnsw()
+
+    def convert_storage(self, storage_dtype: str):
+        """
+        Re-encode every row into another storage mode, e.g. float32 -> int8
+        """
+        if storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported storage dtype: {storage_dtype}")
+
+        with self._lock:
+            if storage_dtype == self.storage_dtype:
+                return
+
+            snapshot = self._snapshot
+            previous = list(snapshot.arrays)
+            written = set()
+            for start in range(0, len(snapshot.ids), _SCAN_BLOCK_ROWS):
+                block = np.asarray(snapshot.vectors[start:start + _SCAN_BLOCK_ROWS], dtype=np.float32)
+                for filename, encoded in encode_vectors(block, storage_dtype).items():
+                    with open(self._file_path(filename) + ".convert", "ab") as f:
+                        f.write(encoded.tobytes())
+                    written.add(filename)
+
+            for filename in written:
+                os.replace(self._file_path(filename) + ".convert", self._file_path(filename))
+            for filename in previous:
+                if filename not in written and os.path.exists(self._file_path(filename)):
+                    os.remove(self._file_path(filename))
+
+            self.storage_dtype = storage_dtype
+            if self.dimension:
+                self._write_manifest()
+            self._snapshot = _Snapshot(
+                self._map_arrays(len(snapshot.ids)), snapshot.ids, snapshot.metadatas, snapshot.alive
+            )
+
+            with self._hnsw_lock:
+                self._hnsw = None
+                self._hnsw_dirty = False
+            if os.path.exists(self._hnsw_path):
+                os.remove(self._hnsw_path)
+            if storage_dtype == "float32" and len(self._id_rows) >= self._backend.hnsw_threshold:
+                self._load_or_build_hnsw()
+
+    def storage_stats(self) -> Dict[str, Any]:
+        """
+        Report bytes scanned per query (resident when hot) and bytes on disk
+        """
+        snapshot = self._snapshot
+        if self.storage_dtype == "int8":
+            search_arrays = [snapshot.codes, snapshot.scales]
+        else:
+            search_arrays = [snapshot.vectors]
+
+        disk_bytes = 0
+        for entry in os.listdir(self.path):
+            if os.path.isfile(self._file_path(entry)):
+                disk_bytes += os.path.getsize(self._file_path(entry))
+
+        return {
+            "storage_dtype": self.storage_dtype,
+            "rows": len(snapshot.ids),
+            "live_rows": len(self._id_rows),
+            "search_bytes": int(sum(array.nbytes for array in search_arrays)),
+            "hnsw_bytes": os.path.getsize(self._hnsw_path) if os.path.exists(self._hnsw_path) else 0,
+            "disk_bytes": disk_bytes
+        }
+
+    # -- reads ---------------------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._id_rows)
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        include = include if include is not None else ["documents", "metadatas", "distances"]
+        if query_embeddings is None:
+            query_embeddings = self._backend.embed(query_texts)
+
+        snapshot = self._snapshot
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        mask = snapshot.mask(where)
+
+        if self.storage_dtype != "float32":
+            results = self._search_quantized(snapshot, queries, n_results, mask)
+        else:
+            results = self._search_hnsw(snapshot, queries, n_results, mask, where)
+            if results is None:
+                results = self._search_exact(snapshot, queries, n_results, mask)
+
+        output = {"ids": [], "distances": [], "documents": [], "metadatas": [], "embeddings": []}
+        for rows, scores in results:
+            output["ids"].append([snapshot.ids[row] for row in rows])
+            output["distances"].append([float(1.0 - score) for score in scores])
+            output["metadatas"].append([snapshot.metadatas[row] for row in rows])
+            output["embeddings"].append(np.asarray(snapshot.vectors[rows], dtype=np.float32))
+        if "documents" in include:
+            output["documents"] = [self._documents([int(row) for row in rows]) for rows, _ in results]
+
+        return {key: (value if key == "ids" or key in include else None) for key, value in output.items()}
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = include if include is not None else ["documents", "metadatas"]
+        snapshot = self._snapshot
+        mask = snapshot.mask(where)
+
+        if ids is not None:
+            rows = [
+                row for row in (self._id_rows.get(chunk_id) for chunk_id in ids)
+                if row is not None and row < len(mask) and mask[row]
+            ]
+        else:
+            rows = np.flatnonzero(mask).tolist()
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        return {
+            "ids": [snapshot.ids[row] for row in rows],
+            "documents": self._documents(rows) if "documents" in include else None,
+            "metadatas": [snapshot.metadatas[row] for row in rows] if "metadatas" in include else None,
+            "embeddings": np.asarray(snapshot.vectors[rows], dtype=np.float32) if "embeddings" in include else None
+        }
+
+    def _documents(self, rows: List[int]) -> List[Optional[str]]:
+        if not rows:
+            return []
+
+        documents = {}
+        with self._db_lock:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                documents.update(self._db.execute(
+                    f"SELECT row, document FROM records WHERE row IN ({placeholders})", batch
+                ).fetchall())
+        return [documents.get(row) for row in rows]
+
+    def _search_exact(self, snapshot: _Snapshot, queries: np.ndarray, n_results: int, mask: np.ndarray):
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return [([], []) for _ in queries]
+
+        # Score only the filtered rows when they are a small part of the matrix
+        if len(candidates) < len(mask) // 2:
+            scores = np.asarray(snapshot.vectors[candidates]) @ queries.T
+        else:
+            scores = np.asarray(snapshot.vectors @ queries.T)
+            scores = scores[candidates]
+
+        k = min(n_results, len(candidates))
+        results = []
+        for column in range(queries.shape[0]):
+            column_scores = scores[:, column]
+            top = np.argpartition(-column_scores, k - 1)[:k]
+            top = top[np.argsort(-column_scores[top], kind="stable")]
+            results.append((candidates[top], column_scores[top]))
+        return results
+
+    def _search_quantized(self, snapshot: _Snapshot, queries: np.ndarray, n_results: int, mask: np.ndarray):
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return [([], []) for _ in queries]
+
+        quantized = snapshot.codes is not None
+        source = snapshot.codes if quantized else snapshot.vectors
+        contiguous = len(candidates) == len(mask)
+
+        # Coarse pass over the compact codes, converted to float32 one block
+        # at a time so the temporary copy stays small
+        scores = np.empty((len(candidates), queries.shape[0]), dtype=np.float32)
+        for start in range(0, len(candidates), _SCAN_BLOCK_ROWS):
+            end = start + _SCAN_BLOCK_ROWS
+            rows = slice(start, end) if contiguous else candidates[start:end]
+            block = np.asarray(source[rows], dtype=np.float32) @ queries.T
+            if quantized:
+                block *= np.asarray(snapshot.scales[rows])[:, None]
+            scores[start:start + len(block)] = block
+
+        k = min(n_results, len(candidates))
+        shortlist = min(len(candidates), k * self._backend.rescore_factor if quantized else k)
+        results = []
+        for column in range(queries.shape[0]):
+            column_scores = scores[:, column]
+            top = np.argpartition(-column_scores, shortlist - 1)[:shortlist]
+            if quantized:
+                # Exact re-scoring of the shortlist on the float tier
+                column_scores = np.zeros_like(column_scores)
+                column_scores[top] = np.asarray(snapshot.vectors[candidates[top]], dtype=np.float32) @ queries[column]
+                top = top[np.argpartition(-column_scores[top], k - 1)[:k]]
+            top = top[np.argsort(-column_scores[top], kind="stable")]
+            results.append((candidates[top], column_scores[top]))
+        return results
+
+    # -- HNSW ----------------------------------------------------------------
+
+    def _search_hnsw(self, snapshot: _Snapshot, queries: np.ndarray, n_results: int, mask: np.ndarray, where):
+        if self._hnsw is None:
+            return None
+
+        live = int(mask.sum())
+        # Selective filters are answered exactly; the graph would need a huge
+        # over-fetch to find enough matching neighbours
+        if where and live < self._backend.hnsw_threshold:
+            return None
+
+        # The graph's element count includes deleted rows, which it never returns
+        fetch = min(n_results * 4 if where else n_results, int(snapshot.alive.sum()))
+        if fetch <= 0:
+            return None
+        with self._hnsw_lock:
+            self._hnsw.set_ef(max(self._backend.hnsw_ef_search, fetch))
+            try:
+                labels, distances = self._hnsw.knn_query(queries, k=fetch)
+            except RuntimeError:
+                # Fewer than `fetch` neighbours reachable; the exact scan answers instead
+                return None
+
+        results = []
+        for label_row, distance_row in zip(labels, distances):
+            keep = [
+                (int(row), 1.0 - float(distance))
+                for row, distance in zip(label_row, distance_row)
+                if row < len(mask) and mask[row]
+            ][:n_results]
+            if len(keep) < min(n_results, live):
+                return None
+            results.append((np.array([row for row, _ in keep], dtype=np.int64), np.array([score for _, score in keep])))
+        return results
+
+    def _load_or_build_hnsw(self):
+        if self.storage_dtype != "float32":
+            return
+
+        try:
+            import hnswlib
+        except ImportError:
+            if not self._backend.hnsw_warning_shown:
+                print("Warning: hnswlib not installed, embedded vector search stays exact")
+                self._backend.hnsw_warning_shown = True
+            return
+
+        snapshot = self._snapshot
+        capacity = max(len(snapshot.ids) * 2, 1024)
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+
+        indexed = set()
+        if os.path.exists(self._hnsw_path):
+            try:
+                index.load_index(self._hnsw_path, max_elements=capacity, allow_replace_deleted=False)
+                indexed = set(index.get_ids_list())
+            except Exception as e:
+                print(f"Rebuilding HNSW index for {self.name}: {str(e)}")
+                index = hnswlib.Index(space="ip", dim=self.dimension)
+                indexed = set()
+
+        if not indexed:
+            index.init_index(
+                max_elements=capacity,
+                ef_construction=self._backend.hnsw_ef_construction,
+                M=self._backend.hnsw_m
+            )
+
+        with self._hnsw_lock:
+            self._hnsw = index
+            missing = np.array(
+                [row for row in np.flatnonzero(snapshot.alive) if int(row) not in indexed],
+                dtype=np.int64
+            )
+            if len(missing):
+                self._hnsw_add(np.asarray(snapshot.vectors[missing], dtype=np.float32), missing, locked=True)
+            self._hnsw_delete([row for row in indexed if row >= len(snapshot.alive) or not snapshot.alive[row]], locked=True)
+
+    def _hnsw_add(self, vectors: np.ndarray, rows: np.ndarray, locked: bool = False):
+        if not locked:
+            with self._hnsw_lock:
+                return self._hnsw_add(vectors, rows, locked=True)
+
+        required = self._hnsw.get_current_count() + len(rows)
+        if required > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(max(required, self._hnsw.get_max_elements() * 2))
+        self._hnsw.add_items(vectors, rows)
+        self._hnsw_dirty = True
+
+    def _hnsw_delete(self, rows: List[int], locked: bool = False):
+        if self._hnsw is None or not len(rows):
+            return
+        if not locked:
+            with self._hnsw_lock:
+                return self._hnsw_delete(rows, locked=True)
+
+        for row in rows:
+            try:
+                self._hnsw.mark_deleted(int(row))
+            except RuntimeError:
+                # Already deleted, or never indexed
+                pass
+        self._hnsw_dirty = True
+
+    def _save_hnsw(self):
+        if self._hnsw is not None and self._hnsw_dirty:
+            with self._hnsw_lock:
+                self._hnsw.save_index(self._hnsw_path)
+                self._hnsw_dirty = False
+
+
+class EmbeddedBackend(VectorBackend):
+    """
+    Single-node vector backend storing each collection in its own directory
+    """
+
+    name = "embedded"
+
+    def __init__(self, path: str = "./vector_data"):
+        self.path = path
+        self.hnsw_threshold = int(os.getenv("VECTOR_HNSW_THRESHOLD", "20000"))
+        self.hnsw_m = int(os.getenv("VECTOR_HNSW_M", "16"))
+        self.hnsw_ef_construction = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "200"))
+        self.hnsw_ef_search = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "128"))
+        self.hnsw_warning_shown = False
+        self.storage_dtype = os.getenv("VECTOR_STORAGE_DTYPE", "float32").lower()
+        self.rescore_factor = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+        if self.storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported VECTOR_STORAGE_DTYPE: {self.storage_dtype}")
+        self._lock = threading.Lock()
+        self._collections: Dict[str, EmbeddedCollection] = {}
+        os.makedirs(path, exist_ok=True)
+        print(f"Using embedded vector store at {path}")
+
+    def _collection_path(self, name: str) -> str:
+        if not _COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name: {name}")
+        return os.path.join(self.path, name)
+
+    def get_or_create_collection(self, name: str) -> EmbeddedCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = EmbeddedCollection(self, name, self._collection_path(name))
+                self._collections[name] = collection
+            return collection
+
+    def get_collection(self, name: str) -> Optional[EmbeddedCollection]:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None and os.path.isdir(self._collection_path(name)):
+                collection = EmbeddedCollection(self, name, self._collection_path(name))
+                self._collections[name] = collection
+            return collection
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self._collection_path(name), ignore_errors=True)
+
+    def list_collections(self) -> List[str]:
+        return sorted(
+            entry for entry in os.listdir(self.path)
+            if os.path.isfile(os.path.join(self.path, entry, "records.sqlite3"))
+        )
+
+    def close(self):
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
@@ -0,0 +1,205 @@
+import queue
+import socket
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from app.services.vector_backends.base import VectorBackend, VectorCollection
+
+# Frames are a 4-byte big-endian length followed by an orjson document
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return _HEADER.pack(len(payload)) + payload
+
+
+def frame_length(header: bytes) -> int:
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return length
+
+
+class VectorServerError(RuntimeError):
+    """
+    An operation failed inside the vector store process
+    """
+
+
+class _Connection:
+    def __init__(self, path: str, timeout: float):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(path)
+        except OSError:
+            self.socket.close()
+            raise
+
+    def call(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.socket.sendall(encode_frame(message))
+        length = frame_length(self._receive(_HEADER.size))
+        return orjson.loads(self._receive(length))
+
+    def _receive(self, size: int) -> bytes:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self.socket.recv_into(view[received:], size - received)
+            if count == 0:
+                raise ConnectionError("Vector store process closed the connection")
+            received += count
+        return bytes(buffer)
+
+    def close(self):
+        self.socket.close()
+
+
+class RemoteCollection(VectorCollection):
+    """
+    Handle for a collection owned by the vector store process
+    """
+
+    def __init__(self, backend: "RemoteBackend", name: str):
+        self._backend = backend
+        self.name = name
+
+    def _call(self, op: str, **args) -> Any:
+        # Unset options are left out so the store applies its own defaults
+        options = {key: value for key, value in args.items() if value is not None}
+        return self._backend.call(op, collection=self.name, **options)
+
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        self._call("add", ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        return self._call(
+            "query",
+            query_texts=query_texts,
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=include
+        )
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        return self._call("get", ids=ids, where=where, limit=limit, offset=offset, include=include)
+
+    def delete(self, ids=None, where=None):
+        self._call("delete", ids=ids, where=where)
+
+    def count(self) -> int:
+        return self._call("count")
+
+    def compact(self):
+        self._call("compact")
+
+    def keyword_search(self, queries: List[str], limit: int) -> List[List[str]]:
+        """
+        Best-first chunk ids per query from the BM25 index kept by the vector store process
+        """
+        return self._call("keyword_search", queries=queries, limit=limit)
+
+
+class RemoteBackend(VectorBackend):
+    """
+    Client for a vector store process (`python -m app.cli vector-server`).
+
+    One process owns the on-disk store, its in-memory indexes and the
+    embedding model; API workers reach it over a Unix socket instead of each
+    opening the store themselves. Calls are blocking, like every other
+    backend, and each executor thread borrows its own connection from a
+    small pool. Connections are opened on demand, so the server may start
+    after (or restart under) the workers.
+    """
+
+    name = "remote"
+
+    def __init__(self, path: str, timeout: float = 30.0, max_idle: int = 16):
+        self.path = path
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue(maxsize=max_idle)
+        self._closed = threading.Event()
+
+    def ping(self) -> bool:
+        try:
+            return self.call("ping") == "pong"
+        except (OSError, VectorServerError):
+            return False
+
+    def call(self, op: str, **args) -> Any:
+        """
+        Run one operation in the vector store process and return its result
+        """
+        message = {"op": op, **args}
+        try:
+            connection, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            connection, reused = _Connection(self.path, self.timeout), False
+
+        try:
+            response = connection.call(message)
+        except (ConnectionError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # A pooled connection may predate a server restart; retry once on a fresh one
+            connection = _Connection(self.path, self.timeout)
+            try:
+                response = connection.call(message)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            # A timed-out or interrupted exchange leaves the stream mid-frame
+            connection.close()
+            raise
+
+        self._release(connection)
+        if "error" in response:
+            if response.get("type") == "ValueError":
+                raise ValueError(response["error"])
+            raise VectorServerError(f"{response.get('type', 'Error')}: {response['error']}")
+        return response.get("result")
+
+    def _release(self, connection: _Connection):
+        if self._closed.is_set():
+            connection.close()
+            return
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        self.call("get_or_create_collection", collection=name)
+        return RemoteCollection(self, name)
+
+    def get_collection(self, name: str) -> Optional[VectorCollection]:
+        if not self.call("has_collection", collection=name):
+            return None
+        return RemoteCollection(self, name)
+
+    def delete_collection(self, name: str):
+        self.call("delete_collection", collection=name)
+
+    def list_collections(self) -> List[str]:
+        return self.call("list_collections")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.call("embed", texts=texts)
+
+    def close(self):
+        # The store itself is flushed by the vector store process on its own shutdown
+        self._closed.set()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
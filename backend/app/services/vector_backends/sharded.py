@@ -0,0 +1,385 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on this platform; rebalance cannot check for other processes
+    fcntl = None
+
+from app.services.vector_backends.base import VectorBackend, VectorCollection
+
+MANIFEST_VERSION = 1
+_SHARD_NAME_PATTERN = re.compile(r"^(?P<name>.+)-shard(?P<index>\d+)of(?P<count>\d+)$")
+
+
+def shard_names(name: str, shard_count: int) -> List[str]:
+    """
+    Physical collection names for a logical collection split `shard_count` ways
+
+    The count is part of the name, so a rebalance writes into a fresh set of
+    collections and the old layout stays readable until it is switched over.
+    """
+    if shard_count <= 1:
+        return [name]
+    return [f"{name}-shard{index}of{shard_count}" for index in range(shard_count)]
+
+
+def shard_for(key: Any, shard_count: int) -> int:
+    """
+    Stable shard number for a routing key (the chunk's document id)
+    """
+    digest = hashlib.md5(str(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+class ShardManifest:
+    """
+    Sidecar JSON file recording how many shards each sharded collection has.
+
+    Collections missing from the manifest are unsharded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("format_version") != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported shard manifest version in {path}")
+            self._counts = {name: int(count) for name, count in data.get("collections", {}).items()}
+
+    def get(self, name: str) -> Optional[int]:
+        with self._lock:
+            return self._counts.get(name)
+
+    def set(self, name: str, shard_count: int):
+        with self._lock:
+            if shard_count <= 1:
+                self._counts.pop(name, None)
+            else:
+                self._counts[name] = shard_count
+            self._save()
+
+    def remove(self, name: str):
+        with self._lock:
+            if self._counts.pop(name, None) is not None:
+                self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump({"format_version": MANIFEST_VERSION, "collections": self._counts}, f, indent=2)
+        os.replace(temporary_path, self.path)
+
+
+class StoreLock:
+    """
+    Advisory lock file shared by every process that has the store open.
+
+    Each backend holds a shared lock for its lifetime; a rebalance takes it
+    exclusively, which only succeeds when no API worker or vector store
+    process has the store open.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        if fcntl is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_SH)
+
+    def try_exclusive(self) -> bool:
+        if self._file is None:
+            return True
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            # A failed upgrade may have dropped the shared lock; take it back
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+            return False
+
+    def shared(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_SH)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ShardedCollection(VectorCollection):
+    """
+    One logical collection spread over several physical collections.
+
+    Chunks are routed by the `document_id` in their metadata (falling back to
+    the chunk id), so a document always lives on exactly one shard. Queries
+    run on every shard concurrently and the per-shard results are merged by
+    distance; reads and deletes fan out the same way.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shards: List[VectorCollection],
+        embed: Callable[[List[str]], List[List[float]]],
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.name = name
+        self.shards = shards
+        self._embed = embed
+        self._executor = executor
+
+    def _fan_out(self, func: Callable[[VectorCollection], Any]) -> List[Any]:
+        if self._executor is None or len(self.shards) == 1:
+            return [func(shard) for shard in self.shards]
+        return list(self._executor.map(func, self.shards))
+
+    def add(self, ids, documents=None, metadatas=None, embeddings=None):
+        groups: Dict[int, List[int]] = {}
+        for position, chunk_id in enumerate(ids):
+            metadata = metadatas[position] if metadatas else None
+            key = metadata.get("document_id", chunk_id) if metadata else chunk_id
+            groups.setdefault(shard_for(key, len(self.shards)), []).append(position)
+
+        def add_group(shard_number: int):
+            positions = groups[shard_number]
+            self.shards[shard_number].add(
+                ids=[ids[position] for position in positions],
+                documents=[documents[position] for position in positions] if documents is not None else None,
+                metadatas=[metadatas[position] for position in positions] if metadatas is not None else None,
+                embeddings=[embeddings[position] for position in positions] if embeddings is not None else None
+            )
+
+        if self._executor is None or len(groups) == 1:
+            for shard_number in groups:
+                add_group(shard_number)
+        else:
+            list(self._executor.map(add_group, list(groups)))
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        include = list(include) if include is not None else ["documents", "metadatas", "distances"]
+        # Distances are needed to merge the shards, whether or not the caller wants them
+        shard_include = include if "distances" in include else include + ["distances"]
+        if query_embeddings is None:
+            # Embed once here rather than once per shard
+            query_embeddings = self._embed(query_texts)
+
+        shard_results = self._fan_out(lambda shard: shard.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=shard_include
+        ))
+
+        fields = ["ids"] + [field for field in ("distances", "documents", "metadatas", "embeddings") if field in include]
+        output: Dict[str, Any] = {field: [] for field in fields}
+        for query_number in range(len(query_embeddings)):
+            candidates = []
+            for result in shard_results:
+                if not result["ids"]:
+                    continue
+                for position in range(len(result["ids"][query_number])):
+                    candidates.append((result["distances"][query_number][position], result, position))
+            candidates.sort(key=lambda candidate: candidate[0])
+            candidates = candidates[:n_results]
+
+            for field in fields:
+                output[field].append([candidate[1][field][query_number][candidate[2]] for candidate in candidates])
+
+        return {
+            field: output.get(field) if field in fields else None
+            for field in ("ids", "distances", "documents", "metadatas", "embeddings")
+        }
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = include if include is not None else ["documents", "metadatas"]
+
+        if limit is None and not offset:
+            results = self._fan_out(lambda shard: shard.get(ids=ids, where=where, include=include))
+            return self._concatenate(results, include)
+
+        # Paging walks the shards in order, skipping whole shards by their size
+        results = []
+        skip = offset or 0
+        remaining = limit
+        for shard in self.shards:
+            if remaining is not None and remaining <= 0:
+                break
+            if where is None and ids is None:
+                size = shard.count()
+            else:
+                size = len(shard.get(ids=ids, where=where, include=[])["ids"])
+            if skip >= size:
+                skip -= size
+                continue
+            page = shard.get(ids=ids, where=where, limit=remaining, offset=skip, include=include)
+            skip = 0
+            if remaining is not None:
+                remaining -= len(page["ids"])
+            results.append(page)
+
+        return self._concatenate(results, include)
+
+    @staticmethod
+    def _concatenate(results: List[Dict[str, Any]], include: List[str]) -> Dict[str, Any]:
+        output = {"ids": [chunk_id for result in results for chunk_id in result["ids"]]}
+        for field in ("documents", "metadatas"):
+            output[field] = [value for result in results for value in result[field]] if field in include else None
+        if "embeddings" in include:
+            rows = [np.asarray(result["embeddings"]) for result in results if len(result["ids"])]
+            output["embeddings"] = np.vstack(rows) if rows else []
+        else:
+            output["embeddings"] = None
+        return output
+
+    def delete(self, ids=None, where=None):
+        self._fan_out(lambda shard: shard.delete(ids=ids, where=where))
+
+    def count(self) -> int:
+        return sum(self._fan_out(lambda shard: shard.count()))
+
+    def compact(self):
+        self._fan_out(lambda shard: shard.compact() if hasattr(shard, "compact") else None)
+
+
+class ShardedBackend(VectorBackend):
+    """
+    Wraps a backend so a logical collection can be split across shards.
+
+    New collections get `default_shards` shards; existing ones keep the
+    count recorded in the manifest (or stay unsharded), and only change it
+    through `rebalance`. Unsharded collections are passed straight through.
+    """
+
+    def __init__(self, backend: VectorBackend, manifest_path: str, default_shards: int = 1, max_workers: int = 8):
+        self.backend = backend
+        self.name = backend.name
+        self.default_shards = max(default_shards, 1)
+        self.manifest = ShardManifest(manifest_path)
+        self.store_lock = StoreLock(f"{manifest_path}.lock")
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-shard")
+
+    def shard_count(self, name: str) -> int:
+        return self.manifest.get(name) or 1
+
+    def _open(self, name: str, shard_count: int) -> VectorCollection:
+        if shard_count <= 1:
+            return self.backend.get_or_create_collection(name)
+        shards = [self.backend.get_or_create_collection(shard_name) for shard_name in shard_names(name, shard_count)]
+        return ShardedCollection(name, shards, self.backend.embed, self._executor)
+
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        with self._lock:
+            shard_count = self.manifest.get(name)
+            if shard_count is None:
+                # Collections created before sharding was enabled stay whole
+                if self.default_shards > 1 and self.backend.get_collection(name) is None:
+                    shard_count = self.default_shards
+                    self.manifest.set(name, shard_count)
+                else:
+                    shard_count = 1
+            return self._open(name, shard_count)
+
+    def get_collection(self, name: str) -> Optional[VectorCollection]:
+        shard_count = self.shard_count(name)
+        if shard_count <= 1:
+            return self.backend.get_collection(name)
+
+        # A lookup never creates shards; a layout with any shard missing is not there
+        shards = []
+        for shard_name in shard_names(name, shard_count):
+            shard = self.backend.get_collection(shard_name)
+            if shard is None:
+                return None
+            shards.append(shard)
+        return ShardedCollection(name, shards, self.backend.embed, self._executor)
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            for shard_name in shard_names(name, self.shard_count(name)):
+                self.backend.delete_collection(shard_name)
+            self.manifest.remove(name)
+
+    def list_collections(self) -> List[str]:
+        names = set()
+        for physical_name in self.backend.list_collections():
+            match = _SHARD_NAME_PATTERN.match(physical_name)
+            if match and self.shard_count(match.group("name")) == int(match.group("count")):
+                names.add(match.group("name"))
+            elif not match:
+                names.add(physical_name)
+        return sorted(names)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.backend.embed(texts)
+
+    def rebalance(self, name: str, shard_count: int, batch_size: int = 1000) -> int:
+        """
+        Copy a collection into a layout with `shard_count` shards and switch to it
+
+        Embeddings are copied, not recomputed. The old shards are deleted once
+        the manifest points at the new layout. Returns the number of chunks moved.
+
+        Raises ValueError while another process has the store open: its writes
+        during the copy would be lost, and it would keep using the old shards.
+        """
+        with self._lock:
+            if not self.store_lock.try_exclusive():
+                raise ValueError("the vector store is open in another process; stop the API and vector-server first")
+            try:
+                return self._rebalance(name, shard_count, batch_size)
+            finally:
+                self.store_lock.shared()
+
+    def _rebalance(self, name: str, shard_count: int, batch_size: int) -> int:
+        current_count = self.shard_count(name)
+        source = self.get_collection(name)
+        if source is None:
+            raise ValueError(f"Collection {name} not found")
+        if current_count == max(shard_count, 1):
+            return source.count()
+
+        target = self._open(name, shard_count)
+        copied = 0
+        while True:
+            page = source.get(
+                include=["documents", "metadatas", "embeddings"],
+                limit=batch_size,
+                offset=copied
+            )
+            if not page["ids"]:
+                break
+            target.add(
+                ids=page["ids"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+                embeddings=page["embeddings"]
+            )
+            copied += len(page["ids"])
+
+        self.manifest.set(name, shard_count)
+        for shard_name in shard_names(name, current_count):
+            self.backend.delete_collection(shard_name)
+
+        return copied
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.backend.close()
+        self.store_lock.close()
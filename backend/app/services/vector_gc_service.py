@@ -0,0 +1,154 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import SessionLocal
+from app.models.database import Document, Workflow
+from app.services.vector_service import VectorService
+
+_WORKFLOW_COLLECTION_PATTERN = re.compile(r"^workflow_(\d+)$")
+GENERAL_COLLECTION = "general"
+
+
+class VectorGarbageCollector:
+    """
+    Reconciles the vector store with the documents and workflows tables.
+
+    Collections of deleted or inactive workflows are dropped, chunks whose
+    document no longer exists (or belongs to another workflow) are deleted
+    in batches, and the remaining collections are compacted. Collections
+    that do not follow the `workflow_<id>` / `general` naming, and chunks
+    without a document id, are left alone.
+    """
+
+    def __init__(self, db: AsyncSession, vector_service: Optional[VectorService] = None):
+        self.db = db
+        self.vector_service = vector_service or VectorService()
+
+    async def _workflow_active(self, workflow_id: int) -> bool:
+        """
+        Whether the workflow exists and is active right now
+        """
+        # End the read transaction so a workflow created or re-activated meanwhile is seen
+        await self.db.rollback()
+        result = await self.db.execute(
+            select(Workflow.id).where(Workflow.id == workflow_id, Workflow.is_active == True)
+        )
+        return result.first() is not None
+
+    async def _present_documents(self, workflow_id: Optional[int], document_ids: Set[int]) -> Set[int]:
+        """
+        Which of `document_ids` currently belong to the workflow
+        """
+        # End the read transaction so documents committed during the scan are seen
+        await self.db.rollback()
+
+        present = set()
+        candidates = sorted(document_ids)
+        for start in range(0, len(candidates), 500):
+            query = select(Document.id).where(Document.id.in_(candidates[start:start + 500]))
+            if workflow_id is None:
+                query = query.where(Document.workflow_id == None)
+            else:
+                query = query.where(Document.workflow_id == workflow_id)
+            result = await self.db.execute(query)
+            present.update(result.scalars())
+        return present
+
+    async def run(self, dry_run: bool = False, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Run one collection pass and report what was (or with `dry_run`, would be) reclaimed
+        """
+        started = time.perf_counter()
+        result = await self.db.execute(select(Workflow.id).where(Workflow.is_active == True))
+        active_workflows = set(result.scalars())
+        report = {
+            "dry_run": dry_run,
+            "collections_scanned": 0,
+            "collections_dropped": [],
+            "orphaned_vectors": 0,
+            "vectors_reclaimed": 0,
+            "bytes_reclaimed": 0,
+            "bytes_estimated": False,
+            "errors": []
+        }
+
+        for collection_name in await self.vector_service.collection_names():
+            match = _WORKFLOW_COLLECTION_PATTERN.match(collection_name)
+            if not match and collection_name != GENERAL_COLLECTION:
+                continue
+            workflow_id = int(match.group(1)) if match else None
+            report["collections_scanned"] += 1
+
+            try:
+                before = await self.vector_service.collection_usage(collection_name)
+                if before is None:
+                    continue
+                report["bytes_estimated"] |= before["bytes_estimated"]
+
+                # The list above predates the collection listing, so the workflow is
+                # checked again right before its collection is dropped
+                if (
+                    workflow_id is not None
+                    and workflow_id not in active_workflows
+                    and not await self._workflow_active(workflow_id)
+                ):
+                    report["collections_dropped"].append(collection_name)
+                    report["vectors_reclaimed"] += before["vectors"]
+                    report["bytes_reclaimed"] += before["bytes"]
+                    if not dry_run:
+                        await self.vector_service.drop_collection(collection_name)
+                    continue
+
+                # Documents are checked after the scan, never against a list read
+                # before it, so a document added meanwhile is not taken for an orphan
+                chunks = await self.vector_service.chunks_by_document(collection_name)
+                present = await self._present_documents(workflow_id, set(chunks))
+                orphans = [
+                    chunk_id
+                    for document_id, chunk_ids in chunks.items() if document_id not in present
+                    for chunk_id in chunk_ids
+                ]
+                report["orphaned_vectors"] += len(orphans)
+                if not orphans:
+                    continue
+
+                if dry_run:
+                    report["vectors_reclaimed"] += len(orphans)
+                    if before["vectors"]:
+                        report["bytes_reclaimed"] += before["bytes"] * len(orphans) // before["vectors"]
+                    continue
+
+                await self.vector_service.delete_chunks(collection_name, orphans, batch_size)
+                await self.vector_service.compact_collection(collection_name)
+                after = await self.vector_service.collection_usage(collection_name)
+                report["vectors_reclaimed"] += before["vectors"] - after["vectors"]
+                report["bytes_reclaimed"] += max(before["bytes"] - after["bytes"], 0)
+
+            except Exception as e:
+                print(f"Error collecting garbage in {collection_name}: {str(e)}")
+                report["errors"].append(f"{collection_name}: {str(e)}")
+
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+
+async def run_vector_gc_periodically(interval_seconds: float, batch_size: int = 500):
+    """
+    Run the vector garbage collector every `interval_seconds` until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with SessionLocal() as db:
+                report = await VectorGarbageCollector(db).run(batch_size=batch_size)
+            print(
+                f"Vector GC: dropped {len(report['collections_dropped'])} collections, "
+                f"reclaimed {report['vectors_reclaimed']} vectors / {report['bytes_reclaimed']:,} bytes"
+            )
+        except Exception as e:
+            print(f"Vector GC failed: {str(e)}")
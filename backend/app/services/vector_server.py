@@ -0,0 +1,318 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.services.vector_backends import VectorBackend
+from app.services.vector_backends.remote_backend import _HEADER, encode_frame, frame_length
+from app.services.vector_service import get_keyword_index, index_keywords, load_keyword_index
+
+# Result keys that hold one entry per query and are split between batched requests
+_PER_QUERY_KEYS = ("ids", "documents", "metadatas", "distances", "embeddings", "uris", "data")
+
+
+class RequestBatcher:
+    """
+    Coalesces concurrent requests with the same key into one backend call.
+
+    A request for a key with no call in flight is sent on the next
+    event-loop turn, so a lone caller pays no extra latency. While a call
+    is in flight, later requests collect into a batch that closes after
+    `window` seconds or once it holds `max_items` items; the batch runs as
+    a single call on the executor and each request gets its own slice of
+    the result. A window of 0 turns batching off.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, window: float, max_items: int):
+        self.executor = executor
+        self.window = window
+        self.max_items = max_items
+        self._batches: Dict[Any, Dict[str, Any]] = {}
+        self._in_flight: Dict[Any, int] = {}
+        self.calls = 0
+        self.requests = 0
+
+    async def submit(
+        self,
+        key: Any,
+        items: List[Any],
+        run: Callable[[List[Any]], Any],
+        split: Callable[[Any, int, int], Any]
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        if self.window <= 0:
+            return split(await loop.run_in_executor(self.executor, run, items), 0, len(items))
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = {"items": [], "waiters": [], "run": run, "split": split}
+            self._batches[key] = batch
+            delay = self.window if self._in_flight.get(key) else 0
+            batch["timer"] = loop.call_later(delay, self._flush, key, batch)
+
+        future = loop.create_future()
+        start = len(batch["items"])
+        batch["items"].extend(items)
+        batch["waiters"].append((future, start, len(batch["items"])))
+        if len(batch["items"]) >= self.max_items:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: Any, batch: Dict[str, Any]):
+        if self._batches.get(key) is not batch:
+            return
+        del self._batches[key]
+        batch["timer"].cancel()
+        self.calls += 1
+        self.requests += len(batch["waiters"])
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key: Any, batch: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, batch["run"], batch["items"])
+        except Exception as e:
+            for future, _, _ in batch["waiters"]:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight[key] -= 1
+            if not self._in_flight[key]:
+                del self._in_flight[key]
+        for future, start, end in batch["waiters"]:
+            if not future.done():
+                future.set_result(batch["split"](result, start, end))
+
+
+def _options(**kwargs) -> Dict[str, Any]:
+    # Stores reject some options passed explicitly as None (e.g. Chroma's include)
+    return {key: value for key, value in kwargs.items() if value is not None}
+
+
+def _split_query_result(result: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    return {
+        key: (value[start:end] if key in _PER_QUERY_KEYS and value is not None else value)
+        for key, value in result.items()
+    }
+
+
+class VectorStoreServer:
+    """
+    Serves one vector backend to API workers over a Unix socket.
+
+    The process owns the store, its in-memory indexes, the BM25 keyword
+    indexes and the embedding model, so running several API workers does
+    not duplicate any of them. Each connection carries one request at a
+    time; concurrency comes from the workers' connection pools. Queries for
+    the same collection and options, and embedding requests, that arrive
+    within `batch_window` are answered by a single backend call.
+    """
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        path: str,
+        workers: int = 8,
+        batch_window: float = 0.002,
+        max_batch: int = 64
+    ):
+        self.backend = backend
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vector-server")
+        self.batcher = RequestBatcher(self.executor, batch_window, max_batch)
+        self._collections: Dict[str, Any] = {}
+        self._collections_lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.started_at = time.time()
+
+    async def start(self):
+        if os.path.exists(self.path):
+            # A socket file left by a previous run would make bind fail
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.path)
+        # Only the owner and its group may talk to the store
+        os.chmod(self.path, 0o660)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.executor.shutdown(wait=True)
+        self.backend.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                    message = orjson.loads(await reader.readexactly(frame_length(header)))
+                except asyncio.IncompleteReadError:
+                    break
+                response = await self._dispatch(message)
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"Vector server connection error: {str(e)}")
+        except asyncio.CancelledError:
+            # Open connections are cancelled on shutdown; finish quietly
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.pop("op", None)
+        handler = getattr(self, f"_op_{op}", None)
+        if handler is None:
+            return {"error": f"Unknown operation {op!r}", "type": "ValueError"}
+        try:
+            return {"result": await handler(**message)}
+        except Exception as e:
+            return {"error": str(e), "type": type(e).__name__}
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    def _collection(self, name: str, create: bool = False):
+        with self._collections_lock:
+            collection = self._collections.get(name)
+        if collection is None:
+            collection = self.backend.get_or_create_collection(name) if create else self.backend.get_collection(name)
+            if collection is None:
+                raise KeyError(f"Collection {name} does not exist")
+            with self._collections_lock:
+                collection = self._collections.setdefault(name, collection)
+        return collection
+
+    async def _handle(self, name: str, create: bool = False):
+        # Cached handles are returned without a trip through the executor
+        with self._collections_lock:
+            collection = self._collections.get(name)
+        if collection is not None:
+            return collection
+        return await self._run(self._collection, name, create)
+
+    def _forget(self, name: str):
+        with self._collections_lock:
+            self._collections.pop(name, None)
+        get_keyword_index(name).clear()
+
+    async def _op_ping(self) -> str:
+        return "pong"
+
+    async def _op_stats(self) -> Dict[str, Any]:
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "collections_open": len(self._collections),
+            "batched_calls": self.batcher.calls,
+            "batched_requests": self.batcher.requests,
+        }
+
+    async def _op_list_collections(self) -> List[str]:
+        return await self._run(self.backend.list_collections)
+
+    async def _op_has_collection(self, collection: str) -> bool:
+        try:
+            await self._handle(collection)
+            return True
+        except KeyError:
+            return False
+
+    async def _op_get_or_create_collection(self, collection: str) -> bool:
+        await self._handle(collection, True)
+        return True
+
+    async def _op_delete_collection(self, collection: str) -> bool:
+        await self._run(self.backend.delete_collection, collection)
+        self._forget(collection)
+        return True
+
+    async def _op_embed(self, texts: List[str]) -> List[List[float]]:
+        return await self.batcher.submit(
+            ("embed",),
+            texts,
+            self.backend.embed,
+            lambda embeddings, start, end: embeddings[start:end]
+        )
+
+    async def _op_add(self, collection: str, ids, documents=None, metadatas=None, embeddings=None) -> bool:
+        handle = await self._handle(collection, True)
+        await self._run(handle.add, ids=ids, **_options(documents=documents, metadatas=metadatas, embeddings=embeddings))
+        if documents is not None:
+            await self._run(index_keywords, collection, ids, documents)
+        return True
+
+    async def _op_query(self, collection: str, query_texts=None, query_embeddings=None, n_results=10, where=None, include=None):
+        handle = await self._handle(collection)
+        if query_embeddings is None:
+            return await self._run(
+                handle.query, query_texts=query_texts, n_results=n_results, **_options(where=where, include=include)
+            )
+
+        key: Tuple = (
+            "query",
+            collection,
+            n_results,
+            orjson.dumps(where, option=orjson.OPT_SORT_KEYS),
+            tuple(include) if include is not None else None
+        )
+        return await self.batcher.submit(
+            key,
+            query_embeddings,
+            lambda embeddings: handle.query(
+                query_embeddings=embeddings, n_results=n_results, **_options(where=where, include=include)
+            ),
+            _split_query_result
+        )
+
+    async def _op_get(self, collection: str, ids=None, where=None, limit=None, offset=None, include=None):
+        handle = await self._handle(collection)
+        return await self._run(
+            handle.get, **_options(ids=ids, where=where, limit=limit, offset=offset, include=include)
+        )
+
+    async def _op_delete(self, collection: str, ids=None, where=None) -> bool:
+        handle = await self._handle(collection)
+        await self._run(handle.delete, **_options(ids=ids, where=where))
+        index = get_keyword_index(collection)
+        if ids is not None and where is None:
+            await self._run(index.delete, ids)
+        else:
+            # Which chunks a filter matched is not known here; reload on next use
+            index.clear()
+        return True
+
+    async def _op_count(self, collection: str) -> int:
+        handle = await self._handle(collection)
+        return await self._run(handle.count)
+
+    async def _op_compact(self, collection: str) -> bool:
+        handle = await self._handle(collection)
+        if hasattr(handle, "compact"):
+            await self._run(handle.compact)
+        return True
+
+    async def _op_keyword_search(self, collection: str, queries: List[str], limit: int) -> List[List[str]]:
+        handle = await self._handle(collection)
+        index = get_keyword_index(collection)
+
+        def search():
+            if not index.is_built:
+                load_keyword_index(handle, index)
+            return [[doc_id for doc_id, _ in index.search(query, limit)] for query in queries]
+
+        return await self._run(search)
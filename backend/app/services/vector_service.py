@@ -1,56 +1,320 @@
-import chromadb
+import asyncio
+import functools
 import os
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Optional, Set
+from app.services.bm25_index import BM25Index
+from app.services.embedding_cache import EmbeddingCache
+from app.services.vector_snapshot import Snapshot, check_documents, export_snapshot, import_snapshot
+from app.services.vector_backends import VectorBackend, create_vector_backend
+from app.schemas.schemas import RetrievedChunk
+import numpy as np
 import hashlib
 import time
 
+
+class VectorExecutor:
+    """
+    Bounded thread pool for blocking vector-store calls.
+
+    Backends embed documents and queries with a CPU-bound ONNX model inside
+    `add` and `query`, so those calls must never run on the event loop.
+    Callers beyond `max_workers + max_pending` wait asynchronously for a
+    slot instead of piling work onto an unbounded executor queue.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"vector-{name}"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Run a blocking callable on this executor once a slot is free
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # A caller that is cancelled or times out stops waiting, but the
+        # worker thread keeps running, so the slot is only freed once the
+        # call itself has finished
+        future.add_done_callback(lambda _: self._release_slot(loop))
+        return await asyncio.wrap_future(future)
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # The loop already closed, nobody is left waiting for a slot
+            pass
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class CollectionCache:
+    """
+    Thread-safe cache of collection handles keyed by collection name.
+
+    Handles are only dropped when the collection is deleted through
+    `VectorService.drop_collection` or when an operation on a handle fails,
+    so steady-state retrieval never pays a metadata round trip.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Any] = {}
+
+    def get(self, name: str):
+        with self._lock:
+            return self._collections.get(name)
+
+    def put(self, name: str, collection):
+        with self._lock:
+            # Keep the first handle if two threads resolved it concurrently
+            return self._collections.setdefault(name, collection)
+
+    def invalidate(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._collections.clear()
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._collections)
+
+
+# Ingestion and query traffic get separate pools so that a bulk upload can
+# never occupy the threads interactive retrieval depends on.
+_executor_lock = threading.Lock()
+_executors: Dict[str, VectorExecutor] = {}
+
+# One backend per process; it owns the on-disk store and its index caches.
+_backend_lock = threading.Lock()
+_backend: Optional[VectorBackend] = None
+_backend_initialized = False
+_collection_cache = CollectionCache()
+
+# Keyword indexes live alongside the collections they mirror and are
+# rebuilt from the vector store on first use after a restart.
+_keyword_lock = threading.Lock()
+_keyword_indexes: Dict[str, BM25Index] = {}
+
+# Repeated and templated questions are embedded once per process.
+_embedding_cache_lock = threading.Lock()
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_initialized = False
+
+SEARCH_MODES = ("vector", "keyword", "hybrid")
+
+
+def get_vector_executor(kind: str) -> VectorExecutor:
+    """
+    Return the shared executor for `ingest` or `query` traffic
+    """
+    with _executor_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            prefix = f"VECTOR_{kind.upper()}"
+            executor = VectorExecutor(
+                name=kind,
+                max_workers=int(os.getenv(f"{prefix}_WORKERS", "4" if kind == "query" else "2")),
+                max_pending=int(os.getenv(f"{prefix}_QUEUE_SIZE", "64" if kind == "query" else "16"))
+            )
+            _executors[kind] = executor
+        return executor
+
+
+def get_keyword_index(collection_name: str) -> BM25Index:
+    """
+    Return the shared BM25 index for a collection, creating an unbuilt one if needed
+    """
+    with _keyword_lock:
+        index = _keyword_indexes.get(collection_name)
+        if index is None:
+            index = BM25Index()
+            _keyword_indexes[collection_name] = index
+        return index
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Return the shared query embedding cache, or None if it is disabled
+    """
+    global _embedding_cache, _embedding_cache_initialized
+    with _embedding_cache_lock:
+        if not _embedding_cache_initialized:
+            max_bytes = int(os.getenv("VECTOR_EMBEDDING_CACHE_BYTES", str(32 * 1024 * 1024)))
+            _embedding_cache = EmbeddingCache(max_bytes) if max_bytes > 0 else None
+            _embedding_cache_initialized = True
+        return _embedding_cache
+
+
+def load_keyword_index(collection, index: BM25Index, page_size: int = 1000):
+    """
+    Load every chunk of a collection into its keyword index
+    """
+    # Holding the index lock while paging makes concurrent adds and
+    # deletes wait, so they are applied on top of the loaded snapshot.
+    with index.lock:
+        if index.is_built:
+            return
+
+        offset = 0
+        while True:
+            page = collection.get(include=["documents"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            index.add(page['ids'], page['documents'])
+            offset += len(page['ids'])
+
+        index.is_built = True
+
+
+def index_keywords(collection_name: str, ids: List[str], documents: List[str]):
+    """
+    Add chunks to a collection's keyword index if it is loaded
+    """
+    # An unbuilt index picks these chunks up when it is loaded from the store
+    index = get_keyword_index(collection_name)
+    with index.lock:
+        if index.is_built:
+            index.add(ids, documents)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge several best-first id rankings with reciprocal rank fusion
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def cosine_similarity(query_embedding: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of one query vector against each row of `embeddings`
+    """
+    norms = np.linalg.norm(embeddings, axis=1) * max(float(np.linalg.norm(query_embedding)), 1e-12)
+    return (embeddings @ query_embedding) / np.maximum(norms, 1e-12)
+
+
+def apply_relevance_cutoff(
+    hits: List[RetrievedChunk],
+    max_distance: Optional[float] = None,
+    adaptive_k: bool = False,
+    min_score_ratio: float = 0.8
+) -> List[RetrievedChunk]:
+    """
+    Drop hits beyond `max_distance`, and with `adaptive_k` hits scoring far below the best
+    """
+    if max_distance is not None:
+        hits = [hit for hit in hits if 1.0 - hit.score <= max_distance]
+
+    if adaptive_k and hits:
+        best = max(hit.score for hit in hits)
+        if best > 0:
+            hits = [hit for hit in hits if hit.score >= best * min_score_ratio]
+
+    return hits
+
+
+def maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Pick `k` candidate positions balancing query relevance against redundancy
+
+    `lambda_mult` of 1.0 is pure relevance ordering; 0.0 is maximum diversity.
+    """
+    if len(candidate_embeddings) == 0 or k <= 0:
+        return []
+
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+def shutdown_vector_executors(wait: bool = True):
+    """
+    Stop the vector executors, finishing any queued work when `wait` is set
+    """
+    with _executor_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=wait)
+        _executors.clear()
+
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+
+
 class VectorService:
     def __init__(self):
-        self.chroma_host = os.getenv("CHROMA_HOST", "localhost")
-        self.chroma_port = os.getenv("CHROMA_PORT", "8001")
+        self.ingest_batch_size = int(os.getenv("VECTOR_INGEST_BATCH_SIZE", "64"))
+        self.rrf_k = int(os.getenv("VECTOR_RRF_K", "60"))
+        self.hybrid_candidates = int(os.getenv("VECTOR_HYBRID_CANDIDATES", "4"))
         
-        # Initialize ChromaDB client with timeout and fallback
-        self.client = None
-        self._initialize_client()
+        # The backend is created lazily on a vector executor thread so that
+        # constructing the service never blocks the event loop.
+        self.backend = _backend
+        self.ingest_executor = get_vector_executor("ingest")
+        self.query_executor = get_vector_executor("query")
 
-    def _initialize_client(self):
-        """Initialize ChromaDB client with proper error handling"""
-        try:
-            # Try persistent client first (more reliable for development)
-            chroma_data_path = "./chroma_data"
-            os.makedirs(chroma_data_path, exist_ok=True)
-            
-            self.client = chromadb.PersistentClient(path=chroma_data_path)
-            # Test the client
-            self.client.list_collections()
-            print(f"Connected to ChromaDB with persistent storage at {chroma_data_path}")
-            return
-        except Exception as e:
-            print(f"Persistent ChromaDB failed: {str(e)}")
-            
-        try:
-            # Fallback to HTTP client with timeout
-            import requests
-            # Quick test if HTTP server is available
-            response = requests.get(f"http://{self.chroma_host}:{self.chroma_port}/api/v1/heartbeat", timeout=2)
-            if response.status_code == 200:
-                self.client = chromadb.HttpClient(
-                    host=self.chroma_host,
-                    port=int(self.chroma_port)
-                )
-                self.client.heartbeat()
-                print(f"Connected to ChromaDB HTTP server at {self.chroma_host}:{self.chroma_port}")
-                return
-        except Exception as e:
-            print(f"HTTP ChromaDB not available: {str(e)}")
-            
-        # If all else fails, use in-memory client
-        try:
-            self.client = chromadb.Client()
-            print("Using in-memory ChromaDB client (data will not persist)")
-        except Exception as e:
-            print(f"Failed to initialize any ChromaDB client: {str(e)}")
-            self.client = None
+    async def _ensure_backend(self, executor: VectorExecutor) -> Optional[VectorBackend]:
+        if not _backend_initialized:
+            await executor.run(self._initialize_shared_backend)
+        self.backend = _backend
+        return self.backend
+
+    def _initialize_shared_backend(self):
+        global _backend, _backend_initialized
+        with _backend_lock:
+            if not _backend_initialized:
+                _backend = create_vector_backend()
+                _backend_initialized = True
 
     async def store_document_chunks(
         self, 
@@ -60,17 +324,29 @@ class VectorService:
         metadata: Dict[str, Any]
     ) -> int:
         """
-        Store document chunks as embeddings in ChromaDB
+        Store document chunks as embeddings in the vector store
+
+        Chunks already stored for the document are deleted first, so a
+        re-processed document is fully replaced in both the vector and the
+        keyword index (chroma's `add` would keep the old vectors).
         """
-        if not self.client:
-            print("ChromaDB client not available")
+        if not await self._ensure_backend(self.ingest_executor):
+            print("Vector store not available")
             return 0
 
         try:
             # Get or create collection
-            collection = self._get_or_create_collection(collection_name)
-            
-            # Prepare data for ChromaDB
+            collection = await self.ingest_executor.run(
+                self.get_or_create_collection, collection_name
+            )
+
+            existing = await self.ingest_executor.run(
+                collection.get, where={"document_id": document_id}, include=[]
+            )
+            if existing["ids"]:
+                await self.delete_chunks(collection_name, existing["ids"])
+
+            # Prepare data for the vector store
             documents = []
             metadatas = []
             ids = []
@@ -86,96 +362,556 @@ class VectorService:
                     })
                     ids.append(chunk_id)
             
-            if documents:
-                # Add documents to collection
-                collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
+            # Add documents in batches so a large upload is spread over many
+            # short executor tasks rather than one long embedding pass
+            for start in range(0, len(documents), self.ingest_batch_size):
+                end = start + self.ingest_batch_size
+                await self.ingest_executor.run(
+                    collection.add,
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+                await self.ingest_executor.run(
+                    index_keywords, collection_name, ids[start:end], documents[start:end]
                 )
                 
-                return len(documents)
-            
-            return 0
+            return len(documents)
 
         except Exception as e:
             print(f"Error storing document chunks: {str(e)}")
+            _collection_cache.invalidate(collection_name)
             return 0
 
     async def search_similar(
         self, 
         query: str, 
         collection_name: str, 
-        limit: int = 5
+        limit: int = 5,
+        search_mode: str = "vector",
+        use_mmr: bool = False,
+        mmr_lambda: float = 0.5,
+        fetch_k: int = 20
     ) -> str:
         """
         Search for similar documents in the vector store
         """
-        if not self.client:
+        if not await self._ensure_backend(self.query_executor):
             return "No knowledge base documents available. The system will use general knowledge to answer your question."
 
-        try:
-            # Get collection
-            collection = self._get_or_create_collection(collection_name)
+        hits = await self.search_chunks(
+            query=query,
+            collection_name=collection_name,
+            limit=limit,
+            search_mode=search_mode,
+            use_mmr=use_mmr,
+            mmr_lambda=mmr_lambda,
+            fetch_k=fetch_k
+        )
+
+        # Combine results into context
+        if hits:
+            context_parts = []
+            for hit in hits:
+                context_parts.append(hit.text)
             
-            # Search for similar documents
-            results = collection.query(
-                query_texts=[query],
-                n_results=limit
+            return "\n\n".join(context_parts)
+        
+        return "No relevant documents found in the knowledge base."
+
+    async def search_chunks(
+        self,
+        query: str,
+        collection_name: str,
+        limit: int = 5,
+        search_mode: str = "vector",
+        use_mmr: bool = False,
+        mmr_lambda: float = 0.5,
+        fetch_k: int = 20,
+        max_distance: Optional[float] = None,
+        adaptive_k: bool = False,
+        min_score_ratio: float = 0.8
+    ) -> List[RetrievedChunk]:
+        """
+        Search a collection and return scored chunks, best first
+
+        `search_mode` is "vector" for dense retrieval, "keyword" for BM25 only,
+        or "hybrid" to fuse both rankings with reciprocal rank fusion. With
+        `use_mmr`, `fetch_k` candidates are re-selected with maximal marginal
+        relevance so overlapping neighbouring chunks are not all returned.
+
+        Every hit is scored by cosine similarity to the query, whichever mode
+        found it. Hits further than `max_distance` (cosine distance) are
+        dropped, and with `adaptive_k` so are hits scoring below
+        `min_score_ratio` times the best hit.
+        """
+        results = await self.search_chunks_batch(
+            queries=[query],
+            collection_name=collection_name,
+            limit=limit,
+            search_mode=search_mode,
+            use_mmr=use_mmr,
+            mmr_lambda=mmr_lambda,
+            fetch_k=fetch_k,
+            max_distance=max_distance,
+            adaptive_k=adaptive_k,
+            min_score_ratio=min_score_ratio
+        )
+        return results[0]
+
+    async def search_chunks_batch(
+        self,
+        queries: List[str],
+        collection_name: str,
+        limit: int = 5,
+        search_mode: str = "vector",
+        use_mmr: bool = False,
+        mmr_lambda: float = 0.5,
+        fetch_k: int = 20,
+        max_distance: Optional[float] = None,
+        adaptive_k: bool = False,
+        min_score_ratio: float = 0.8
+    ) -> List[List[RetrievedChunk]]:
+        """
+        Run several queries against one collection, returning hits per query
+
+        All queries are embedded in one pass and searched with one vector
+        query and one fetch of the candidate chunks, instead of a round of
+        each per query. Options are the same as `search_chunks`.
+        """
+        if not queries:
+            return []
+
+        if not await self._ensure_backend(self.query_executor):
+            return [[] for _ in queries]
+
+        try:
+            # Get collection; searching never creates one
+            collection = await self.query_executor.run(
+                self._get_collection, collection_name
             )
-            
-            # Combine results into context
-            if results and results['documents'] and results['documents'][0]:
-                context_parts = []
-                for doc in results['documents'][0]:
-                    context_parts.append(doc)
-                
-                return "\n\n".join(context_parts)
-            
-            return "No relevant documents found in the knowledge base."
+            if collection is None:
+                return [[] for _ in queries]
+
+            query_embeddings = await self.query_executor.run(self._embed_queries, queries)
+            candidate_count = max(fetch_k, limit) if use_mmr else limit
+            candidates = await self._candidates(
+                collection, collection_name, queries, query_embeddings, candidate_count, search_mode
+            )
+
+            results = []
+            for query_embedding, (ids, documents, metadatas, embeddings) in zip(query_embeddings, candidates):
+                if not ids:
+                    results.append([])
+                    continue
+
+                hits = self._score_hits(
+                    query_embedding, documents, metadatas, embeddings, limit, use_mmr, mmr_lambda
+                )
+                results.append(apply_relevance_cutoff(hits, max_distance, adaptive_k, min_score_ratio))
+
+            return results
 
         except Exception as e:
             print(f"Error searching similar documents: {str(e)}")
-            return "Knowledge base search unavailable. Using general knowledge instead."
+            _collection_cache.invalidate(collection_name)
+            return [[] for _ in queries]
 
-    def _get_or_create_collection(self, collection_name: str):
+    def _score_hits(
+        self,
+        query_embedding: List[float],
+        documents: List[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+        limit: int,
+        use_mmr: bool,
+        mmr_lambda: float
+    ) -> List[RetrievedChunk]:
         """
-        Get existing collection or create new one
+        Score one query's candidates and pick the top `limit`, optionally by MMR
         """
-        try:
-            # Try to get existing collection
-            collection = self.client.get_collection(collection_name)
-        except:
-            # Create new collection if it doesn't exist
-            collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"description": f"Collection for {collection_name}"}
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        scores = cosine_similarity(query_embedding, embeddings)
+
+        if use_mmr:
+            selected = maximal_marginal_relevance(query_embedding, embeddings, limit, mmr_lambda)
+        else:
+            selected = list(range(min(limit, len(documents))))
+
+        hits = []
+        for position in selected:
+            metadata = metadatas[position] or {}
+            hits.append(RetrievedChunk(
+                text=documents[position],
+                score=float(scores[position]),
+                document_id=metadata.get("document_id"),
+                chunk_index=metadata.get("chunk_index"),
+                filename=metadata.get("filename")
+            ))
+
+        return hits
+
+    async def _candidates(
+        self,
+        collection,
+        collection_name: str,
+        queries: List[str],
+        query_embeddings: List[List[float]],
+        count: int,
+        search_mode: str
+    ) -> List[tuple]:
+        """
+        Return (ids, documents, metadatas, embeddings) of the best `count` chunks per query
+        """
+        include = ["documents", "metadatas", "embeddings"]
+        empty = ([], [], [], [])
+
+        if search_mode not in ("keyword", "hybrid"):
+            results = await self.query_executor.run(
+                collection.query,
+                query_embeddings=query_embeddings,
+                n_results=count,
+                include=include
             )
-        
+            if not results['ids']:
+                return [empty for _ in queries]
+            return list(zip(
+                results['ids'],
+                results['documents'],
+                results['metadatas'],
+                results['embeddings']
+            ))
+
+        rankings = await self._ranked_ids(
+            collection, collection_name, queries, count, search_mode, query_embeddings
+        )
+        wanted = list(dict.fromkeys(chunk_id for ranked_ids in rankings for chunk_id in ranked_ids))
+        if not wanted:
+            return [empty for _ in queries]
+
+        # Keyword hits carry no text or vectors, so fetch every ranked chunk by
+        # id once and hand each query its own ordering
+        fetched = await self.query_executor.run(collection.get, ids=wanted, include=include)
+        positions = {chunk_id: position for position, chunk_id in enumerate(fetched['ids'])}
+
+        candidates = []
+        for ranked_ids in rankings:
+            ranked_ids = [chunk_id for chunk_id in ranked_ids if chunk_id in positions]
+            order = [positions[chunk_id] for chunk_id in ranked_ids]
+            candidates.append((
+                ranked_ids,
+                [fetched['documents'][position] for position in order],
+                [fetched['metadatas'][position] for position in order],
+                [fetched['embeddings'][position] for position in order]
+            ))
+
+        return candidates
+
+    async def _ranked_ids(
+        self,
+        collection,
+        collection_name: str,
+        queries: List[str],
+        limit: int,
+        search_mode: str,
+        query_embeddings: List[List[float]]
+    ) -> List[List[str]]:
+        """
+        Return best-first chunk ids per query for keyword or hybrid retrieval
+        """
+        if search_mode != "hybrid":
+            return await self.query_executor.run(
+                self._keyword_search, collection, collection_name, queries, limit
+            )
+
+        candidate_count = limit * self.hybrid_candidates
+        vector_results, keyword_rankings = await asyncio.gather(
+            self.query_executor.run(
+                collection.query,
+                query_embeddings=query_embeddings,
+                n_results=candidate_count,
+                include=[]
+            ),
+            self.query_executor.run(
+                self._keyword_search, collection, collection_name, queries, candidate_count
+            )
+        )
+        vector_rankings = vector_results['ids'] or [[] for _ in queries]
+        return [
+            reciprocal_rank_fusion([vector_ids, keyword_ids], k=self.rrf_k)[:limit]
+            for vector_ids, keyword_ids in zip(vector_rankings, keyword_rankings)
+        ]
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries, taking cached vectors where possible and embedding the rest in one call
+        """
+        cache = get_embedding_cache()
+        if cache is None:
+            return self.backend.embed(queries)
+
+        embeddings = [cache.get(query) for query in queries]
+        missing = [position for position, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.backend.embed([queries[position] for position in missing])
+            for position, embedding in zip(missing, computed):
+                embeddings[position] = cache.put(queries[position], embedding)
+
+        return embeddings
+
+    def _keyword_search(self, collection, collection_name: str, queries: List[str], limit: int) -> List[List[str]]:
+        # A vector store process keeps the keyword index next to the collection
+        if hasattr(collection, "keyword_search"):
+            return collection.keyword_search(queries, limit)
+
+        index = get_keyword_index(collection_name)
+        if not index.is_built:
+            load_keyword_index(collection, index)
+
+        return [[doc_id for doc_id, _ in index.search(query, limit)] for query in queries]
+
+    def get_or_create_collection(self, collection_name: str):
+        """
+        Return the cached collection handle, creating the collection if missing
+        """
+        collection = _collection_cache.get(collection_name)
+        if collection is None:
+            collection = self.backend.get_or_create_collection(collection_name)
+            collection = _collection_cache.put(collection_name, collection)
+
         return collection
 
+    def _get_collection(self, collection_name: str):
+        """
+        Return the cached collection handle, or None if the collection does not exist
+        """
+        collection = _collection_cache.get(collection_name)
+        if collection is None:
+            collection = self.backend.get_collection(collection_name)
+            if collection is None:
+                return None
+            collection = _collection_cache.put(collection_name, collection)
+
+        return collection
+
+    async def drop_collection(self, collection_name: str) -> bool:
+        """
+        Delete a whole collection and forget its cached handle
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            return False
+
+        try:
+            await self.ingest_executor.run(self.backend.delete_collection, collection_name)
+            return True
+        except Exception as e:
+            print(f"Error dropping collection {collection_name}: {str(e)}")
+            return False
+        finally:
+            _collection_cache.invalidate(collection_name)
+            get_keyword_index(collection_name).clear()
+
+    async def warm_up_collections(self, collection_names: Iterable[str]) -> int:
+        """
+        Load handles for existing collections so the first query skips the lookup
+        """
+        if not await self._ensure_backend(self.query_executor):
+            return 0
+
+        wanted = set(collection_names)
+        try:
+            existing = await self.query_executor.run(self.backend.list_collections)
+            warmed = 0
+            for collection_name in existing:
+                if collection_name in wanted:
+                    await self.query_executor.run(self._get_collection, collection_name)
+                    warmed += 1
+        except Exception as e:
+            print(f"Error warming up collections: {str(e)}")
+            return 0
+
+        return warmed
+
+    async def export_collection(self, collection_name: str, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Write a collection to a snapshot file; returns its manifest, or None if there is no collection
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            raise RuntimeError("Vector store not available")
+
+        collection = await self.ingest_executor.run(self._get_collection, collection_name)
+        if collection is None:
+            return None
+
+        return await self.ingest_executor.run(export_snapshot, collection, path)
+
+    async def import_collection(
+        self,
+        collection_name: str,
+        path: str,
+        replace: bool = False,
+        document_ids: Optional[Set[int]] = None
+    ) -> int:
+        """
+        Load a snapshot file into a collection using its stored embeddings
+
+        With `replace` the collection is emptied first; otherwise snapshot
+        chunks are upserted over what is already there. With `document_ids`,
+        a snapshot holding chunks of any other document is rejected with
+        SnapshotError before the collection is touched.
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            raise RuntimeError("Vector store not available")
+
+        # Verify checksums before touching the existing collection
+        snapshot = await self.ingest_executor.run(Snapshot, path)
+        try:
+            if document_ids is not None:
+                await self.ingest_executor.run(check_documents, snapshot, document_ids)
+            if replace:
+                await self.drop_collection(collection_name)
+
+            collection = await self.ingest_executor.run(
+                self.get_or_create_collection, collection_name
+            )
+            return await self.ingest_executor.run(import_snapshot, snapshot, collection)
+        except Exception:
+            _collection_cache.invalidate(collection_name)
+            raise
+        finally:
+            snapshot.close()
+            # Rebuilt from the store on next use, including the imported chunks
+            get_keyword_index(collection_name).clear()
+
+    async def collection_names(self) -> List[str]:
+        if not await self._ensure_backend(self.ingest_executor):
+            return []
+
+        return await self.ingest_executor.run(self.backend.list_collections)
+
+    async def collection_usage(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Chunk count and storage bytes of a collection, or None if it does not exist
+
+        Backends that cannot report their size get an estimate from the
+        number and width of the stored vectors (`bytes_estimated`).
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            return None
+
+        collection = await self.ingest_executor.run(self._get_collection, collection_name)
+        if collection is None:
+            return None
+
+        return await self.ingest_executor.run(self._collection_usage, collection)
+
+    def _collection_usage(self, collection) -> Dict[str, Any]:
+        vectors = collection.count()
+        shards = getattr(collection, "shards", [collection])
+        if all(hasattr(shard, "storage_stats") for shard in shards):
+            return {
+                "vectors": vectors,
+                "bytes": sum(shard.storage_stats()["disk_bytes"] for shard in shards),
+                "bytes_estimated": False
+            }
+
+        sample = collection.get(limit=1, include=["embeddings"])
+        dimension = len(sample["embeddings"][0]) if sample["ids"] else 0
+        return {"vectors": vectors, "bytes": vectors * dimension * 4, "bytes_estimated": True}
+
+    async def chunks_by_document(self, collection_name: str, page_size: int = 1000) -> Dict[int, List[str]]:
+        """
+        Map each document id in a collection to the ids of its chunks
+
+        Chunks without a `document_id` in their metadata are left out.
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            return {}
+
+        collection = await self.ingest_executor.run(self._get_collection, collection_name)
+        if collection is None:
+            return {}
+
+        chunks: Dict[int, List[str]] = {}
+        offset = 0
+        while True:
+            page = await self.ingest_executor.run(
+                collection.get, include=["metadatas"], limit=page_size, offset=offset
+            )
+            if not page['ids']:
+                break
+            for chunk_id, metadata in zip(page['ids'], page['metadatas']):
+                document_id = (metadata or {}).get("document_id")
+                if document_id is not None:
+                    chunks.setdefault(document_id, []).append(chunk_id)
+            offset += len(page['ids'])
+
+        return chunks
+
+    async def delete_chunks(self, collection_name: str, ids: List[str], batch_size: int = 500) -> int:
+        """
+        Delete chunks by id in batches, keeping the keyword index in step
+        """
+        if not ids or not await self._ensure_backend(self.ingest_executor):
+            return 0
+
+        collection = await self.ingest_executor.run(self._get_collection, collection_name)
+        if collection is None:
+            return 0
+
+        index = get_keyword_index(collection_name)
+        try:
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                await self.ingest_executor.run(collection.delete, ids=batch)
+                await self.ingest_executor.run(index.delete, batch)
+        except Exception:
+            _collection_cache.invalidate(collection_name)
+            raise
+
+        return len(ids)
+
+    async def compact_collection(self, collection_name: str):
+        """
+        Reclaim space left by deleted chunks, on backends that support it
+        """
+        if not await self._ensure_backend(self.ingest_executor):
+            return
+
+        collection = await self.ingest_executor.run(self._get_collection, collection_name)
+        if collection is not None and hasattr(collection, "compact"):
+            await self.ingest_executor.run(collection.compact)
+
     async def delete_document_embeddings(self, document_id: int, collection_name: str) -> bool:
         """
         Delete all embeddings for a specific document
         """
-        if not self.client:
+        if not await self._ensure_backend(self.ingest_executor):
             return False
 
         try:
-            collection = self._get_or_create_collection(collection_name)
+            collection = await self.ingest_executor.run(
+                self._get_collection, collection_name
+            )
+            if collection is None:
+                return True
             
             # Get all chunk IDs for this document
-            results = collection.get(
+            results = await self.ingest_executor.run(
+                collection.get,
                 where={"document_id": document_id}
             )
             
             if results and results['ids']:
                 # Delete chunks
-                collection.delete(ids=results['ids'])
+                await self.ingest_executor.run(collection.delete, ids=results['ids'])
+                await self.ingest_executor.run(get_keyword_index(collection_name).delete, results['ids'])
                 return True
             
             return True
 
         except Exception as e:
             print(f"Error deleting document embeddings: {str(e)}")
-            return False
\ No newline at end of file
+            _collection_cache.invalidate(collection_name)
+            return False
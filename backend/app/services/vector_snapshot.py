@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.vector_backends.base import VectorCollection
+
+# A snapshot is an uncompressed tar holding, in this order:
+#   manifest.json   - format version, collection, shape, SHA-256 of each file
+#   embeddings.npy  - float32 [count, dimension], memory-mappable in place
+#   records.jsonl   - one {"id", "document", "metadata"} object per row
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+EMBEDDINGS_NAME = "embeddings.npy"
+RECORDS_NAME = "records.jsonl"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot is malformed, corrupt or of an unknown version
+    """
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(collection: VectorCollection, path: str, batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Write every chunk of `collection` with its embedding and metadata to `path`
+
+    Returns the snapshot manifest.
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as workdir:
+        raw_path = os.path.join(workdir, "embeddings.raw")
+        records_path = os.path.join(workdir, RECORDS_NAME)
+        count = 0
+        dimension = None
+
+        with open(raw_path, "wb") as raw, open(records_path, "w", encoding="utf-8") as records:
+            while True:
+                page = collection.get(
+                    include=["documents", "metadatas", "embeddings"],
+                    limit=batch_size,
+                    offset=count
+                )
+                if not page["ids"]:
+                    break
+
+                embeddings = np.asarray(page["embeddings"], dtype="<f4")
+                if dimension is None:
+                    dimension = embeddings.shape[1]
+                elif embeddings.shape[1] != dimension:
+                    raise SnapshotError(f"Mixed embedding dimensions in {collection.name}")
+                raw.write(embeddings.tobytes())
+
+                for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    records.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata}) + "\n")
+                count += len(page["ids"])
+
+        # The .npy header needs the final shape, so it is written once paging is done
+        embeddings_path = os.path.join(workdir, EMBEDDINGS_NAME)
+        with open(embeddings_path, "wb") as out, open(raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, {
+                "descr": "<f4",
+                "fortran_order": False,
+                "shape": (count, dimension or 0)
+            })
+            shutil.copyfileobj(raw, out, _HASH_CHUNK_SIZE)
+        os.remove(raw_path)
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection": collection.name,
+            "count": count,
+            "dimension": dimension or 0,
+            "dtype": "float32",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "files": {
+                name: {"sha256": _sha256(os.path.join(workdir, name)), "size": os.path.getsize(os.path.join(workdir, name))}
+                for name in (EMBEDDINGS_NAME, RECORDS_NAME)
+            }
+        }
+        manifest_path = os.path.join(workdir, MANIFEST_NAME)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        temporary_path = f"{path}.tmp"
+        with tarfile.open(temporary_path, "w", format=tarfile.PAX_FORMAT) as archive:
+            for name in (MANIFEST_NAME, EMBEDDINGS_NAME, RECORDS_NAME):
+                archive.add(os.path.join(workdir, name), arcname=name)
+        os.replace(temporary_path, path)
+
+    return manifest
+
+
+class Snapshot:
+    """
+    Read access to a snapshot file; embeddings are memory-mapped from the tar
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        try:
+            self._archive = tarfile.open(path, "r:")
+        except tarfile.TarError as e:
+            raise SnapshotError(f"Not a vector snapshot: {str(e)}")
+
+        try:
+            self.manifest = json.load(self._extract(MANIFEST_NAME))
+        except (KeyError, json.JSONDecodeError) as e:
+            self.close()
+            raise SnapshotError(f"Snapshot manifest is missing or unreadable: {str(e)}")
+
+        version = self.manifest.get("format_version")
+        if version != SNAPSHOT_FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"Unsupported snapshot format version: {version}")
+
+        if verify:
+            try:
+                self.verify()
+            except SnapshotError:
+                self.close()
+                raise
+
+    def _extract(self, name: str):
+        member = self._archive.getmember(name)
+        return self._archive.extractfile(member)
+
+    def verify(self):
+        """
+        Check every file against the size and SHA-256 in the manifest
+        """
+        for name, expected in self.manifest["files"].items():
+            try:
+                member = self._archive.getmember(name)
+            except KeyError:
+                raise SnapshotError(f"Snapshot is missing {name}")
+            if member.size != expected["size"]:
+                raise SnapshotError(f"Snapshot file {name} has the wrong size")
+
+            digest = hashlib.sha256()
+            stream = self._archive.extractfile(member)
+            for block in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(block)
+            if digest.hexdigest() != expected["sha256"]:
+                raise SnapshotError(f"Checksum mismatch for {name}; the snapshot is corrupt")
+
+    def embeddings(self) -> np.ndarray:
+        """
+        The embedding matrix, memory-mapped straight from the snapshot file
+        """
+        member = self._archive.getmember(EMBEDDINGS_NAME)
+        with open(self.path, "rb") as f:
+            f.seek(member.offset_data)
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            header_end = f.tell()
+
+        if fortran_order or dtype != np.dtype("<f4"):
+            raise SnapshotError("Snapshot embeddings must be little-endian float32 in C order")
+        if shape[0] == 0:
+            return np.zeros(shape, dtype="<f4")
+        return np.memmap(self.path, dtype="<f4", mode="r", offset=header_end, shape=shape)
+
+    def records(self) -> Iterator[Tuple[str, Optional[str], Dict[str, Any]]]:
+        for line in self._extract(RECORDS_NAME):
+            record = json.loads(line)
+            yield record["id"], record["document"], record["metadata"]
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def check_documents(snapshot: Snapshot, document_ids: Set[int]):
+    """
+    Raise SnapshotError if any chunk belongs to a document not in `document_ids`
+
+    Chunks of documents the target workflow does not have could never be
+    deleted with their document and would be removed as orphans by vector GC.
+    """
+    missing = set()
+    for _, _, metadata in snapshot.records():
+        document_id = metadata.get("document_id")
+        if document_id is not None and document_id not in document_ids:
+            missing.add(document_id)
+
+    if missing:
+        listed = ", ".join(str(document_id) for document_id in sorted(missing)[:10])
+        more = f" and {len(missing) - 10} more" if len(missing) > 10 else ""
+        raise SnapshotError(f"Snapshot chunks belong to documents this workflow does not have: {listed}{more}")
+
+
+def import_snapshot(snapshot: Snapshot, collection: VectorCollection, batch_size: int = 1000) -> int:
+    """
+    Upsert a snapshot's chunks into `collection` with their stored embeddings
+
+    Chunks whose ids already exist are replaced. Nothing is re-embedded.
+    Returns the number of chunks imported.
+    """
+    embeddings = snapshot.embeddings()
+    imported = 0
+    ids, documents, metadatas = [], [], []
+
+    def flush():
+        nonlocal imported
+        # Chroma's add skips ids that already exist, so replace them explicitly
+        collection.delete(ids=ids)
+        collection.add(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=np.array(embeddings[imported:imported + len(ids)], dtype=np.float32)
+        )
+        imported += len(ids)
+        ids.clear()
+        documents.clear()
+        metadatas.clear()
+
+    for chunk_id, document, metadata in snapshot.records():
+        ids.append(chunk_id)
+        documents.append(document)
+        metadatas.append(metadata)
+        if len(ids) >= batch_size:
+            flush()
+    if ids:
+        flush()
+
+    if imported != snapshot.manifest["count"]:
+        raise SnapshotError(f"Snapshot lists {snapshot.manifest['count']} chunks but holds {imported}")
+
+    return imported
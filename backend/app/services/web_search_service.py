@@ -1,28 +1,31 @@
-import requests
+import asyncio
 import os
 from typing import Optional, Dict, Any
 
+# Seconds a search may take when the caller has no deadline of its own
+DEFAULT_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", "10"))
+
 class WebSearchService:
     def __init__(self):
         self.serpapi_key = os.getenv("SERPAPI_KEY")
         self.brave_api_key = os.getenv("BRAVE_API_KEY")
 
-    async def search(self, query: str, engine: str = "serpapi", limit: int = 3) -> str:
+    async def search(self, query: str, engine: str = "serpapi", limit: int = 3, timeout: float = DEFAULT_TIMEOUT) -> str:
         """
-        Search the web using specified search engine
+        Search the web using specified search engine, giving up after `timeout` seconds
         """
         try:
             if engine == "serpapi" and self.serpapi_key:
-                return await self._search_serpapi(query, limit)
+                return await self._search_serpapi(query, limit, timeout)
             elif engine == "brave" and self.brave_api_key:
-                return await self._search_brave(query, limit)
+                return await self._search_brave(query, limit, timeout)
             else:
                 return "Web search not available (API keys not configured)"
 
         except Exception as e:
             return f"Web search error: {str(e)}"
 
-    async def _search_serpapi(self, query: str, limit: int) -> str:
+    async def _search_serpapi(self, query: str, limit: int, timeout: float = DEFAULT_TIMEOUT) -> str:
         """
         Search using SerpAPI
         """
@@ -38,7 +41,10 @@ class WebSearchService:
                 "num": limit
             }
 
-            response = requests.get(url, params=params)
+            import requests
+
+            # Blocking HTTP runs in a thread so it does not stall the event loop
+            response = await asyncio.to_thread(requests.get, url, params=params, timeout=timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -58,7 +64,7 @@ class WebSearchService:
         except Exception as e:
             return f"SerpAPI error: {str(e)}"
 
-    async def _search_brave(self, query: str, limit: int) -> str:
+    async def _search_brave(self, query: str, limit: int, timeout: float = DEFAULT_TIMEOUT) -> str:
         """
         Search using Brave Search API
         """
@@ -77,7 +83,9 @@ class WebSearchService:
                 "count": limit
             }
 
-            response = requests.get(url, headers=headers, params=params)
+            import requests
+
+            response = await asyncio.to_thread(requests.get, url, headers=headers, params=params, timeout=timeout)
             response.raise_for_status()
             
             data = response.json()
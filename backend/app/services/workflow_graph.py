@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.schemas import GraphOperation, WorkflowEdgeBase, WorkflowNodeBase
+
+_COLLECTIONS = ("nodes", "edges")
+
+
+class GraphPatchError(ValueError):
+    """
+    Raised when a graph patch cannot be applied or leaves the graph inconsistent
+    """
+
+
+def _parse_path(path: str) -> Tuple[str, str, List[str]]:
+    """
+    Split `/nodes/<id>/<key>/...` into collection, element id and the pointer below it
+
+    Segments use JSON Pointer escaping (`~1` for `/`, `~0` for `~`).
+    """
+    if not path.startswith("/"):
+        raise GraphPatchError(f"Path must start with '/': {path}")
+    segments = [segment.replace("~1", "/").replace("~0", "~") for segment in path[1:].split("/")]
+    if len(segments) < 2 or segments[0] not in _COLLECTIONS or not segments[1]:
+        raise GraphPatchError(f"Path must address a node or edge, e.g. /nodes/<id>: {path}")
+    return segments[0], segments[1], segments[2:]
+
+
+def _apply_pointer(target: Any, pointer: List[str], op: str, value: Any):
+    """
+    Apply add / replace / remove at a pointer inside one node or edge
+    """
+    for segment in pointer[:-1]:
+        if isinstance(target, dict) and segment in target:
+            target = target[segment]
+        elif isinstance(target, list) and segment.isdigit() and int(segment) < len(target):
+            target = target[int(segment)]
+        else:
+            raise GraphPatchError(f"Path segment not found: {segment}")
+
+    key = pointer[-1]
+    if isinstance(target, dict):
+        if op != "add" and key not in target:
+            raise GraphPatchError(f"Path segment not found: {key}")
+        if op == "remove":
+            del target[key]
+        else:
+            target[key] = value
+    elif isinstance(target, list):
+        if op == "add" and key == "-":
+            target.append(value)
+            return
+        if not key.isdigit() or int(key) > len(target) or (op != "add" and int(key) == len(target)):
+            raise GraphPatchError(f"List index out of range: {key}")
+        if op == "add":
+            target.insert(int(key), value)
+        elif op == "remove":
+            del target[int(key)]
+        else:
+            target[int(key)] = value
+    else:
+        raise GraphPatchError(f"Cannot address {key} inside a scalar value")
+
+
+def _component_type(node: Any) -> Any:
+    if not isinstance(node, dict) or not isinstance(node.get("data"), dict):
+        return None
+    return node["data"].get("componentType")
+
+
+class GraphPatch:
+    """
+    Applies node/edge-level operations to a workflow graph and checks only what changed.
+
+    Elements are addressed by id rather than list position, so operations stay
+    valid while other clients insert or remove elements. Only added or edited
+    elements are validated, plus the edges of removed nodes.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+        self.nodes = nodes
+        self.edges = edges
+        self._elements = {"nodes": nodes, "edges": edges}
+        self._positions = {
+            name: {element["id"]: position for position, element in enumerate(elements)}
+            for name, elements in self._elements.items()
+        }
+        self.touched: Dict[str, Set[str]] = {"nodes": set(), "edges": set()}
+        self.removed: Dict[str, Set[str]] = {"nodes": set(), "edges": set()}
+        # Whether the checks of validate_workflow_structure need to run again
+        self.structure_changed = False
+        # Existing nodes whose componentType changed
+        self.retyped: Set[str] = set()
+
+    def apply(self, operations: List[GraphOperation]):
+        for operation in operations:
+            self._apply(operation)
+        self._validate()
+        # Removed elements leave holes so positions stay valid until the end
+        if self.removed["nodes"]:
+            self.nodes = [node for node in self.nodes if node is not None]
+        if self.removed["edges"]:
+            self.edges = [edge for edge in self.edges if edge is not None]
+
+    def _apply(self, operation: GraphOperation):
+        collection, element_id, pointer = _parse_path(operation.path)
+        kind = collection[:-1].capitalize()
+        elements = self._elements[collection]
+        positions = self._positions[collection]
+        position = positions.get(element_id)
+
+        if operation.op == "add" and not pointer:
+            if position is not None:
+                raise GraphPatchError(f"{kind} {element_id} already exists")
+            positions[element_id] = len(elements)
+            elements.append(operation.value)
+            self.removed[collection].discard(element_id)
+        elif position is None:
+            raise GraphPatchError(f"{kind} {element_id} not found")
+        elif operation.op == "remove" and not pointer:
+            elements[position] = None
+            del positions[element_id]
+            self.touched[collection].discard(element_id)
+            self.removed[collection].add(element_id)
+            self.structure_changed = True
+            return
+        else:
+            previous_type = _component_type(elements[position]) if collection == "nodes" else None
+            if not pointer:
+                elements[position] = operation.value
+            else:
+                _apply_pointer(elements[position], pointer, operation.op, operation.value)
+            if collection == "nodes" and _component_type(elements[position]) != previous_type:
+                self.retyped.add(element_id)
+
+        self.touched[collection].add(element_id)
+        if not pointer or (collection == "nodes" and pointer[0] == "data" and pointer[1:2] in ([], ["componentType"])):
+            self.structure_changed = True
+
+    def still_valid(self) -> bool:
+        """
+        Whether a graph that passed validate_workflow_structure still passes after the patch
+
+        Touched elements and their edge endpoints are checked by `apply`, so
+        node types are only scanned again when a node was removed or retyped.
+        """
+        if len(self.nodes) > 1 and not self.edges:
+            return False
+        if self.removed["nodes"] or self.retyped:
+            node_types = {_component_type(node) for node in self.nodes}
+            return "user-query" in node_types and "output" in node_types
+        return True
+
+    def _validate(self):
+        for collection, model in (("nodes", WorkflowNodeBase), ("edges", WorkflowEdgeBase)):
+            kind = collection[:-1].capitalize()
+            for element_id in self.touched[collection]:
+                element = self._elements[collection][self._positions[collection][element_id]]
+                if not isinstance(element, dict):
+                    raise GraphPatchError(f"{kind} {element_id} must be an object")
+                try:
+                    model.model_validate(element)
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    location = ".".join(str(part) for part in error["loc"])
+                    raise GraphPatchError(f"{kind} {element_id} is invalid: {location}: {error['msg']}")
+                if element["id"] != element_id:
+                    raise GraphPatchError(f"{kind} {element_id} cannot change its id to {element['id']}")
+
+        node_positions = self._positions["nodes"]
+        for edge_id in self.touched["edges"]:
+            edge = self.edges[self._positions["edges"][edge_id]]
+            for endpoint in (edge["source"], edge["target"]):
+                if endpoint not in node_positions:
+                    raise GraphPatchError(f"Edge {edge_id} points at missing node {endpoint}")
+
+        if self.removed["nodes"]:
+            for edge in self.edges:
+                if edge is not None and (edge["source"] in self.removed["nodes"] or edge["target"] in self.removed["nodes"]):
+                    raise GraphPatchError(f"Edge {edge['id']} still points at a removed node; remove the edge too")
@@ -1,37 +1,73 @@
-from sqlalchemy.orm import Session
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import Workflow, Document
-from app.services.llm_service import LLMService
+from app.services.conversation_memory import ConversationMemory
+from app.services.deadline import Deadline
+from app.services.llm_service import DEFAULT_TIMEOUT, LLMService
 from app.services.vector_service import VectorService
 from app.services.web_search_service import WebSearchService
-import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from app.schemas.schemas import RetrievedChunk
 
 class WorkflowService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.llm_service = LLMService()
         self.vector_service = VectorService()
         self.web_search_service = WebSearchService()
 
-    async def execute_workflow(self, workflow_id: int, user_message: str) -> Dict[str, Any]:
+    async def execute_workflow(
+        self,
+        workflow_id: int,
+        user_message: str,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Execute a workflow with the given user message
+
+        With a `session_id` the LLM also sees the session's summary and recent
+        turns, and the exchange is recorded in the session.
+
+        Every stage gets the time left on `deadline`, further limited by the
+        user-query node's `timeoutMs`. Retrieval and web search are skipped
+        when too little is left, and the result lists the skipped stages.
         """
         # Get workflow
-        workflow = self.db.query(Workflow).filter(Workflow.id == workflow_id).first()
+        workflow = await self.db.get(Workflow, workflow_id)
         if not workflow:
             raise ValueError("Workflow not found")
 
+        workflow_timeout = self._workflow_timeout(workflow.nodes or [])
+        if workflow_timeout:
+            if deadline is None:
+                deadline = Deadline(workflow_timeout)
+            else:
+                deadline.limit(workflow_timeout)
+
+        memory = session = None
+        history = []
+        if session_id:
+            memory = ConversationMemory(self.db, self.llm_service)
+            session = await memory.get_session(session_id, workflow_id)
+            if session is None:
+                raise ValueError("Chat session not found")
+            history = await memory.load(session)
+
         # Parse workflow structure
-        nodes = json.loads(workflow.nodes) if workflow.nodes else []
-        edges = json.loads(workflow.edges) if workflow.edges else []
+        nodes = workflow.nodes or []
+        edges = workflow.edges or []
 
         # Create execution context
         context = {
             "query": user_message,
             "context": "",
             "response": "",
-            "metadata": {}
+            "metadata": {},
+            "history": ConversationMemory.as_turns(history),
+            "summary": session.summary if session else None,
+            "model": None
         }
 
         # Execute workflow nodes in order
@@ -40,14 +76,40 @@ class WorkflowService:
         for node_id in execution_order:
             node = next((n for n in nodes if n["id"] == node_id), None)
             if node:
-                context = await self._execute_node(node, context, workflow_id)
+                context = await self._execute_node(node, context, workflow_id, deadline)
+
+        if session is not None:
+            await memory.record_turn(
+                session,
+                history,
+                user_message,
+                context.get("response", ""),
+                context.get("metadata", {}),
+                context["model"] or "gpt-4"
+            )
 
         return {
             "response": context.get("response", "No response generated"),
             "metadata": context.get("metadata", {}),
             "context_used": context.get("context", ""),
+            "session_id": session_id,
+            "deadline": deadline.summary() if deadline else None,
+            "skipped_stages": list(deadline.skipped) if deadline else [],
         }
 
+    @staticmethod
+    def _workflow_timeout(nodes: list) -> Optional[float]:
+        """
+        The workflow's own time budget in seconds, from its user-query node
+        """
+        for node in nodes:
+            if node["data"]["componentType"] == "user-query":
+                # Number fields arrive from the config panel as strings
+                timeout_ms = node["data"].get("config", {}).get("timeoutMs")
+                if timeout_ms not in (None, "") and float(timeout_ms) > 0:
+                    return float(timeout_ms) / 1000
+        return None
+
     def _determine_execution_order(self, nodes: list, edges: list) -> list:
         """
         Determine the execution order of nodes based on connections
@@ -96,7 +158,13 @@ class WorkflowService:
         
         return order
 
-    async def _execute_node(self, node: dict, context: Dict[str, Any], workflow_id: int) -> Dict[str, Any]:
+    async def _execute_node(
+        self,
+        node: dict,
+        context: Dict[str, Any],
+        workflow_id: int,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Execute a single node in the workflow
         """
@@ -108,20 +176,35 @@ class WorkflowService:
             return context
 
         elif node_type == "knowledge-base":
-            # Retrieve relevant context from documents
-            context["context"] = await self._execute_knowledge_base(
-                context["query"], 
-                workflow_id, 
-                node_config
-            )
+            # Retrieve relevant context from documents; only chunks that pass
+            # the relevance cutoff reach the LLM stage. Without time for it the
+            # LLM answers from general knowledge.
+            hits = []
+            timeout = deadline.optional_timeout("knowledge_base") if deadline else None
+            if deadline is None or timeout is not None:
+                try:
+                    hits = await self._execute_knowledge_base(
+                        context["query"],
+                        workflow_id,
+                        node_config,
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    deadline.skip("knowledge_base", "timed out")
+            context["context"] = "\n\n".join(hit.text for hit in hits)
+            context["metadata"]["sources"] = [hit.dict(exclude={"text"}) for hit in hits]
             return context
 
         elif node_type == "llm-engine":
             # Process with LLM
+            context["model"] = node_config.get("model", "gpt-4")
             context["response"] = await self._execute_llm_engine(
                 context["query"],
                 context.get("context", ""),
-                node_config
+                node_config,
+                context.get("history"),
+                context.get("summary"),
+                deadline
             )
             return context
 
@@ -131,39 +214,108 @@ class WorkflowService:
 
         return context
 
-    async def _execute_knowledge_base(self, query: str, workflow_id: int, config: dict) -> str:
+    async def _execute_knowledge_base(
+        self,
+        query: str,
+        workflow_id: int,
+        config: dict,
+        timeout: Optional[float] = None
+    ) -> List[RetrievedChunk]:
         """
         Execute knowledge base component
         """
+        results = await self.search_knowledge_base([query], workflow_id, config, timeout)
+        return results[0]
+
+    async def search_knowledge_base(
+        self,
+        queries: List[str],
+        workflow_id: int,
+        config: dict,
+        timeout: Optional[float] = None
+    ) -> List[List[RetrievedChunk]]:
+        """
+        Retrieve context for several queries in one batched vector search
+
+        With a `timeout`, a vector search that takes longer raises asyncio.TimeoutError.
+        """
         try:
             # Get documents for this workflow
-            documents = self.db.query(Document).filter(
-                Document.workflow_id == workflow_id,
-                Document.processed == True
-            ).all()
+            result = await self.db.execute(
+                select(Document.id).where(
+                    Document.workflow_id == workflow_id,
+                    Document.processed == True
+                ).limit(1)
+            )
+            has_documents = result.first()
 
-            if not documents:
-                return "No documents found in knowledge base."
+            if not has_documents:
+                return [[] for _ in queries]
+
+            # Number fields arrive from the config panel as strings; an empty
+            # maxDistance means no cutoff
+            max_distance = config.get("maxDistance")
 
             # Search for relevant context
-            relevant_context = await self.vector_service.search_similar(
-                query=query,
+            search = self.vector_service.search_chunks_batch(
+                queries=queries,
                 collection_name=f"workflow_{workflow_id}",
-                limit=config.get("max_results", 3)
+                limit=int(config.get("max_results", 3)),
+                search_mode=config.get("searchMode", "vector"),
+                use_mmr=config.get("mmr", False),
+                mmr_lambda=float(config.get("mmrLambda", 0.5)),
+                fetch_k=int(config.get("fetchK", 20)),
+                max_distance=float(max_distance) if max_distance not in (None, "") else None,
+                adaptive_k=config.get("adaptiveK", False),
+                min_score_ratio=float(config.get("minScoreRatio", 0.8))
             )
+            return await asyncio.wait_for(search, timeout)
 
-            return relevant_context
-
+        except asyncio.TimeoutError:
+            raise
         except Exception as e:
-            return f"Error retrieving context: {str(e)}"
+            print(f"Error retrieving context: {str(e)}")
+            return [[] for _ in queries]
 
-    async def _execute_llm_engine(self, query: str, context: str, config: dict) -> str:
+    async def search_workflow(self, workflow_id: int, queries: List[str], node_id: str = None) -> List[List[RetrievedChunk]]:
+        """
+        Run a batch of queries through a workflow's knowledge base node
+        """
+        workflow = await self.db.get(Workflow, workflow_id)
+        if not workflow:
+            raise ValueError("Workflow not found")
+
+        nodes = workflow.nodes or []
+        node = next(
+            (
+                n for n in nodes
+                if n["data"]["componentType"] == "knowledge-base" and node_id in (None, n["id"])
+            ),
+            None
+        )
+        if node is None:
+            raise ValueError("Knowledge base node not found")
+
+        return await self.search_knowledge_base(queries, workflow_id, node["data"].get("config", {}))
+
+    async def _execute_llm_engine(
+        self,
+        query: str,
+        context: str,
+        config: dict,
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Execute LLM engine component
         """
         try:
             # Prepare system prompt
             system_prompt = config.get("systemPrompt", "You are a helpful AI assistant.")
+
+            if summary:
+                system_prompt += f"\n\nSummary of the earlier conversation:\n{summary}"
             
             # Add context to prompt if available
             if context:
@@ -171,10 +323,14 @@ class WorkflowService:
 
             # Check if web search is enabled
             if config.get("webSearch", False):
-                web_results = await self.web_search_service.search(query)
+                web_results = await self._execute_web_search(query, deadline)
                 if web_results:
                     system_prompt += f"\n\nWeb search results:\n{web_results}"
 
+            if deadline is not None and deadline.expired():
+                deadline.skip("llm", "deadline exceeded")
+                return "The request ran out of time before a response could be generated."
+
             # Generate response using configured LLM
             model = config.get("model", "gpt-4")
             temperature = config.get("temperature", 0.7)
@@ -185,10 +341,28 @@ class WorkflowService:
                 system_prompt=system_prompt,
                 model=model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                history=history,
+                timeout=deadline.remaining() if deadline else DEFAULT_TIMEOUT
             )
 
             return response
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
\ No newline at end of file
+            return f"Error generating response: {str(e)}"
+
+    async def _execute_web_search(self, query: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """
+        Web search results for the prompt; None when skipped for lack of time
+        """
+        if deadline is None:
+            return await self.web_search_service.search(query)
+
+        timeout = deadline.optional_timeout("web_search")
+        if timeout is None:
+            return None
+        try:
+            return await asyncio.wait_for(self.web_search_service.search(query, timeout=timeout), timeout)
+        except asyncio.TimeoutError:
+            deadline.skip("web_search", "timed out")
+            return None
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-process BM25 keyword index at knowledge-base scale.
+
+Builds an index over synthetic ~1000 character chunks (with embedded error
+codes and SKU-like identifiers), then reports build time, incremental
+add/delete cost and query latency percentiles.
+
+Usage (from the backend directory):
+    python -m benchmarks.bm25_benchmark --chunks 100000
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from app.services.bm25_index import BM25Index
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+
+
+def make_chunk(vocabulary: list, rng: random.Random, chunk_number: int) -> str:
+    # Zipf-like word distribution so common terms have long posting lists
+    words = [vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)] for _ in range(160)]
+    words.insert(rng.randrange(len(words)), f"E{chunk_number:06d}")
+    words.insert(rng.randrange(len(words)), f"SKU-{chunk_number % 5000:04d}-{chunk_number % 7}")
+    return " ".join(words)
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(30_000, rng)
+
+    print(f"Generating {args.chunks:,} chunks...")
+    ids = [f"doc_{n // 50}_chunk_{n % 50}" for n in range(args.chunks)]
+    texts = [make_chunk(vocabulary, rng, n) for n in range(args.chunks)]
+
+    index = BM25Index()
+    start = time.perf_counter()
+    for batch in range(0, args.chunks, 64):
+        index.add(ids[batch:batch + 64], texts[batch:batch + 64])
+    build_seconds = time.perf_counter() - start
+    print(f"Build: {build_seconds:.2f}s ({args.chunks / build_seconds:,.0f} chunks/s)")
+
+    queries = []
+    for _ in range(args.queries):
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(f"what does error E{rng.randrange(args.chunks):06d} mean")
+        elif kind < 0.5:
+            queries.append(f"price of SKU-{rng.randrange(5000):04d}")
+        else:
+            queries.append(" ".join(rng.choice(vocabulary[:2000]) for _ in range(rng.randint(3, 8))))
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, args.top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f"Query ({args.queries} queries, top-{args.top_k}): "
+        f"mean {statistics.mean(latencies):.2f}ms, "
+        f"p50 {percentile(latencies, 0.50):.2f}ms, "
+        f"p95 {percentile(latencies, 0.95):.2f}ms, "
+        f"p99 {percentile(latencies, 0.99):.2f}ms"
+    )
+
+    # Incremental maintenance: replace one document's 50 chunks, then delete them
+    doc_ids = [f"doc_0_chunk_{n}" for n in range(50)]
+    start = time.perf_counter()
+    index.add(doc_ids, texts[:50])
+    add_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.delete(doc_ids)
+    delete_ms = (time.perf_counter() - start) * 1000
+    print(f"Re-index one document (50 chunks): {add_ms:.2f}ms, delete: {delete_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Measure concurrent chat throughput and latency against the API.
+
+Creates and validates a user-query -> llm-engine -> output workflow and a
+chat session, then sends chat messages from many concurrent clients. Each
+request posts to /api/workflows/{id}/chat with the session id, so the
+server loads the session history and records the exchange: every request
+reads and writes the database. Without an
+LLM API key the LLM node answers immediately, which leaves database and
+event-loop time as the cost being measured.
+
+Runs in-process through the ASGI app by default (from a scratch directory,
+since the app uses ./genaistack.db and ./uploads), or against a running
+server with --url. With --messages the clients post straight to
+/api/chat/sessions/{id}/messages instead, which measures chat message
+writes alone (compare CHAT_WRITE_BEHIND=true and false).
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_load_test --requests 2000 --concurrency 50
+    python -m benchmarks.chat_load_test --messages --requests 5000
+    python -m benchmarks.chat_load_test --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.quantization_benchmark import percentile
+
+WORKFLOW = {
+    "name": "chat load test",
+    "nodes": [
+        {"id": "query", "type": "custom", "position": {"x": 0, "y": 0},
+         "data": {"componentType": "user-query", "config": {}}},
+        {"id": "llm", "type": "custom", "position": {"x": 300, "y": 0},
+         "data": {"componentType": "llm-engine", "config": {"model": "gpt-4o-mini"}}},
+        {"id": "output", "type": "custom", "position": {"x": 600, "y": 0},
+         "data": {"componentType": "output", "config": {}}}
+    ],
+    "edges": [
+        {"id": "query-llm", "source": "query", "target": "llm"},
+        {"id": "llm-output", "source": "llm", "target": "output"}
+    ]
+}
+
+
+async def setup(client: httpx.AsyncClient):
+    response = await client.post("/api/workflows/", json=WORKFLOW)
+    workflow_id = response.json()["data"]["workflow_id"]
+    await client.post(f"/api/workflows/{workflow_id}/validate")
+    response = await client.post("/api/chat/sessions", params={"workflow_id": workflow_id})
+    return workflow_id, response.json()["data"]["session_id"]
+
+
+async def chat_once(client: httpx.AsyncClient, workflow_id: int, session_id: str, message: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        f"/api/workflows/{workflow_id}/chat",
+        json={"message": message, "session_id": session_id}
+    )
+    if response.status_code in (429, 503):
+        # Turned away by admission control
+        return None
+    result = response.json()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return (time.perf_counter() - start) * 1000
+
+
+async def post_message_once(client: httpx.AsyncClient, workflow_id: int, session_id: str, message: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        f"/api/chat/sessions/{session_id}/messages",
+        json={"type": "user", "content": message, "metadata": {}}
+    )
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(client: httpx.AsyncClient, requests: int, concurrency: int, messages_only: bool = False):
+    workflow_id, session_id = await setup(client)
+    send = post_message_once if messages_only else chat_once
+    label = "messages" if messages_only else "chats"
+    # One untimed request so lazy initialisation does not count
+    await send(client, workflow_id, session_id, "warm up")
+
+    latencies = []
+    rejected = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal rejected
+        for number in counter:
+            latency = await send(client, workflow_id, session_id, f"question {number}")
+            if latency is None:
+                rejected += 1
+            else:
+                latencies.append(latency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{requests} {label}, {concurrency} concurrent clients, {elapsed:.2f} s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} {label}/s, {rejected} rejected")
+    print(
+        f"latency ms: p50 {percentile(latencies, 0.50):.1f}  "
+        f"p95 {percentile(latencies, 0.95):.1f}  "
+        f"max {max(latencies):.1f}"
+    )
+
+    response = await client.get("/api/health/database")
+    if response.status_code == 200 and "checkouts" in response.json()["data"]:
+        pool = response.json()["data"]
+        print(
+            f"pool checkout wait ms: p50 {pool['wait_ms_p50']}  p95 {pool['wait_ms_p95']}  "
+            f"max {pool['wait_ms_max']}  timeouts {pool['timeouts']}"
+        )
+
+    response = await client.get("/api/health/admission")
+    if response.status_code == 200 and response.json()["data"]["enabled"]:
+        admission = response.json()["data"]
+        print(
+            f"admission queue wait ms: p50 {admission['wait_ms_p50']}  p95 {admission['wait_ms_p95']}  "
+            f"max depth {admission['queue_depth_max']}  rejected {admission['rejected']}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Base URL of a running server; defaults to the in-process app")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--messages", action="store_true", help="Post chat messages instead of running chats")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            await run(client, args.requests, args.concurrency, args.messages)
+        return
+
+    import main as server
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", limits=limits, timeout=60) as client:
+            await run(client, args.requests, args.concurrency, args.messages)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
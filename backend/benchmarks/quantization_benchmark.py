@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Compare embedded vector storage modes: float32 baseline vs float16 and int8.
+
+Stores the same synthetic clustered embeddings (MiniLM-sized, 384 dims) in
+each mode and reports scanned/on-disk bytes per 100k chunks, recall@k
+against exact float32 search, and query latency percentiles. int8 is run
+with re-scoring (`--rescore-factor`) and with a factor of 1, which keeps
+the coarse ranking of the codes.
+
+Usage (from the backend directory):
+    python -m benchmarks.quantization_benchmark --chunks 100000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_backends.embedded_backend import EmbeddedBackend
+
+
+def make_embeddings(count: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    # Real chunk embeddings are clustered by topic, not uniform on the sphere
+    centers = rng.standard_normal((max(count // 500, 8), dimension)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), count)
+    vectors = centers[assignments] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_mode(
+    storage_dtype: str,
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    root: str,
+    rescore_factor: int
+):
+    os.environ["VECTOR_STORAGE_DTYPE"] = storage_dtype
+    os.environ["VECTOR_RESCORE_FACTOR"] = str(rescore_factor)
+    # Keep the float32 baseline exact so recall is measured against ground truth
+    os.environ["VECTOR_HNSW_THRESHOLD"] = str(len(embeddings) + 1)
+    backend = EmbeddedBackend(path=os.path.join(root, f"{storage_dtype}-{rescore_factor}"))
+    collection = backend.get_or_create_collection("benchmark")
+
+    for start in range(0, len(embeddings), 5000):
+        end = min(start + 5000, len(embeddings))
+        collection.add(
+            ids=[f"chunk_{n}" for n in range(start, end)],
+            documents=[""] * (end - start),
+            metadatas=[{"chunk_index": n} for n in range(start, end)],
+            embeddings=embeddings[start:end]
+        )
+
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=top_k, include=["distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(result["ids"][0])
+
+    stats = collection.storage_stats()
+    backend.close()
+    return results, latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = make_embeddings(args.chunks, args.dimension, rng)
+    queries = make_embeddings(args.queries, args.dimension, rng)
+    scale = 100_000 / args.chunks
+
+    with tempfile.TemporaryDirectory() as root:
+        baseline = None
+        print(f"{args.chunks:,} chunks x {args.dimension} dims, {args.queries} queries, top-{args.top_k}")
+        print(f"{'mode':<12} {'scan MB/100k':>13} {'disk MB/100k':>13} {'recall@k':>9} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7}")
+
+        modes = [
+            ("float32", "float32", 1),
+            ("float16", "float16", 1),
+            (f"int8 {args.rescore_factor}x", "int8", args.rescore_factor),
+            ("int8 coarse", "int8", 1),
+        ]
+        for label, storage_dtype, rescore_factor in modes:
+            results, latencies, stats = run_mode(
+                storage_dtype, embeddings, queries, args.top_k, root, rescore_factor
+            )
+            if baseline is None:
+                baseline = results
+
+            recall = statistics.mean(
+                len(set(found) & set(expected)) / len(expected)
+                for found, expected in zip(results, baseline)
+            )
+            print(
+                f"{label:<12} "
+                f"{stats['search_bytes'] * scale / 2**20:>13.1f} "
+                f"{stats['disk_bytes'] * scale / 2**20:>13.1f} "
+                f"{recall:>9.4f} "
+                f"{statistics.mean(latencies):>8.2f} "
+                f"{percentile(latencies, 0.50):>7.2f} "
+                f"{percentile(latencies, 0.95):>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
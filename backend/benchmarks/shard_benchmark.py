@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compare query latency of one embedded collection against the same chunks sharded.
+
+Loads synthetic clustered embeddings into an unsharded collection, measures
+query latency, rebalances it into each requested shard count and measures
+again, reporting rebalance time and latency percentiles per layout.
+
+Usage (from the backend directory):
+    python -m benchmarks.shard_benchmark --chunks 200000 --shards 2 4 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_backends.embedded_backend import EmbeddedBackend
+from app.services.vector_backends.sharded import ShardedBackend
+from benchmarks.quantization_benchmark import make_embeddings, percentile
+
+
+def measure(collection, queries: np.ndarray, top_k: int) -> list:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[query], n_results=top_k, include=["distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = make_embeddings(args.chunks, args.dimension, rng)
+    queries = make_embeddings(args.queries, args.dimension, rng)
+
+    with tempfile.TemporaryDirectory() as root:
+        backend = ShardedBackend(
+            EmbeddedBackend(path=root),
+            manifest_path=os.path.join(root, "shards.json"),
+            max_workers=args.workers
+        )
+        collection = backend.get_or_create_collection("benchmark")
+        for start in range(0, args.chunks, 5000):
+            end = min(start + 5000, args.chunks)
+            collection.add(
+                ids=[f"chunk_{n}" for n in range(start, end)],
+                documents=[""] * (end - start),
+                # Documents of ~20 chunks each, as produced by the upload path
+                metadatas=[{"document_id": n // 20, "chunk_index": n % 20} for n in range(start, end)],
+                embeddings=embeddings[start:end]
+            )
+
+        print(f"{args.chunks:,} chunks x {args.dimension} dims, {args.queries} queries, top-{args.top_k}")
+        print(f"{'shards':>6} {'rebalance s':>12} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7}")
+
+        for shard_count in [1] + args.shards:
+            start = time.perf_counter()
+            backend.rebalance("benchmark", shard_count, batch_size=5000)
+            elapsed = time.perf_counter() - start if shard_count > 1 else 0.0
+            latencies = measure(backend.get_collection("benchmark"), queries, args.top_k)
+            print(
+                f"{shard_count:>6} {elapsed:>12.1f} "
+                f"{np.mean(latencies):>8.2f} "
+                f"{percentile(latencies, 0.50):>7.2f} "
+                f"{percentile(latencies, 0.95):>7.2f}"
+            )
+
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure how long the API takes to import and to answer its first request.
+
+Runs `python -X importtime -c "import main"` and lists the slowest imports,
+then starts uvicorn in a subprocess and polls GET /api/health until it
+answers, reporting the time from process start to the first successful
+response. Each run uses a fresh process, so the numbers include interpreter
+start-up and are what a new worker or autoscaled instance pays.
+
+Run from a scratch directory, since the app creates ./genaistack.db,
+./uploads and its vector store in the working directory.
+
+Usage (from a scratch directory):
+    PYTHONPATH=/path/to/backend python -m benchmarks.startup_benchmark --runs 5
+    PYTHONPATH=/path/to/backend python -m benchmarks.startup_benchmark --warm-up off
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def import_profile(env: dict, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative) / 1000, depth, name.strip()))
+
+    total = next((ms for ms, _, name in rows if name == "main"), None)
+    if total is None:
+        print("import main failed:")
+        print(result.stderr[-2000:])
+        return
+
+    print(f"import main: {total:.0f} ms")
+    # Only the first few levels, so one slow package is not listed once per submodule
+    slowest = sorted((row for row in rows if row[1] <= 3 and row[2] != "main"), reverse=True)[:top]
+    for ms, _, name in slowest:
+        print(f"  {ms:8.1f} ms  {name}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(env: dict, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with code {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"no response within {timeout:g} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--warm-up", choices=["blocking", "background", "off"], help="Override STARTUP_WARM_UP")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.warm_up:
+        env["STARTUP_WARM_UP"] = args.warm_up
+
+    import_profile(env, args.top)
+
+    timings = [time_to_first_request(env, args.timeout) for _ in range(args.runs)]
+    print(
+        f"time to first request ({env.get('STARTUP_WARM_UP', 'blocking')} warm-up, {args.runs} runs): "
+        f"median {statistics.median(timings):.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare querying an embedded collection in-process against the vector store process.
+
+Loads synthetic clustered embeddings into a temporary embedded store, then
+measures single-query latency in-process and through `vector-server` over
+its Unix socket, and the throughput of concurrent callers (standing in for
+API workers) against the server with query batching on and off.
+
+Usage (from the backend directory):
+    python -m benchmarks.vector_server_benchmark --chunks 50000 --concurrency 16
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.vector_backends.embedded_backend import EmbeddedBackend
+from app.services.vector_backends.remote_backend import RemoteBackend
+from benchmarks.quantization_benchmark import make_embeddings, percentile
+from benchmarks.shard_benchmark import measure
+
+
+def start_server(root: str, socket_path: str, batch_window_ms: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        VECTOR_DATA_PATH=root,
+        VECTOR_SERVER_BATCH_WINDOW_MS=str(batch_window_ms)
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.cli", "vector-server", "--backend", "embedded", "--socket", socket_path],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    backend = RemoteBackend(socket_path)
+    deadline = time.perf_counter() + 60
+    while not backend.ping():
+        if server.poll() is not None or time.perf_counter() > deadline:
+            server.kill()
+            raise RuntimeError("vector store process did not start")
+        time.sleep(0.05)
+    backend.close()
+    return server
+
+
+def throughput(collection, queries: np.ndarray, top_k: int, concurrency: int) -> float:
+    def run(query):
+        collection.query(query_embeddings=[query], n_results=top_k, include=["distances"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, queries))
+    return len(queries) / (time.perf_counter() - start)
+
+
+def report(label: str, latencies: list):
+    print(
+        f"{label:<28} mean {np.mean(latencies):6.2f} ms  "
+        f"p50 {percentile(latencies, 0.50):6.2f} ms  p95 {percentile(latencies, 0.95):6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = make_embeddings(args.chunks, args.dimension, rng)
+    queries = make_embeddings(args.queries, args.dimension, rng)
+
+    with tempfile.TemporaryDirectory() as root:
+        backend = EmbeddedBackend(path=root)
+        collection = backend.get_or_create_collection("benchmark")
+        for start in range(0, args.chunks, 5000):
+            end = min(start + 5000, args.chunks)
+            collection.add(
+                ids=[f"chunk_{n}" for n in range(start, end)],
+                documents=[""] * (end - start),
+                metadatas=[{"document_id": n // 20, "chunk_index": n % 20} for n in range(start, end)],
+                embeddings=embeddings[start:end]
+            )
+
+        print(f"{args.chunks:,} chunks x {args.dimension} dims, {args.queries} queries, top-{args.top_k}")
+        report("in-process", measure(collection, queries, args.top_k))
+        in_process = throughput(collection, queries, args.top_k, args.concurrency)
+        backend.close()
+
+        socket_path = os.path.join(root, "vector_store.sock")
+        rates = {}
+        for window in (args.batch_window_ms, 0.0):
+            server = start_server(root, socket_path, window)
+            remote = RemoteBackend(socket_path)
+            try:
+                handle = remote.get_collection("benchmark")
+                if window:
+                    report("vector server", measure(handle, queries, args.top_k))
+                rates[window] = throughput(handle, queries, args.top_k, args.concurrency)
+            finally:
+                remote.close()
+                server.terminate()
+                server.wait()
+
+        print(f"concurrent throughput ({args.concurrency} callers):")
+        print(f"  in-process                 {in_process:8.0f} queries/s")
+        print(f"  server, batching {args.batch_window_ms:g} ms     {rates[args.batch_window_ms]:8.0f} queries/s")
+        print(f"  server, no batching        {rates[0.0]:8.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
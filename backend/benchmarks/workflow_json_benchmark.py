@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Time serialization of a large workflow graph in each storage and response encoding.
+
+Builds a synthetic React Flow graph and reports per-call encode and decode
+times for the old double-encoded column (a JSON string inside JSON), the
+native JSON column with the stdlib and orjson codecs, and the rendering of
+a workflow response with JSONResponse and ORJSONResponse.
+
+Usage (from the backend directory):
+    python -m benchmarks.workflow_json_benchmark --nodes 500
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.schemas.schemas import WorkflowResponse
+
+
+def make_graph(node_count: int):
+    component_types = ["user-query", "knowledge-base", "llm-engine", "output"]
+    nodes = [
+        {
+            "id": f"node-{n}",
+            "type": "custom",
+            "position": {"x": 120.5 * (n % 25), "y": 80.25 * (n // 25)},
+            "data": {
+                "label": f"Component {n}",
+                "componentType": component_types[n % len(component_types)],
+                "config": {
+                    "model": "gpt-4o-mini",
+                    "temperature": 0.7,
+                    "prompt": "You are a helpful assistant. Answer using the context. " * 4,
+                    "maxResults": 5,
+                    "searchMode": "hybrid",
+                    "useMmr": n % 2 == 0
+                }
+            }
+        }
+        for n in range(node_count)
+    ]
+    edges = [
+        {"id": f"edge-{n}", "source": f"node-{n}", "target": f"node-{n + 1}", "sourceHandle": None, "targetHandle": None}
+        for n in range(node_count - 1)
+    ]
+    return nodes, edges
+
+
+def per_call_ms(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    nodes, edges = make_graph(args.nodes)
+    graph_text = json.dumps(nodes)
+    print(f"{args.nodes} nodes, {args.nodes - 1} edges, nodes column {len(graph_text):,} bytes")
+
+    # What the API did before: json.dumps in the router, then the JSON column's own dumps
+    double_encoded = json.dumps(json.dumps(nodes))
+    orjson_encoded = orjson.dumps(nodes)
+
+    rows = [
+        ("double-encoded, json",
+         lambda: json.dumps(json.dumps(nodes)),
+         lambda: json.loads(json.loads(double_encoded))),
+        ("native column, json",
+         lambda: json.dumps(nodes),
+         lambda: json.loads(graph_text)),
+        ("native column, orjson",
+         lambda: orjson.dumps(nodes).decode(),
+         lambda: orjson.loads(orjson_encoded)),
+    ]
+
+    print(f"\n{'storage':<24} {'encode ms':>10} {'decode ms':>10}")
+    for name, encode, decode in rows:
+        print(f"{name:<24} {per_call_ms(encode, args.repeat):>10.3f} {per_call_ms(decode, args.repeat):>10.3f}")
+
+    now = datetime.utcnow()
+    content = jsonable_encoder(WorkflowResponse(
+        id=1, name="benchmark", description=None, nodes=nodes, edges=edges,
+        is_valid=True, is_active=True, version=1, created_at=now, updated_at=now
+    ))
+    print(f"\n{'response class':<24} {'render ms':>10}")
+    for response_class in (JSONResponse, ORJSONResponse):
+        print(f"{response_class.__name__:<24} {per_call_ms(lambda: response_class(content), args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -9,8 +11,17 @@ load_dotenv()
 
 # Import routers
 try:
-    from app.routers import workflows, documents, chat, health
-    from app.db.database import create_tables
+    from app.routers import workflows, documents, chat, health, maintenance
+    from app.db.database import create_tables, engine, SessionLocal
+    from app.models.database import Workflow
+    from sqlalchemy import select
+    from app.services.llm_service import preload_llm_clients
+    from app.services.vector_service import VectorService, shutdown_vector_executors
+    from app.services.vector_gc_service import run_vector_gc_periodically
+    from app.services.chat_archive_service import run_chat_archive_periodically
+    from app.services.chat_message_buffer import start_chat_message_buffer, shutdown_chat_message_buffer
+    from app.services.conversation_memory import shutdown_history_compaction
+    from app.services.admission_control import AdmissionControlMiddleware
 except ImportError as e:
     print(f"Import error: {e}")
     # Create minimal app for testing
@@ -25,12 +36,102 @@ except ImportError as e:
         import uvicorn
         uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
 
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+async def warm_up():
+    """
+    Load what the first requests would otherwise wait for: LLM SDKs and vector collections
+    """
+    try:
+        loaded = await preload_llm_clients()
+        if loaded:
+            print(f"Loaded LLM clients: {', '.join(loaded)}")
+    except Exception as e:
+        print(f"Warning: Could not load LLM clients: {e}")
+
+    # Resolve collection handles for active workflows before the first chat
+    try:
+        async with SessionLocal() as db:
+            result = await db.execute(select(Workflow.id).where(Workflow.is_active == True))
+            workflow_ids = list(result.scalars())
+
+        warmed = await VectorService().warm_up_collections(
+            f"workflow_{workflow_id}" for workflow_id in workflow_ids
+        )
+        print(f"Warmed up {warmed} vector collections")
+    except Exception as e:
+        print(f"Warning: Could not warm up vector collections: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs("uploads", exist_ok=True)
+
+    # Schema setup; deployments with several workers can run `python -m app.cli migrate`
+    # once before starting them and set DB_MIGRATE_ON_STARTUP=false
+    if _env_flag("DB_MIGRATE_ON_STARTUP", "true"):
+        try:
+            await create_tables()
+            print("Database tables created successfully")
+        except Exception as e:
+            print(f"Warning: Could not create database tables: {e}")
+
+    # blocking: ready once warmed up; background: ready at once, warm up meanwhile; off: load on first use
+    warm_up_mode = os.getenv("STARTUP_WARM_UP", "background").strip().lower()
+    if warm_up_mode == "blocking":
+        await warm_up()
+    elif warm_up_mode == "background":
+        app.state.warm_up_task = asyncio.create_task(warm_up())
+
+    # Optional periodic clean-up of orphaned vectors; disabled when the interval is 0
+    interval_hours = float(os.getenv("VECTOR_GC_INTERVAL_HOURS", "0"))
+    if interval_hours > 0:
+        app.state.vector_gc_task = asyncio.create_task(
+            run_vector_gc_periodically(interval_hours * 3600)
+        )
+        print(f"Vector garbage collection scheduled every {interval_hours:g} hours")
+
+    # Optional periodic move of old chat messages to the archive; disabled when the interval is 0
+    interval_hours = float(os.getenv("CHAT_ARCHIVE_INTERVAL_HOURS", "0"))
+    if interval_hours > 0:
+        app.state.chat_archive_task = asyncio.create_task(
+            run_chat_archive_periodically(interval_hours * 3600)
+        )
+        print(f"Chat archival scheduled every {interval_hours:g} hours")
+
+    # Chat messages are batched into bulk inserts unless CHAT_WRITE_BEHIND is off
+    try:
+        if await start_chat_message_buffer():
+            print("Chat message write-behind enabled")
+    except Exception as e:
+        print(f"Warning: Could not start chat message buffer, writing messages inline: {e}")
+
+    yield
+
+    for task_name in ("warm_up_task", "vector_gc_task", "chat_archive_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+
+    # Unfinished summaries are redone on the session's next turn
+    await shutdown_history_compaction()
+    # Let in-flight ingestion batches finish before the process exits
+    shutdown_vector_executors(wait=True)
+    # Queued chat messages are written before the connection pool goes away
+    await shutdown_chat_message_buffer()
+    await engine.dispose()
+
 app = FastAPI(
     title="GenAI Stack API",
     description="A No-Code/Low-Code workflow builder API for AI applications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Bound concurrent workflow executions (ADMISSION_*); added first so CORS headers
+# are also set on its 429/503 responses
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -45,17 +146,10 @@ app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(workflows.router, prefix="/api/workflows", tags=["workflows"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
+app.include_router(maintenance.router, prefix="/api/maintenance", tags=["maintenance"])
 
-# Static files for uploaded documents
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-# Create database tables on startup
-try:
-    create_tables()
-    print("Database tables created successfully")
-except Exception as e:
-    print(f"Warning: Could not create database tables: {e}")
+# Static files for uploaded documents; the directory is created at startup
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,15 @@
+from app.services.bm25_index import BM25Index
+
+
+def test_readding_documents_compacts_tombstones():
+    index = BM25Index()
+    doc_ids = [f"d{number}" for number in range(100)]
+    for round_number in range(20):
+        index.add(doc_ids, [f"word{number} round{round_number}" for number in range(100)])
+
+    assert len(index) == 100
+    # Tombstones never pass a quarter of the index
+    assert len(index._doc_ids) <= 100 * 4 // 3
+    assert index.search("round19", 1)[0][0] in doc_ids
+    assert index.search("round3", 1) == []
+    assert index.search("word7", 1)[0][0] == "d7"
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from app.services.vector_service import VectorExecutor
+
+
+def _track_outstanding(executor):
+    """
+    Record how many submitted calls are still running or queued at each submit
+    """
+    submit = executor._executor.submit
+    futures = []
+    outstanding = []
+
+    def tracking_submit(*args, **kwargs):
+        future = submit(*args, **kwargs)
+        futures.append(future)
+        outstanding.append(sum(1 for tracked in futures if not tracked.done()))
+        return future
+
+    executor._executor.submit = tracking_submit
+    return outstanding
+
+
+def test_timed_out_callers_keep_their_slot_until_the_call_finishes():
+    executor = VectorExecutor("test", max_workers=1, max_pending=1)
+    outstanding = _track_outstanding(executor)
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(executor.run(time.sleep, 0.2), timeout=0.01)
+        except asyncio.TimeoutError:
+            pass
+        # The abandoned call is still running, so only one more may be queued
+        results = await asyncio.gather(*(executor.run(time.sleep, 0.01) for _ in range(3)))
+        return len(results), executor._slots._value
+
+    try:
+        finished, free_slots = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert finished == 3
+    assert max(outstanding) <= 2
+    assert free_slots == 2
+
+
+def test_cancelled_caller_frees_a_queued_slot():
+    executor = VectorExecutor("test", max_workers=1, max_pending=1)
+
+    async def scenario():
+        blocker = asyncio.ensure_future(executor.run(time.sleep, 0.05))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(executor.run(time.sleep, 0.05))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await blocker
+        await asyncio.sleep(0.01)
+        return executor._slots._value
+
+    try:
+        assert asyncio.run(scenario()) == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,84 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, Workflow
+from app.services.vector_gc_service import VectorGarbageCollector
+
+
+class FakeVectorService:
+    """
+    In-memory stand-in for VectorService with one chunk-free collection per workflow
+    """
+
+    def __init__(self, collections, on_list=None):
+        self.collections = list(collections)
+        self.on_list = on_list
+        self.dropped = []
+
+    async def collection_names(self):
+        if self.on_list is not None:
+            await self.on_list()
+        return list(self.collections)
+
+    async def collection_usage(self, collection_name):
+        return {"vectors": 10, "bytes": 1000, "bytes_estimated": False}
+
+    async def drop_collection(self, collection_name):
+        self.dropped.append(collection_name)
+
+    async def chunks_by_document(self, collection_name):
+        return {}
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_drops_collections_of_inactive_workflows():
+    async def scenario():
+        engine, sessions = await _session_factory()
+        async with sessions() as db:
+            db.add_all([Workflow(id=1, name="live", is_active=True), Workflow(id=2, name="old", is_active=False)])
+            await db.commit()
+
+        vector_service = FakeVectorService(["workflow_1", "workflow_2", "workflow_3"])
+        async with sessions() as db:
+            report = await VectorGarbageCollector(db, vector_service).run()
+        await engine.dispose()
+        return vector_service.dropped, report
+
+    dropped, report = asyncio.run(scenario())
+    assert dropped == ["workflow_2", "workflow_3"]
+    assert report["collections_dropped"] == ["workflow_2", "workflow_3"]
+
+
+def test_keeps_collection_of_workflow_activated_during_the_run():
+    async def scenario():
+        engine, sessions = await _session_factory()
+        async with sessions() as db:
+            db.add(Workflow(id=2, name="paused", is_active=False))
+            await db.commit()
+
+        async def activate_meanwhile():
+            # Committed by another request after the GC read the active workflows
+            async with sessions() as other:
+                other.add(Workflow(id=1, name="new", is_active=True))
+                workflow = await other.get(Workflow, 2)
+                workflow.is_active = True
+                await other.commit()
+
+        vector_service = FakeVectorService(["workflow_1", "workflow_2"], on_list=activate_meanwhile)
+        async with sessions() as db:
+            report = await VectorGarbageCollector(db, vector_service).run()
+        await engine.dispose()
+        return vector_service.dropped, report
+
+    dropped, report = asyncio.run(scenario())
+    assert dropped == []
+    assert report["collections_dropped"] == []
+    assert report["collections_scanned"] == 2
@@ -0,0 +1,95 @@
+import copy
+import random
+
+import pytest
+
+from app.routers.workflows import validate_workflow_structure
+from app.schemas.schemas import GraphOperation
+from app.services.workflow_graph import GraphPatch, GraphPatchError
+
+_TYPES = ["user-query", "knowledge-base", "llm-engine", "output"]
+
+
+def _node(node_id, component_type):
+    return {
+        "id": node_id,
+        "type": "custom",
+        "position": {"x": 0, "y": 0},
+        "data": {"componentType": component_type, "config": {}}
+    }
+
+
+def _edge(edge_id, source, target):
+    return {"id": edge_id, "source": source, "target": target}
+
+
+def _valid_graph():
+    nodes = [_node(f"n{index}", component_type) for index, component_type in enumerate(_TYPES)]
+    edges = [_edge(f"e{index}", f"n{index}", f"n{index + 1}") for index in range(len(nodes) - 1)]
+    return nodes, edges
+
+
+def _random_operation(rng, nodes, edges, serial):
+    node_ids = [node["id"] for node in nodes]
+    choice = rng.randrange(7)
+    if choice == 0:
+        return GraphOperation(op="add", path=f"/nodes/x{serial}", value=_node(f"x{serial}", rng.choice(_TYPES)))
+    if choice == 1 and node_ids:
+        return GraphOperation(op="remove", path=f"/nodes/{rng.choice(node_ids)}")
+    if choice == 2 and node_ids:
+        return GraphOperation(
+            op="replace", path=f"/nodes/{rng.choice(node_ids)}/data/componentType", value=rng.choice(_TYPES)
+        )
+    if choice == 3 and node_ids:
+        return GraphOperation(op="replace", path=f"/nodes/{rng.choice(node_ids)}/position", value={"x": 1, "y": 2})
+    if choice == 4 and len(node_ids) > 1:
+        source, target = rng.sample(node_ids, 2)
+        return GraphOperation(op="add", path=f"/edges/y{serial}", value=_edge(f"y{serial}", source, target))
+    if choice == 5 and edges:
+        return GraphOperation(op="remove", path=f"/edges/{rng.choice(edges)['id']}")
+    if node_ids:
+        node_id = rng.choice(node_ids)
+        return GraphOperation(op="replace", path=f"/nodes/{node_id}", value=_node(node_id, rng.choice(_TYPES)))
+    return GraphOperation(op="add", path=f"/nodes/x{serial}", value=_node(f"x{serial}", "output"))
+
+
+def test_position_change_keeps_graph_valid_without_structure_change():
+    nodes, edges = _valid_graph()
+    patch = GraphPatch(nodes, edges)
+    patch.apply([GraphOperation(op="replace", path="/nodes/n1/position", value={"x": 5, "y": 5})])
+    assert not patch.structure_changed
+    assert patch.still_valid()
+
+
+def test_retyping_the_only_output_invalidates():
+    nodes, edges = _valid_graph()
+    patch = GraphPatch(nodes, edges)
+    patch.apply([GraphOperation(op="replace", path="/nodes/n3/data/componentType", value="llm-engine")])
+    assert patch.retyped == {"n3"}
+    assert not patch.still_valid()
+
+
+def test_removing_every_edge_invalidates():
+    nodes, edges = _valid_graph()
+    patch = GraphPatch(nodes, edges)
+    patch.apply([GraphOperation(op="remove", path=f"/edges/{edge['id']}") for edge in edges])
+    assert not patch.still_valid()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_check_matches_full_validation(seed):
+    rng = random.Random(seed)
+    nodes, edges = _valid_graph()
+    for serial in range(40):
+        operations = [_random_operation(rng, nodes, edges, f"{serial}_{index}") for index in range(rng.randint(1, 3))]
+        patch = GraphPatch(copy.deepcopy(nodes), copy.deepcopy(edges))
+        try:
+            patch.apply(operations)
+        except GraphPatchError:
+            continue
+        expected = validate_workflow_structure(patch.nodes, patch.edges)
+        assert patch.still_valid() == expected
+        nodes, edges = patch.nodes, patch.edges
+        if not expected:
+            # still_valid assumes the graph passed before the patch
+            nodes, edges = _valid_graph()
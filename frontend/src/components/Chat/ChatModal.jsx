@@ -15,6 +15,7 @@ const ChatModal = ({ workflowId, onClose }) => {
   const [inputValue, setInputValue] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [loadingProgress, setLoadingProgress] = useState('');
+  const [sessionId, setSessionId] = useState(null);
   const messagesEndRef = useRef(null);
 
   const scrollToBottom = () => {
@@ -25,6 +26,18 @@ const ChatModal = ({ workflowId, onClose }) => {
     scrollToBottom();
   }, [messages]);
 
+  // A chat session lets the backend keep the conversation history, so each
+  // message only needs to carry the new text
+  useEffect(() => {
+    const createSession = async () => {
+      const response = await apiCall('post', `/api/chat/sessions?workflow_id=${workflowId}`);
+      if (response && response.success !== false) {
+        setSessionId(response.data.session_id);
+      }
+    };
+    createSession();
+  }, [workflowId]);
+
   const handleSendMessage = async () => {
     if (!inputValue.trim() || isLoading) return;
 
@@ -59,6 +72,7 @@ const ChatModal = ({ workflowId, onClose }) => {
       const response = await Promise.race([
         apiCall('post', `/api/workflows/${workflowId}/chat`, {
           message: inputValue,
+          ...(sessionId && { session_id: sessionId }),
         }),
         new Promise((_, reject) => 
           setTimeout(() => reject(new Error('Request timeout')), 45000)
@@ -161,6 +161,12 @@ const ConfigurationPanel = ({ node, onUpdateConfig, workflowId }) => {
           { value: 'openai', label: 'OpenAI Embeddings' },
           { value: 'gemini', label: 'Gemini Embeddings' },
         ];
+      case 'searchMode':
+        return [
+          { value: 'vector', label: 'Semantic (Vector)' },
+          { value: 'keyword', label: 'Keyword (BM25)' },
+          { value: 'hybrid', label: 'Hybrid (Vector + BM25)' },
+        ];
       case 'searchEngine':
         return [
           { value: 'serpapi', label: 'SerpAPI' },
@@ -183,6 +189,13 @@ const ConfigurationPanel = ({ node, onUpdateConfig, workflowId }) => {
       maxTokens: 'number',
       model: 'select',
       embeddingModel: 'select',
+      searchMode: 'select',
+      mmr: 'checkbox',
+      mmrLambda: 'number',
+      fetchK: 'number',
+      maxDistance: 'number',
+      adaptiveK: 'checkbox',
+      minScoreRatio: 'number',
       searchEngine: 'select',
       displayFormat: 'select',
       webSearch: 'checkbox',
@@ -201,6 +214,13 @@ const ConfigurationPanel = ({ node, onUpdateConfig, workflowId }) => {
       maxFileSize: 'Max File Size',
       embeddingModel: 'Embedding Model',
       vectorStore: 'Vector Store',
+      searchMode: 'Search Mode',
+      mmr: 'Diversify Results (MMR)',
+      mmrLambda: 'MMR Lambda',
+      fetchK: 'MMR Candidates',
+      maxDistance: 'Max Distance',
+      adaptiveK: 'Adaptive Result Count',
+      minScoreRatio: 'Min Score Ratio',
       model: 'LLM Model',
       temperature: 'Temperature',
       maxTokens: 'Max Tokens',
@@ -222,6 +242,13 @@ const ConfigurationPanel = ({ node, onUpdateConfig, workflowId }) => {
       systemPrompt: 'Instructions that guide the AI\'s behavior',
       webSearch: 'Enable real-time web search for current information',
       embeddingModel: 'Model used to create document embeddings',
+      searchMode: 'Hybrid also matches exact identifiers and error codes',
+      mmr: 'Skip near-duplicate overlapping chunks',
+      mmrLambda: 'Relevance vs. diversity (1.0 = relevance only)',
+      fetchK: 'Candidates fetched before diversification',
+      maxDistance: 'Drop chunks farther than this cosine distance (empty = no cutoff)',
+      adaptiveK: 'Keep only chunks scoring close to the best match',
+      minScoreRatio: 'Fraction of the best score a chunk must reach (adaptive mode)',
       supportedFormats: 'File types that can be uploaded',
     };
     return descriptions[key];
@@ -25,6 +25,13 @@ export const COMPONENT_TYPES = [
       maxFileSize: '10MB',
       embeddingModel: 'openai',
       vectorStore: 'chromadb',
+      searchMode: 'vector',
+      mmr: false,
+      mmrLambda: 0.5,
+      fetchK: 20,
+      maxDistance: null,
+      adaptiveK: false,
+      minScoreRatio: 0.8,
     },
   },
   {